@@ -16,7 +16,7 @@ class DemoLoginRequest(BaseModel):
 
 
 @router.post("/demo-login")
-def demo_login(data: DemoLoginRequest):
+async def demo_login(data: DemoLoginRequest):
     if data.password != settings.DEMO_PASSWORD:
         raise HTTPException(status_code=404)
 
@@ -5,5 +5,5 @@ from fastapi import APIRouter
 router = APIRouter()
 
 @router.get("/health")
-def health():
+async def health():
     return {"status": "ok"}
@@ -1,127 +1,160 @@
 # backend/app/api/v1/admin.py
 
 from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
-from sqlalchemy.orm import Session
-from app.db.base import get_db
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.base import get_async_db
 from app import models
+from app.core.dashboard_cache import dashboard_cache
+from app.core.risk_counters import adjust_risk_counter
 from app.schemas import BulkImportResponse, StudentCredentialOutput
+from itertools import islice
+from typing import Dict, List, Tuple
 import csv
 import io
 
 router = APIRouter()
 
+# Rows per transaction. Har chunk = 2 multi-row INSERTs + 1 counter upsert.
+IMPORT_CHUNK_SIZE = 1000
+
+
+def _read_chunk(reader: csv.DictReader, size: int) -> List[Tuple[str, str]]:
+    """Next `size` CSV rows as (name, roll_no); blocking file IO, threadpool mein chalao."""
+    chunk = []
+    for row in islice(reader, size):
+        chunk.append(((row.get("name") or "").strip(), (row.get("roll_no") or "").strip()))
+    return chunk
+
+
+async def _insert_students(
+    db: AsyncSession,
+    class_id: int,
+    school_id: int,
+    new_rows: List[Tuple[str, str]],
+) -> None:
+    """Users + profiles for one chunk, as two multi-row INSERTs (no per-row flush)."""
+    emails = {roll_no: f"{roll_no}_{class_id}@pilot.school" for _, roll_no in new_rows}
+
+    # ON CONFLICT: agar pehle ka orphan user (bina profile) same email ke saath pada hai
+    result = await db.execute(
+        pg_insert(models.User.__table__)
+        .on_conflict_do_nothing(index_elements=["email"])
+        .returning(models.User.__table__.c.id, models.User.__table__.c.email),
+        [
+            {
+                "email": emails[roll_no],
+                "hashed_password": None,  # Auth handle karega; backend mein store nahi kar rahe
+                "role": models.UserRole.STUDENT,
+                "school_id": school_id,
+                "full_name": name,
+            }
+            for name, roll_no in new_rows
+        ],
+    )
+    user_ids: Dict[str, int] = {email: user_id for user_id, email in result.all()}
+
+    missing = [e for e in emails.values() if e not in user_ids]
+    if missing:
+        result = await db.execute(
+            select(models.User.email, models.User.id).where(models.User.email.in_(missing))
+        )
+        user_ids.update(dict(result.all()))
+
+    await db.execute(
+        insert(models.StudentProfile.__table__),
+        [
+            {
+                "user_id": user_ids[emails[roll_no]],
+                "class_id": class_id,
+                "roll_number": roll_no,
+                "risk_status": "GREEN",
+                "streak_count": 0,
+            }
+            for _, roll_no in new_rows
+        ],
+    )
+    # Core insert mapper hooks skip karta hai, so counters khud update karo
+    await adjust_risk_counter(db, class_id, "GREEN", len(new_rows))
+
 
 @router.post("/bulk-import-students", response_model=BulkImportResponse)
 async def bulk_import_students(
     class_id: int,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     # 1. Validate file type
     if not file.filename.endswith(".csv"):
         raise HTTPException(status_code=400, detail="File must be a CSV")
 
     # 2. Fetch class to get school_id
-    classroom = (
-        db.query(models.Class)
-        .filter(models.Class.id == class_id)
-        .first()
-    )
+    classroom = await db.get(models.Class, class_id)
     if not classroom:
         raise HTTPException(status_code=404, detail=f"Class ID {class_id} not found")
 
     school_id = classroom.school_id
 
-    # 3. Read CSV content
-    content = await file.read()
-    decoded = content.decode("utf-8")
-
-    # DEBUG: Print raw CSV
-    print("---- RAW CSV ----")
-    print(decoded)
-    print("-----------------")
+    # 3. Class ke existing roll numbers ek hi query mein (per-row SELECT nahi)
+    result = await db.execute(
+        select(models.StudentProfile.roll_number)
+        .where(models.StudentProfile.class_id == class_id)
+    )
+    taken = {roll for roll in result.scalars().all() if roll}
 
-    csv_reader = csv.DictReader(io.StringIO(decoded), skipinitialspace=True)
+    # 4. Stream the upload: spooled temp file se row by row, poora content memory mein nahi
+    text_stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    csv_reader = csv.DictReader(text_stream, skipinitialspace=True)
 
     # Normalize headers (strip spaces)
-    if csv_reader.fieldnames:
-        csv_reader.fieldnames = [h.strip() for h in csv_reader.fieldnames]
+    fieldnames = await run_in_threadpool(lambda: csv_reader.fieldnames)
+    if fieldnames:
+        csv_reader.fieldnames = [h.strip() for h in fieldnames]
 
     results = []
 
-    # 4. Process each row
-    for row in csv_reader:
-        print("Row:", row)  # DEBUG
-
-        name = (row.get("name") or "").strip()
-        roll_no = (row.get("roll_no") or "").strip()
-
-        if not name or not roll_no:
-            print("Skipping row (missing name/roll_no)")
-            continue
-
-        # Fake email just to satisfy unique constraint and structure
-        fake_email = f"{roll_no}_{class_id}@pilot.school"
-
-        # Simple PIN for child login (we just expose roll_no + "00")
-        pin = f"{roll_no}00"
-
-        # Check if a student with this roll_no already exists in this class
-        existing_profile = (
-            db.query(models.StudentProfile)
-            .filter(
-                models.StudentProfile.class_id == class_id,
-                models.StudentProfile.roll_number == roll_no,
-            )
-            .first()
-        )
-
-        if existing_profile:
-            results.append(
-                StudentCredentialOutput(
-                    name=name,
-                    username=roll_no,
-                    temp_password=pin,
-                    class_id=str(class_id),
-                    status="Already Exists",
+    # 5. Chunked transactions: har chunk ek commit
+    try:
+        while True:
+            chunk = await run_in_threadpool(_read_chunk, csv_reader, IMPORT_CHUNK_SIZE)
+            if not chunk:
+                break
+
+            new_rows = []
+            for name, roll_no in chunk:
+                if not name or not roll_no:
+                    continue
+
+                # Simple PIN for child login (we just expose roll_no + "00")
+                pin = f"{roll_no}00"
+
+                # DB mein already hai, ya isi CSV mein pehle aa chuka hai
+                status = "Already Exists" if roll_no in taken else "Created"
+                if status == "Created":
+                    taken.add(roll_no)
+                    new_rows.append((name, roll_no))
+
+                results.append(
+                    StudentCredentialOutput(
+                        name=name,
+                        username=roll_no,       # child will use roll_no
+                        temp_password=pin,      # child PIN
+                        class_id=str(class_id),
+                        status=status,
+                    )
                 )
-            )
-            continue
-
-        # 5. Create User row
-        new_user = models.User(
-            email=fake_email,
-            hashed_password=None,  # Auth handle karega; backend mein store nahi kar rahe
-            role=models.UserRole.STUDENT,
-            school_id=school_id,
-            full_name=name,
-        )
-        db.add(new_user)
-        db.flush()  # generate new_user.id
-
-        # 6. Create StudentProfile row
-        new_profile = models.StudentProfile(
-            user_id=new_user.id,
-            class_id=class_id,
-            roll_number=roll_no,
-            risk_status="GREEN",
-            streak_count=0,
-        )
-        db.add(new_profile)
-
-        results.append(
-            StudentCredentialOutput(
-                name=name,
-                username=roll_no,       # child will use roll_no
-                temp_password=pin,      # child PIN
-                class_id=str(class_id),
-                status="Created",
-            )
-        )
 
-    db.commit()
+            if new_rows:
+                await _insert_students(db, class_id, school_id, new_rows)
+                await db.commit()
+    finally:
+        text_stream.detach()  # UploadFile apna file khud close karega
+        # Risk counters badle (even if a later chunk failed, earlier ones are committed)
+        await dashboard_cache.invalidate(class_id)
 
     return BulkImportResponse(
         total_processed=len(results),
         students=results,
-    )
\ No newline at end of file
+    )
@@ -1,16 +1,23 @@
 # app/api/v1/counselors.py
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
 from app import models, schemas
 from typing import List
-from app.db.base import get_db
+from app.db.base import get_read_db
 from app import models
 from app.core.deps.auth import require_demo
 from app.core.deps.entrypoint import require_entrypoint
 from app.core.constants import ROLES, ENTRYPOINTS
+from app.core.alerts import sse_events
+from app.core.dashboard_cache import SCHOOL, dashboard_cache
+from app.core.responses import json_response
+from app.core.risk_counters import risk_zone_summary
+from app.core.timeseries import TimeseriesRangeError, student_timeseries
+from app.core.pagination import PageParams, keyset_paginate, split_page
 
 router = APIRouter(prefix="/counselors", tags=["counselors"])
 
@@ -19,63 +26,57 @@ router = APIRouter(prefix="/counselors", tags=["counselors"])
 # 1) Overall school risk summary
 # --------------------------------------
 @router.get("/dashboard")
-def dashboard(
-    db: Session = Depends(get_db),
+async def dashboard(
+    db: AsyncSession = Depends(get_read_db),
     _role = Depends(require_demo(ROLES["COUNSELOR"])),
     _ep   = Depends(require_entrypoint(ENTRYPOINTS["COUNSELOR"])),
 ):
     """
     Returns real-time count of students in each risk zone.
     """
-    stats = (
-        db.query(
-            models.StudentProfile.risk_status,
-            func.count(models.StudentProfile.id),
-        )
-        .group_by(models.StudentProfile.risk_status)
-        .all()
+    return await dashboard_cache.cached(
+        "counselors.dashboard",
+        {"role": _role.get("role")},
+        scopes=[SCHOOL],
+        compute=lambda: risk_zone_summary(db),
     )
 
-    data = {status: count for status, count in stats}
-
-    return {
-        "green": data.get("GREEN", 0),
-        "orange": data.get("ORANGE", 0),
-        "red": data.get("RED", 0),
-        "crisis": data.get("CRISIS", 0),
-    }
-
 
 # --------------------------------------
 # 2) Class-wise risk summary
 # --------------------------------------
 @router.get("/dashboard/by-class")
-def dashboard_by_class(
-    db: Session = Depends(get_db),
+async def dashboard_by_class(
+    db: AsyncSession = Depends(get_read_db),
     _role = Depends(require_demo(ROLES["COUNSELOR"])),
     _ep   = Depends(require_entrypoint(ENTRYPOINTS["COUNSELOR"])),
 ):
     """
     Har class ke liye GREEN / ORANGE / RED / CRISIS counts.
     """
-    rows = (
-        db.query(
+    return await dashboard_cache.cached(
+        "counselors.dashboard_by_class",
+        {"role": _role.get("role")},
+        scopes=[SCHOOL],
+        compute=lambda: _class_risk_counts(db),
+    )
+
+
+async def _class_risk_counts(db: AsyncSession) -> list:
+    result = await db.execute(
+        select(
             models.Class.id,
             models.Class.name,
-            models.StudentProfile.risk_status,
-            func.count(models.StudentProfile.id),
+            models.RiskZoneCounter.risk_status,
+            models.RiskZoneCounter.count,
         )
         .join(
-            models.StudentProfile,
-            models.StudentProfile.class_id == models.Class.id,
+            models.RiskZoneCounter,
+            models.RiskZoneCounter.class_id == models.Class.id,
         )
-        .group_by(
-            models.Class.id,
-            models.Class.name,
-            models.StudentProfile.risk_status,
-        )
-        .all()
+        .where(models.RiskZoneCounter.count > 0)
     )
+    rows = result.all()
 
     result = {}
     for class_id, class_name, risk_status, count in rows:
@@ -95,52 +96,90 @@ def dashboard_by_class(
     return list(result.values())
 
 
+# --------------------------------------
+# 2b) Live alerts (SSE): new SafetyEvents + risk escalations
+# --------------------------------------
+@router.get("/alerts/stream")
+async def alert_stream(
+    request: Request,
+    _role = Depends(require_demo(ROLES["COUNSELOR"])),
+    _ep   = Depends(require_entrypoint(ENTRYPOINTS["COUNSELOR"])),
+):
+    """
+    text/event-stream of `safety_event` / `risk_escalation` events as they commit.
+    Replaces polling /students/risky: load it once on each `ready`, then follow the stream.
+    No DB session held while connected.
+    """
+    return StreamingResponse(
+        sse_events(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},  # nginx buffering off
+    )
+
+
 # --------------------------------------
 # 3) Risky students list (ORANGE / RED / CRISIS)
 # --------------------------------------
-@router.get("/students/risky")
-def get_at_risk_students(
-    db: Session = Depends(get_db),
+@router.get("/students/risky", response_model=schemas.Page[schemas.RiskyStudentOut])
+async def get_at_risk_students(
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_read_db),
     _role = Depends(require_demo(ROLES["COUNSELOR"])),
     _ep   = Depends(require_entrypoint(ENTRYPOINTS["COUNSELOR"])),
 ):
     """
     Returns list of students needing attention:
     id, email, class info, risk_status, streak.
+    Paginated by profile id (profiles have no created_at).
     """
-    students = (
-        db.query(models.StudentProfile)
-        .filter(models.StudentProfile.risk_status.in_(["ORANGE", "RED", "CRISIS"]))
-        .all()
+    # Column-only projection: ek query, koi ORM object / per-row user+class load nahi
+    stmt = keyset_paginate(
+        select(
+            models.StudentProfile.id,
+            models.User.full_name,
+            models.StudentProfile.risk_status,
+            models.StudentProfile.roll_number,
+            models.StudentProfile.streak_count,
+            models.User.email,
+            models.StudentProfile.class_id,
+            models.Class.name,
+        )
+        .outerjoin(models.User, models.User.id == models.StudentProfile.user_id)
+        .outerjoin(models.Class, models.Class.id == models.StudentProfile.class_id)
+        .where(models.StudentProfile.risk_status.in_(["ORANGE", "RED", "CRISIS"])),
+        [models.StudentProfile.id],
+        page,
+        descending=False,
     )
+    result = await db.execute(stmt)
+    rows, next_cursor = split_page(result.all(), page, key=lambda r: (r[0],))
 
-    result = []
-    for s in students:
-        user = s.user
-        classroom = s.classroom
-
-        result.append(
-            {
-                "id": s.id,
-                "name": user.full_name if user else None,
-                "risk_status": s.risk_status,
-                "roll_number": s.roll_number,
-                "streak": s.streak_count,
-                "email": user.email if user else None,
-                "class_id": s.class_id,
-                "class_name": classroom.name if classroom else None,
-            }
-        )
-    return result
+    result = [
+        {
+            "id": student_id,
+            "name": full_name,
+            "risk_status": risk_status,
+            "roll_number": roll_number,
+            "streak": streak_count,
+            "email": email,
+            "class_id": class_id,
+            "class_name": class_name,
+        }
+        for (
+            student_id, full_name, risk_status, roll_number,
+            streak_count, email, class_id, class_name,
+        ) in rows
+    ]
+    return json_response({"items": result, "next_cursor": next_cursor})
 
 
 # --------------------------------------
 # 4) Single student detailed view
 # --------------------------------------
 @router.get("/student/{student_id}")
-def get_student_detail(
+async def get_student_detail(
     student_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     _role = Depends(require_demo(ROLES["COUNSELOR"])),
     _ep   = Depends(require_entrypoint(ENTRYPOINTS["COUNSELOR"])),
 ):
@@ -151,29 +190,42 @@ def get_student_detail(
     - last 14 days moods (date, mood, sleep_hours)
     - recent assessments (type, score, created_at)
     """
-    profile = (
-        db.query(models.StudentProfile)
-        .filter(models.StudentProfile.id == student_id)
-        .first()
+    # Profile + user + class in one joined projection
+    result = await db.execute(
+        select(
+            models.StudentProfile.id,
+            models.User.full_name,
+            models.User.email,
+            models.StudentProfile.roll_number,
+            models.Class.name.label("class_name"),
+            models.StudentProfile.risk_status,
+            models.StudentProfile.streak_count,
+        )
+        .outerjoin(models.User, models.User.id == models.StudentProfile.user_id)
+        .outerjoin(models.Class, models.Class.id == models.StudentProfile.class_id)
+        .where(models.StudentProfile.id == student_id)
     )
+    profile = result.first()
 
     if not profile:
         raise HTTPException(status_code=404, detail="Student not found")
 
-    user = profile.user
-    classroom = profile.classroom
-
     # Last 14 days moods
     cutoff = datetime.utcnow() - timedelta(days=14)
-    moods = (
-        db.query(models.DailyJournal)
-        .filter(
+    result = await db.execute(
+        select(
+            models.DailyJournal.id,
+            models.DailyJournal.date,
+            models.DailyJournal.mood,
+            models.DailyJournal.sleep_hours,
+        )
+        .where(
             models.DailyJournal.student_id == profile.id,
             models.DailyJournal.date >= cutoff,
         )
         .order_by(models.DailyJournal.date.desc())
-        .all()
     )
+    moods = result.all()
 
     recent_moods = [
         {
@@ -186,13 +238,18 @@ def get_student_detail(
     ]
 
     # Recent assessments (latest 10)
-    assessments = (
-        db.query(models.Assessment)
-        .filter(models.Assessment.student_id == profile.id)
+    result = await db.execute(
+        select(
+            models.Assessment.id,
+            models.Assessment.type,
+            models.Assessment.total_score,
+            models.Assessment.created_at,
+        )
+        .where(models.Assessment.student_id == profile.id)
         .order_by(models.Assessment.created_at.desc())
         .limit(10)
-        .all()
     )
+    assessments = result.all()
 
     assessments_out = [
         {
@@ -206,42 +263,81 @@ def get_student_detail(
 
     return {
     "id": profile.id,
-    "name": user.full_name if user else None,
-    "email": user.email if user else None,
+    "name": profile.full_name,
+    "email": profile.email,
     "roll_number": profile.roll_number,
-    "class_name": classroom.name if classroom else None,
+    "class_name": profile.class_name,
     "risk_status": profile.risk_status,
     "streak_count": profile.streak_count,
     "recent_moods": recent_moods,
     "assessments": assessments_out,
 }
 
-@router.get("/reports", response_model=List[schemas.IncidentReportOut])
-def get_incident_reports_for_counselor(
-    db: Session = Depends(get_db),
+
+@router.get("/student/{student_id}/timeseries")
+async def get_student_timeseries(
+    student_id: int,
+    days: int = 365,
+    bucket: str = "auto",
+    db: AsyncSession = Depends(get_read_db),
+    _role = Depends(require_demo(ROLES["COUNSELOR"])),
+    _ep   = Depends(require_entrypoint(ENTRYPOINTS["COUNSELOR"])),
+):
+    """
+    Longitudinal sparkline data for one student (detail view ke 14 din se aage):
+    mood score, sleep, keyword-flag rate and assessment scores per day / week /
+    month bucket as parallel arrays. bucket=auto picks by range; see app/core/timeseries.py.
+    """
+    result = await db.execute(
+        select(models.StudentProfile.id).where(models.StudentProfile.id == student_id)
+    )
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Student not found")
+
+    try:
+        return await student_timeseries(db, student_id, days, bucket)
+    except TimeseriesRangeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/reports", response_model=schemas.Page[schemas.IncidentReportOut])
+async def get_incident_reports_for_counselor(
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_read_db),
     _role = Depends(require_demo(ROLES["COUNSELOR"])),
     _ep   = Depends(require_entrypoint(ENTRYPOINTS["COUNSELOR"])),
 ):
     
 
-    reports = (
-        db.query(models.IncidentReport)
-        .join(models.Class, models.IncidentReport.class_id == models.Class.id)
-        .order_by(models.IncidentReport.created_at.desc())
-        .all()
+    stmt = keyset_paginate(
+        select(
+            models.IncidentReport.id,
+            models.IncidentReport.type,
+            models.IncidentReport.description,
+            models.IncidentReport.status,
+            models.IncidentReport.created_at,
+            models.IncidentReport.student_id,
+            models.Class.name.label("class_name"),
+        )
+        .join(models.Class, models.IncidentReport.class_id == models.Class.id),
+        [models.IncidentReport.created_at, models.IncidentReport.id],
+        page,
+    )
+    result = await db.execute(stmt)
+    reports, next_cursor = split_page(
+        result.all(), page, key=lambda r: (r.created_at, r.id)
     )
 
-    result = []
-    for r in reports:
-        result.append(
-            schemas.IncidentReportOut(
-                id=r.id,
-                incident_type=r.type.value,
-                description=r.description,
-                status=r.status.value,
-                class_name=r.classroom.name if r.classroom else None,
-                created_at=r.created_at,
-                is_anonymous=(r.student_id is None),
-            )
-        )
-    return result
\ No newline at end of file
+    # Trusted columns -> plain dicts, no per-row Pydantic model / re-validation
+    result = [
+        {
+            "id": r.id,
+            "incident_type": r.type.value,
+            "description": r.description,
+            "status": r.status.value,
+            "class_name": r.class_name,
+            "created_at": r.created_at,
+            "is_anonymous": r.student_id is None,
+        }
+        for r in reports
+    ]
+    return json_response({"items": result, "next_cursor": next_cursor})
\ No newline at end of file
@@ -1,20 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.base import get_db
+from app.db.base import get_read_db
 from app import models
 from app.core.deps.auth import require_demo
 from app.core.deps.entrypoint import require_entrypoint
 from app.core.constants import ROLES, ENTRYPOINTS
+from app.core.conditional import conditional_response, make_etag
+from app.core.mood_rollup import mood_distribution, window_start
 
 router = APIRouter(prefix="/parents", tags=["parents"])
 
 @router.get("/dashboard")
-def parent_dashboard(
+async def parent_dashboard(
+    request: Request,
+    response: Response,
     days: int = 7,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     _payload = Depends(require_demo(ROLES["PARENT"])),
     _ep   = Depends(require_entrypoint(ENTRYPOINTS["PARENT"])),
 ):
@@ -24,39 +27,56 @@ def parent_dashboard(
     """
 
     # 1) Get some parent user (for demo we just pick the first)
-    parent_user = (
-        db.query(models.User)
-        .filter(models.User.role == models.UserRole.PARENT)
-        .first()
+    parent_id = (
+        select(models.User.id)
+        .where(models.User.role == models.UserRole.PARENT)
+        .limit(1)
+        .scalar_subquery()
     )
 
-    if not parent_user:
-        raise HTTPException(status_code=404, detail="No parent user found")
+    # 2) First linked child + class name, parent lookup included -> one round trip
+    link = models.parent_student_link
+    result = await db.execute(
+        select(
+            parent_id.label("parent_id"),
+            models.StudentProfile.id,
+            models.StudentProfile.risk_status,
+            models.StudentProfile.streak_count,
+            models.Class.name.label("class_name"),
+        )
+        .select_from(link)
+        .join(models.StudentProfile, models.StudentProfile.id == link.c.student_profile_id)
+        .outerjoin(models.Class, models.Class.id == models.StudentProfile.class_id)
+        .where(link.c.parent_id == parent_id)
+        .order_by(models.StudentProfile.id)
+        .limit(1)
+    )
+    student = result.first()
 
-    if not parent_user.children:
+    if not student:
+        # 404 detail same as before: no parent at all vs parent without children
+        result = await db.execute(select(parent_id))
+        if result.scalar() is None:
+            raise HTTPException(status_code=404, detail="No parent user found")
         raise HTTPException(status_code=404, detail="No linked children for this parent")
 
-    # 2) Take the first linked child (student_profile)
-    student = parent_user.children[0]
-    classroom = student.classroom
-
-    cutoff = datetime.utcnow() - timedelta(days=days)
-
-    # 3) Mood distribution for this child
-    mood_counts = (
-        db.query(models.DailyJournal.mood, func.count(models.DailyJournal.id))
-        .filter(
-            models.DailyJournal.student_id == student.id,
-            models.DailyJournal.date >= cutoff,
-        )
-        .group_by(models.DailyJournal.mood)
-        .all()
+    # 3) Version stamp: child row + rollup totals in the window (window shifts daily)
+    R = models.DailyMoodRollup
+    start = window_start(days)
+    result = await db.execute(
+        select(func.coalesce(func.sum(R.count), 0), func.max(R.day))
+        .where(R.student_id == student.id, R.day >= start)
+    )
+    checkins, last_day = result.one()
+    etag = make_etag(
+        "parents.dashboard", tuple(student[1:]), days, start, int(checkins), last_day
     )
+    not_modified = conditional_response(request, response, etag)
+    if not_modified:
+        return not_modified
 
-    total = sum(c for _, c in mood_counts) or 1
-    mood_distribution = {
-        mood: round(count / total * 100, 1) for mood, count in mood_counts
-    }
+    # 4) Mood distribution for this child (daily rollups)
+    child_moods = await mood_distribution(db, days, student_id=student.id)
 
 
     internal_risk = student.risk_status
@@ -69,10 +89,10 @@ def parent_dashboard(
 
     return {
         "student_id": student.id,
-        "class_name": classroom.name if classroom else None,
+        "class_name": student.class_name,
         "risk_status": display_risk,
         "streak_count": student.streak_count,
-        "mood_distribution": mood_distribution,
+        "mood_distribution": child_moods,
         "risk_status_note": (
         "Risk status is calculated mainly from the child's private journal entries "
         "If you see 'CONTACT_SCHOOL', please reach out to the school counselor for more information and support."
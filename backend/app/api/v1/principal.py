@@ -1,134 +1,215 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import datetime, timedelta
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, time
+from typing import List, Literal, Optional
 from app import models, schemas
-from app.db.base import get_db
+from app.db.base import get_async_db, get_read_db
 from app import models
 from app.core.deps.auth import require_demo
 from app.core.deps.entrypoint import require_entrypoint
 from app.core.constants import ROLES, ENTRYPOINTS
+from app.core.dashboard_cache import SCHOOL, dashboard_cache
+from app.core.mood_rollup import SCHOOL_TZ, mood_distribution, window_start
+from app.core.responses import json_response
+from app.core.risk_counters import risk_zone_summary
+from app.core.timeseries import school_bucket
+from app.core.pagination import PageParams, keyset_paginate, split_page
 from app.schemas import BroadcastCreate, BroadcastOut
-from collections import Counter
 
 router = APIRouter(prefix="/principal", tags=["principal"])
 
 @router.get("/dashboard")
-def admin_dashboard(
-    db: Session = Depends(get_db),
+async def admin_dashboard(
+    db: AsyncSession = Depends(get_read_db),
     _role = Depends(require_demo(ROLES["PRINCIPAL"])),
     _ep   = Depends(require_entrypoint(ENTRYPOINTS["PRINCIPAL"])),
 ):
     """
     Admin view: school-wide risk + mood summary.
     """
-    # Risk zones across school
-    risk_stats = (
-        db.query(models.StudentProfile.risk_status, func.count(models.StudentProfile.id))
-        .group_by(models.StudentProfile.risk_status)
-        .all()
+    return await dashboard_cache.cached(
+        "principal.dashboard",
+        {"role": _role.get("role")},
+        scopes=[SCHOOL],
+        compute=lambda: _school_summary(db),
     )
-    risk_data = {status: count for status, count in risk_stats}
 
-    seven_days_ago = datetime.utcnow() - timedelta(days=7)
 
-    # Mood distribution across school
-    mood_stats = (
-        db.query(models.DailyJournal.mood, func.count(models.DailyJournal.id))
-        .filter(models.DailyJournal.date >= seven_days_ago)
-        .group_by(models.DailyJournal.mood)
-        .all()
-    )
-    total_moods = sum(c for _, c in mood_stats) or 1
-    mood_distribution = {
-        mood: round(count / total_moods * 100, 1) for mood, count in mood_stats
-    }
+async def _school_summary(db: AsyncSession) -> dict:
+    # Risk zones across school (materialized counters)
+    risk_zones = await risk_zone_summary(db)
+
+    # Mood distribution across school (daily rollups, last 7 days)
+    school_moods = await mood_distribution(db, 7)
 
     return {
-        "risk_zones": {
-            "green": risk_data.get("GREEN", 0),
-            "orange": risk_data.get("ORANGE", 0),
-            "red": risk_data.get("RED", 0),
-            "crisis": risk_data.get("CRISIS", 0),
-        },
-        "mood_distribution": mood_distribution,
+        "risk_zones": risk_zones,
+        "mood_distribution": school_moods,
     }
 
-@router.get("/reports", response_model=List[schemas.IncidentReportOut])
-def get_incident_reports_for_principal(
-    db: Session = Depends(get_db),
+@router.get("/reports", response_model=schemas.Page[schemas.IncidentReportOut])
+async def get_incident_reports_for_principal(
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_read_db),
     _role = Depends(require_demo(ROLES["PRINCIPAL"])),
     _ep   = Depends(require_entrypoint(ENTRYPOINTS["PRINCIPAL"])),
 ):
     
-    reports = (
-        db.query(models.IncidentReport)
-        .join(models.Class, models.IncidentReport.class_id == models.Class.id)
-        .order_by(models.IncidentReport.created_at.desc())
-        .all()
+    stmt = keyset_paginate(
+        select(
+            models.IncidentReport.id,
+            models.IncidentReport.type,
+            models.IncidentReport.description,
+            models.IncidentReport.status,
+            models.IncidentReport.created_at,
+            models.IncidentReport.student_id,
+            models.Class.name.label("class_name"),
+        )
+        .join(models.Class, models.IncidentReport.class_id == models.Class.id),
+        [models.IncidentReport.created_at, models.IncidentReport.id],
+        page,
+    )
+    result = await db.execute(stmt)
+    reports, next_cursor = split_page(
+        result.all(), page, key=lambda r: (r.created_at, r.id)
     )
 
-    result = []
-    for r in reports:
-        result.append(
-            schemas.IncidentReportOut(
-                id=r.id,
-                incident_type=r.type.value,
-                description=r.description,
-                status=r.status.value,
-                class_name=r.classroom.name if r.classroom else None,
-                created_at=r.created_at,
-                is_anonymous=(r.student_id is None),
-            )
-        )
-    return result
+    # Trusted columns -> plain dicts, no per-row Pydantic model / re-validation
+    result = [
+        {
+            "id": r.id,
+            "incident_type": r.type.value,
+            "description": r.description,
+            "status": r.status.value,
+            "class_name": r.class_name,
+            "created_at": r.created_at,
+            "is_anonymous": r.student_id is None,
+        }
+        for r in reports
+    ]
+    return json_response({"items": result, "next_cursor": next_cursor})
 
 @router.get("/top-stressors")
-def principal_top_stressors(
-    days: int = 7,
-    db: Session = Depends(get_db),
+async def principal_top_stressors(
+    days: int = Query(7, ge=1, le=400),
+    breakdown: Literal["none", "class", "day", "week"] = "none",
+    class_id: Optional[int] = None,
+    tag: Optional[str] = None,
+    limit: int = Query(5, ge=1, le=50),
+    db: AsyncSession = Depends(get_read_db),
     _role = Depends(require_demo(ROLES["PRINCIPAL"])),
     _ep   = Depends(require_entrypoint(ENTRYPOINTS["PRINCIPAL"])),
 ):
     """
     Top stressors across the school based on DailyJournal.trigger_tags.
-    Looks at last `days` days. 
-    trigger_tags is expected to be a JSON array of strings.
+    Looks at last `days` days, optionally for one class / one tag.
+    `breakdown=class|day|week` adds top `limit` tags per class or per bucket.
+    Unnest + count Postgres mein hota hai (JSONB), Python mein sirf top rows aate hain.
     """
-    cutoff = datetime.utcnow() - timedelta(days=days)
-
-    # Last `days` days ke saare journals
-    rows = (
-        db.query(models.DailyJournal.trigger_tags)
-        .filter(models.DailyJournal.date >= cutoff)
-        .all()
+    return await dashboard_cache.cached(
+        "principal.top_stressors",
+        {
+            "days": days,
+            "breakdown": breakdown,
+            "class_id": class_id,
+            "tag": tag,
+            "limit": limit,
+            "role": _role.get("role"),
+        },
+        scopes=[SCHOOL],
+        compute=lambda: _top_stressors(db, days, breakdown, class_id, tag, limit),
     )
 
-    all_tags: list[str] = []
 
-    for (tags,) in rows:
-        if not tags:
-            continue
-        # JSON array case
-        if isinstance(tags, list):
-            all_tags.extend([str(t).strip() for t in tags if t])
-        else:
-            # fallback: comma-separated string
-            for t in str(tags).split(","):
-                t = t.strip()
-                if t:
-                    all_tags.append(t)
+async def _top_stressors(
+    db: AsyncSession,
+    days: int,
+    breakdown: str,
+    class_id: Optional[int],
+    tag: Optional[str],
+    limit: int,
+) -> dict:
+    # School-local days, same as the mood rollups / student time series
+    cutoff = datetime.combine(window_start(days), time.min, tzinfo=SCHOOL_TZ)
+    J = models.DailyJournal
+
+    # One row per (journal, tag); tagged rows only -> partial index ix_daily_journals_date_tagged
+    columns = [func.btrim(func.jsonb_array_elements_text(J.trigger_tags)).label("tag")]
+    if breakdown == "class":
+        columns += [models.StudentProfile.class_id.label("group_key")]
+    elif breakdown in ("day", "week"):
+        columns += [school_bucket(J.date, breakdown).label("group_key")]
+
+    tagged = select(*columns).where(J.trigger_tags.isnot(None), J.date >= cutoff)
+    if breakdown == "class" or class_id is not None:
+        tagged = tagged.join(models.StudentProfile, models.StudentProfile.id == J.student_id)
+    if class_id is not None:
+        tagged = tagged.where(models.StudentProfile.class_id == class_id)
+    if tag:
+        tagged = tagged.where(J.trigger_tags.contains([tag]))  # @> -> GIN index
+    tagged = tagged.subquery()
+
+    tag_filter = [tagged.c.tag != ""]
+    if tag:
+        tag_filter.append(tagged.c.tag == tag)
+
+    # Overall top tags
+    tag_count = func.count().label("tag_count")
+    result = await db.execute(
+        select(tagged.c.tag, tag_count)
+        .where(*tag_filter)
+        .group_by(tagged.c.tag)
+        .order_by(tag_count.desc(), tagged.c.tag)
+        .limit(limit)
+    )
+    top = [{"tag": t, "count": c} for t, c in result.all()]
+
+    response = {"top_stressors": top}
+    if breakdown == "none":
+        return response
+
+    # Top `limit` tags per group: count per (group, tag), rank inside each group
+    counted = (
+        select(
+            tagged.c.group_key,
+            tagged.c.tag,
+            func.count().label("tag_count"),
+        )
+        .where(*tag_filter)
+        .group_by(tagged.c.group_key, tagged.c.tag)
+        .subquery()
+    )
+    rank = func.row_number().over(
+        partition_by=counted.c.group_key,
+        order_by=(counted.c.tag_count.desc(), counted.c.tag),
+    ).label("rank")
+    ranked = select(counted, rank).subquery()
+
+    stmt = select(ranked.c.group_key, ranked.c.tag, ranked.c.tag_count).where(ranked.c.rank <= limit)
+    if breakdown == "class":
+        stmt = stmt.add_columns(models.Class.name).outerjoin(
+            models.Class, models.Class.id == ranked.c.group_key
+        )
+    result = await db.execute(stmt.order_by(ranked.c.group_key, ranked.c.rank))
 
-    counts = Counter(all_tags)
-    top = [{"tag": tag, "count": count} for tag, count in counts.most_common(5)]
+    groups: dict = {}
+    for row in result.all():
+        key = row.group_key
+        if key not in groups:
+            if breakdown == "class":
+                groups[key] = {"class_id": key, "class_name": row.name, "top_stressors": []}
+            else:
+                groups[key] = {"bucket": key.date() if key else None, "top_stressors": []}
+        groups[key]["top_stressors"].append({"tag": row.tag, "count": row.tag_count})
 
-    return {"top_stressors": top}
+    response["breakdown"] = list(groups.values())
+    return response
 
 @router.post("/broadcast", response_model=BroadcastOut)
-def principal_broadcast(
+async def principal_broadcast(
     payload: BroadcastCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _role = Depends(require_demo(ROLES["PRINCIPAL"])),
     _ep   = Depends(require_entrypoint(ENTRYPOINTS["PRINCIPAL"])),
 ):
@@ -136,11 +217,12 @@ def principal_broadcast(
     Principal sends a message to the whole school (all students of their school).
     For demo: we just pick the first principal user to get school_id.
     """
-    principal_user = (
-        db.query(models.User)
-        .filter(models.User.role == models.UserRole.PRINCIPAL)
-        .first()
+    result = await db.execute(
+        select(models.User)
+        .where(models.User.role == models.UserRole.PRINCIPAL)
+        .limit(1)
     )
+    principal_user = result.scalars().first()
     if not principal_user or not principal_user.school_id:
         raise HTTPException(status_code=404, detail="No principal with school found")
 
@@ -152,8 +234,8 @@ def principal_broadcast(
         content=payload.content,
     )
     db.add(msg)
-    db.commit()
-    db.refresh(msg)
+    await db.commit()
+    await db.refresh(msg)
 
     return BroadcastOut(
         id=msg.id,
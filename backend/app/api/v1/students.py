@@ -1,105 +1,159 @@
 # app/api/v1/students.py
 
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from sqlalchemy.orm import Session
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.base import get_db
+from app.db.base import AsyncSessionLocal, get_async_db
 from app import models, schemas
 from app.core.scoring import (
-    calculate_phq9,
-    calculate_gad7,
-    update_student_risk_profile,
     analyze_journal_text,
     create_safety_event,
-    calculate_cssrs,
 )
 
+from app.core.conditional import conditional_response, make_etag
+from app.core.dashboard_cache import dashboard_cache
+from app.core.instruments import INSTRUMENTS, escalate
+from app.core.mood_rollup import record_mood
+from app.core.responses import json_response, stream_json_array
+from app.core.risk_queue import risk_queue
+from app.core.risk_window import record_checkin
+from app.core.student_identity import StudentIdentity, invalidate_profile, resolve_student
 from app.core.deps.auth import require_student  # ✅ Supabase-based student auth
 from app.core.security.encryption import encrypt_text, decrypt_text
 from datetime import datetime, timedelta
 from typing import List
 from app.core.constants import CHECKIN_TRIGGER_TAGS
+from app.core.pagination import PageParams, keyset_paginate, split_page
 
 router = APIRouter(prefix="/students", tags=["students"])
 
-@router.get("/inbox", response_model=List[schemas.BroadcastOut])
-def student_inbox(
-    db: Session = Depends(get_db),
+logger = logging.getLogger(__name__)
+
+JOURNAL_CHUNK_ROWS = 200
+
+@router.get("/inbox", response_model=schemas.Page[schemas.BroadcastOut])
+async def student_inbox(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
     payload: dict = Depends(require_student),
 ):
     """
     Student inbox: messages sent to their school, class, or specifically them.
     For demo: we just pick the first StudentProfile as 'current' student.
     """
-    student = db.query(models.StudentProfile).first()
+    result = await db.execute(
+        select(
+            models.StudentProfile.id,
+            models.StudentProfile.class_id,
+            models.User.school_id,
+        )
+        .outerjoin(models.User, models.User.id == models.StudentProfile.user_id)
+        .limit(1)
+    )
+    student = result.first()
     if not student:
         raise HTTPException(status_code=404, detail="No student profile found")
 
-    user = student.user
-    if not user or not user.school_id:
+    if not student.school_id:
         raise HTTPException(status_code=400, detail="Student not linked to a school")
 
-    school_id = user.school_id
-    class_id = student.class_id
-    student_id = student.id
-
-    msgs = (
-        db.query(models.BroadcastMessage)
-        .filter(
-            (
-                (models.BroadcastMessage.school_id == school_id) &
-                (models.BroadcastMessage.class_id.is_(None)) &
-                (models.BroadcastMessage.student_profile_id.is_(None))
-            )
-            |
-            (models.BroadcastMessage.class_id == class_id)
-            |
-            (models.BroadcastMessage.student_profile_id == student_id)
+    student_id, class_id, school_id = student
+
+    visible = (
+        (
+            (models.BroadcastMessage.school_id == school_id) &
+            (models.BroadcastMessage.class_id.is_(None)) &
+            (models.BroadcastMessage.student_profile_id.is_(None))
         )
-        .order_by(models.BroadcastMessage.created_at.desc())
-        .all()
+        |
+        (models.BroadcastMessage.class_id == class_id)
+        |
+        (models.BroadcastMessage.student_profile_id == student_id)
     )
 
-    return [
-        schemas.BroadcastOut(
-            id=m.id,
-            sender_role=m.sender_role.value,
-            content=m.content,
-            created_at=m.created_at,
-        )
-        for m in msgs
-    ]
+    # Version stamp: messages append-only hain, so count + newest identify the inbox
+    result = await db.execute(
+        select(
+            func.count(models.BroadcastMessage.id),
+            func.max(models.BroadcastMessage.id),
+            func.max(models.BroadcastMessage.created_at),
+        ).where(visible)
+    )
+    total, newest_id, newest_at = result.one()
+    etag = make_etag("students.inbox", student_id, page.limit, page.cursor, total, newest_id)
+    not_modified = conditional_response(request, response, etag, newest_at)
+    if not_modified:
+        return not_modified
+
+    stmt = keyset_paginate(
+        select(models.BroadcastMessage).where(visible),
+        [models.BroadcastMessage.created_at, models.BroadcastMessage.id],
+        page,
+    )
+    result = await db.execute(stmt)
+    msgs, next_cursor = split_page(
+        result.scalars().all(), page, key=lambda m: (m.created_at, m.id)
+    )
+
+    # Trusted columns -> plain dicts (no per-row Pydantic model); ETag headers carried over
+    return json_response(
+        {
+            "items": [
+                {
+                    "id": m.id,
+                    "sender_role": m.sender_role.value,
+                    "content": m.content,
+                    "created_at": m.created_at,
+                }
+                for m in msgs
+            ],
+            "next_cursor": next_cursor,
+        },
+        response,
+    )
 
 
-def _get_current_student_profile(db: Session, payload: dict) -> models.StudentProfile:
+async def _get_current_student(db: AsyncSession, payload: dict) -> StudentIdentity:
     """
-    Supabase JWT se payload aata hai; us se DB ka student_profile nikalenge.
+    Supabase JWT se payload aata hai; us se DB ka student_profile id nikalenge.
     Abhi simplest: email se map kar (ensure karo Supabase aur DB mein email same hai).
+    Cached per email (app/core/student_identity.py), so usually no query at all.
     """
     email = payload.get("email")
     if not email:
         raise HTTPException(status_code=401, detail="Invalid token (no email)")
 
-    user = db.query(models.User).filter(
-        models.User.email == email,
-        models.User.role == models.UserRole.STUDENT
-    ).first()
-
-    if not user or not user.student_profile:
+    identity = await resolve_student(db, email)
+    if identity is None:
         raise HTTPException(status_code=404, detail="Student profile not found")
 
-    return user.student_profile
+    return identity
+
+
+async def _get_current_student_profile(db: AsyncSession, payload: dict) -> models.StudentProfile:
+    """Full ORM profile, for endpoints that modify it (PK lookup via the cached id)."""
+    identity = await _get_current_student(db, payload)
+    profile = await db.get(models.StudentProfile, identity.profile_id)
+    if not profile:
+        # Cache ke baad profile delete ho gaya
+        invalidate_profile(identity.profile_id)
+        raise HTTPException(status_code=404, detail="Student profile not found")
+    return profile
 
 
 @router.post("/checkin", response_model=schemas.CheckinResponse)
-def create_daily_checkin(
+async def create_daily_checkin(
     checkin: schemas.CheckinCreate,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     payload: dict = Depends(require_student),   # 🔑 Only valid Supabase student token allowed
 ):
-    # 1. Student profile nikaal
-    profile = _get_current_student_profile(db, payload)
+    # 1. Student nikaal (cached id; profile row sirf CRISIS pe load hota hai)
+    profile = await _get_current_student(db, payload)
 
     raw_triggers = checkin.triggers or []
 
@@ -115,19 +169,29 @@ def create_daily_checkin(
 
     # 2. Journal text analyze + encrypt
 
+    # CPU-bound kaam (matching + encryption) event loop pe nahi, threadpool mein
+
     # 🔍 2a) Keyword-based risk analysis on plaintext
-    analysis = analyze_journal_text(checkin.journal_text)
+    analysis = await run_in_threadpool(analyze_journal_text, checkin.journal_text)
 
     # 🔐 2b) Encrypt journal text before saving to DB
-    encrypted_journal = encrypt_text(checkin.journal_text)
+    encrypted_journal = await run_in_threadpool(encrypt_text, checkin.journal_text)
+
+    # 2c) Rolling risk window update (O(1), entry add hone se pehle)
+    await record_checkin(
+        db,
+        profile.profile_id,
+        checkin.mood,
+        analysis["has_severe_suicidal_terms"],
+    )
 
-    # 2c) Entry save karo with flags
+    # 2d) Entry save karo with flags
     entry = models.DailyJournal(
-        student_id=profile.id,
+        student_id=profile.profile_id,
         mood=checkin.mood,
         sleep_hours=checkin.sleep_hours,
-        checkin_data=checkin.checkin_data,
-        journal_text=encrypted_journal,
+        checkin_data=checkin_data,
+        journal_ciphertext=encrypted_journal,
         has_anxiety_terms=analysis["has_anxiety_terms"],
         has_low_mood_terms=analysis["has_low_mood_terms"],
         has_self_worth_terms=analysis["has_self_worth_terms"],
@@ -135,15 +199,22 @@ def create_daily_checkin(
         trigger_tags=valid_triggers or None,
     )
     db.add(entry)
-    profile.streak_count += 1
-    db.commit()
-    db.refresh(entry)
+    # SELECT + read-modify-write ki jagah seedha increment (parallel check-ins safe)
+    await db.execute(
+        update(models.StudentProfile)
+        .where(models.StudentProfile.id == profile.profile_id)
+        .values(streak_count=func.coalesce(models.StudentProfile.streak_count, 0) + 1)
+        .execution_options(synchronize_session=False)
+    )
+    # Dashboard rollup, same transaction as the entry
+    await record_mood(db, profile.profile_id, profile.class_id, checkin.mood)
 
     # 🔴 3. Agar severe suicidal phrase mila hai, to immediate SafetyEvent + CRISIS
+    # (same transaction: journal kabhi bina safety event ke commit nahi hota)
     if analysis["has_severe_suicidal_terms"]:
         create_safety_event(
             db=db,
-            student_id=profile.id,
+            student_id=profile.profile_id,
             trigger_type="JOURNAL_SEVERE",
             risk_band="CRISIS",
             details={
@@ -152,14 +223,21 @@ def create_daily_checkin(
                 "source": "daily_checkin",
             },
         )
-        # Student ko CRISIS mark karo (update_student_risk_profile ise downgrade nahi karega)
-        profile.risk_status = "CRISIS"
-        db.commit()
+        # Student ko CRISIS mark karo (update_student_risk_profile ise downgrade nahi karega).
+        # ORM update so that the risk counter hooks fire.
+        student = await db.get(models.StudentProfile, profile.profile_id)
+        student.risk_status = "CRISIS"
 
-     # 3. Risk engine background mein
-    background_tasks.add_task(update_student_risk_profile, db, profile.id)
+    # 4. Risk engine: coalescing queue, apne session pe (request wala session tab tak band ho chuka hota tha)
+    await risk_queue.enqueue(db, profile.profile_id)
 
-    # 4. Frontend ko friendly message + tool
+    # Ek hi commit for the whole check-in
+    await db.commit()
+
+    # Mood rollup / risk badla -> class + school dashboards (after commit)
+    await dashboard_cache.invalidate(profile.class_id)
+
+    # 5. Frontend ko friendly message + tool
     message = "Thanks for checking in."
     tool = None
 
@@ -193,23 +271,19 @@ def create_daily_checkin(
 
 
 @router.post("/assessment", response_model=schemas.AssessmentResponse)
-def submit_assessment(
+async def submit_assessment(
     assessment: schemas.AssessmentCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     payload: dict = Depends(require_student),   # 🔑 Again, only that student
 ):
-    profile = _get_current_student_profile(db, payload)
-
-        # 1. Score calculate
-    if assessment.type == "PHQ9":
-        score, risk_level, is_alert = calculate_phq9(assessment.answers)
-    elif assessment.type == "GAD7":
-        score, risk_level, is_alert = calculate_gad7(assessment.answers)
-    elif assessment.type == "CSSRS":
-        score, risk_level, is_alert = calculate_cssrs(assessment.answers)
-    else:
+    profile = await _get_current_student_profile(db, payload)
+
+    # 1. Score calculate (PHQ9/GAD7/CSSRS rules: app/core/instruments.py)
+    instrument = INSTRUMENTS.get(assessment.type)
+    if instrument is None:
         raise HTTPException(status_code=400, detail="Invalid assessment type")
-    
+    score, risk_level, is_alert = instrument.score(assessment.answers)
+
     # 2. Save DB
     record = models.Assessment(
         student_id=profile.id,
@@ -220,69 +294,25 @@ def submit_assessment(
     )
     db.add(record)
 
-      # 3. Safety events + risk escalation
-
-    # 🔴 PHQ-9 Question 9 positive -> safety event
-    if assessment.type == "PHQ9" and is_alert:
-        q9_score = None
-        if len(assessment.answers) >= 9:
-            q9_score = assessment.answers[8]
-
-        create_safety_event(
-            db=db,
-            student_id=profile.id,
-            trigger_type="PHQ9_Q9",
-            risk_band="CRISIS",   # suicidality side pe crisis
-            details={
-                "q9_score": q9_score,
-                "total_score": score,
-                "depression_severity": risk_level,  # e.g. YELLOW
-                "type": "PHQ9",
-            },
-        )
+    # 3. Safety event + risk escalation (sab ek transaction mein, neeche ek commit)
+    if instrument.safety_event is not None:
+        spec = instrument.safety_event(assessment.answers, score, risk_level, is_alert)
+        if spec is not None:
+            create_safety_event(
+                db=db,
+                student_id=profile.id,
+                trigger_type=spec.trigger_type,
+                risk_band=spec.risk_band,
+                details=spec.details,
+            )
 
-    # 🔴 CSSRS -> safety event for any non-GREEN risk
-    if assessment.type == "CSSRS" and risk_level != "GREEN":
-        create_safety_event(
-            db=db,
-            student_id=profile.id,
-            trigger_type="CSSRS",
-            risk_band=risk_level,
-            details={
-                "answers": assessment.answers,
-                "type": "CSSRS",
-            },
-        )
+    # Escalation sirf upar jaati hai; CRISIS ko assessment neeche nahi laata
+    new_status = escalate(profile.risk_status, instrument.target_status(risk_level, is_alert))
+    if new_status != profile.risk_status:
+        profile.risk_status = new_status
 
-    # Risk escalation:
-    #  - PHQ9:
-    #       * is_alert (Q9 > 0)  -> CRISIS
-    #       * risk_level RED     -> RED (if not already CRISIS)
-    #  - CSSRS:
-    #       * HIGH/CRISIS        -> CRISIS
-    #       * MODERATE           -> at least RED
-    #       * LOW                -> optionally ORANGE
-
-        if assessment.type == "PHQ9":
-            if is_alert:
-                profile.risk_status = "CRISIS"   # suicidal flag -> CRISIS in student profile
-            elif risk_level in ["RED"]:
-                if profile.risk_status != "CRISIS":
-                    profile.risk_status = "RED"
-
-    elif assessment.type == "CSSRS":
-        if risk_level in ["HIGH", "CRISIS"]:
-            profile.risk_status = "CRISIS"
-        elif risk_level == "MODERATE":
-            if profile.risk_status != "CRISIS":
-                profile.risk_status = "RED"
-        elif risk_level == "LOW":
-            # Optional: LOW ko ORANGE treat kar sakte ho
-            if profile.risk_status not in ["RED", "CRISIS"]:
-                profile.risk_status = "ORANGE"
-
-    # GAD7 abhi sirf informative hai, direct risk_status change nahi kar rahe
-    db.commit()
+    await db.commit()
+    await dashboard_cache.invalidate(profile.class_id)
 
     return schemas.AssessmentResponse(
         score=score,
@@ -291,108 +321,190 @@ def submit_assessment(
     )
 
 @router.get("/journals", response_model=List[schemas.JournalEntryOut])
-def get_my_journals(
+async def get_my_journals(
+    request: Request,
+    response: Response,
     days: int = 14,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     payload: dict = Depends(require_student),
 ):
     """
     Current student ke last `days` journals.
     Default: 14 din.
     """
-    profile = _get_current_student_profile(db, payload)
+    profile = await _get_current_student(db, payload)
 
     cutoff = datetime.utcnow() - timedelta(days=days)
-
-    entries = (
-        db.query(models.DailyJournal)
-        .filter(
-            models.DailyJournal.student_id == profile.id,
-            models.DailyJournal.date >= cutoff,
-        )
-        .order_by(models.DailyJournal.date.desc())
-        .all()
+    in_window = (
+        models.DailyJournal.student_id == profile.profile_id,
+        models.DailyJournal.date >= cutoff,
     )
 
-    # Manual mapping (orm_mode ke bina)
-    result = []
-    for e in entries:
-        raw = e.checkin_data or {}
-        if not isinstance(raw, dict):
-            raw = {}
-
-        triggers = raw.get("triggers")
-        # ensure triggers is a list or None
-        if isinstance(triggers, str):
-            triggers = [triggers]
-        elif triggers is None:
-            triggers = None
-
-        notes = raw.get("notes")
-
-        result.append(
-            schemas.JournalEntryOut(
-                id=e.id,
-                date=e.date,
-                mood=e.mood,
-                sleep_hours=e.sleep_hours,
-                journal_text=decrypt_text(e.journal_text),
-                triggers=triggers,
-                notes=notes,
-            )
-        )
+    # Stamp from the (student_id, date) index; count badalta hai jab entry window se bahar jaaye.
+    # No Last-Modified here: aging out changes the list without anything newer.
+    result = await db.execute(
+        select(func.count(models.DailyJournal.id), func.max(models.DailyJournal.id))
+        .where(*in_window)
+    )
+    total, newest_id = result.one()
+    etag = make_etag("students.journals", profile.profile_id, days, total, newest_id)
+    not_modified = conditional_response(request, response, etag)
+    if not_modified:
+        return not_modified  # no rows loaded, nothing decrypted
+
+    # Window unbounded hai (?days=), so rows go out in chunks instead of one big list.
+    # Chunks use their own sessions; request wala session stream ke dauraan connection na pakde
+    await db.close()
+    return stream_json_array(_journal_chunks(in_window), response)
+
+
+def _journal_out(e, text: str | None) -> dict:
+    # Manual mapping (orm_mode ke bina); shape = schemas.JournalEntryOut
+    raw = e.checkin_data or {}
+    if not isinstance(raw, dict):
+        raw = {}
+
+    triggers = raw.get("triggers")
+    # ensure triggers is a list or None
+    if isinstance(triggers, str):
+        triggers = [triggers]
+
+    return {
+        "id": e.id,
+        "date": e.date,
+        "mood": e.mood,
+        "sleep_hours": e.sleep_hours,
+        "journal_text": text,
+        "triggers": triggers,
+        "notes": raw.get("notes"),
+    }
+
+
+def _decrypt_journal(e) -> str | None:
+    """
+    One unreadable row (failed auth / retired key) must not break the response -
+    stream already started, so an exception here = truncated JSON with a 200.
+    """
+    try:
+        return decrypt_text(e.journal_ciphertext or e.journal_text)
+    except ValueError:
+        logger.warning("journal %s could not be decrypted; sent without text", e.id)
+        return None
 
-    return result
 
-@router.get("/assessments/history", response_model=List[schemas.AssessmentHistoryOut])
-def get_my_assessment_history(
-    db: Session = Depends(get_db),
+async def _journal_chunks(in_window):
+    """
+    Keyset batches of JOURNAL_CHUNK_ROWS on (date, id), newest first; each batch
+    decrypted in one threadpool call. Runs while the response streams, so every
+    batch opens and closes its own short session - a slow client holds no
+    connection between chunks, and the next batch resumes from `last`.
+    """
+    J = models.DailyJournal
+    last = None
+    while True:
+        stmt = select(
+            J.id, J.date, J.mood, J.sleep_hours, J.checkin_data, J.journal_ciphertext, J.journal_text,
+        ).where(*in_window)
+        if last is not None:
+            stmt = stmt.where(tuple_(J.date, J.id) < tuple_(*last))
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(stmt.order_by(J.date.desc(), J.id.desc()).limit(JOURNAL_CHUNK_ROWS))
+            rows = result.all()
+        if not rows:
+            return
+
+        texts = await run_in_threadpool(lambda: [_decrypt_journal(e) for e in rows])
+        yield [_journal_out(e, text) for e, text in zip(rows, texts)]
+
+        if len(rows) < JOURNAL_CHUNK_ROWS:
+            return
+        last = (rows[-1].date, rows[-1].id)
+
+@router.get("/assessments/history", response_model=schemas.Page[schemas.AssessmentHistoryOut])
+async def get_my_assessment_history(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
     payload: dict = Depends(require_student),
 ):
     """
     Current student ke saare assessments (PHQ9, GAD7),
-    latest first.
+    latest first, keyset-paginated (?limit=&cursor=).
     """
-    profile = _get_current_student_profile(db, payload)
-
-    assessments = (
-        db.query(models.Assessment)
-        .filter(models.Assessment.student_id == profile.id)
-        .order_by(models.Assessment.created_at.desc())
-        .all()
+    profile = await _get_current_student(db, payload)
+
+    # Assessments append-only hain -> count + newest is the version
+    result = await db.execute(
+        select(
+            func.count(models.Assessment.id),
+            func.max(models.Assessment.id),
+            func.max(models.Assessment.created_at),
+        ).where(models.Assessment.student_id == profile.profile_id)
     )
-
-    return [
-        schemas.AssessmentHistoryOut(
-            id=a.id,
-            type=a.type,
-            total_score=a.total_score,
-            created_at=a.created_at,
+    total, newest_id, newest_at = result.one()
+    etag = make_etag(
+        "students.assessment_history", profile.profile_id, page.limit, page.cursor, total, newest_id
+    )
+    not_modified = conditional_response(request, response, etag, newest_at)
+    if not_modified:
+        return not_modified
+
+    stmt = keyset_paginate(
+        # answers JSON list page pe chahiye nahi, so skip it
+        select(
+            models.Assessment.id,
+            models.Assessment.type,
+            models.Assessment.total_score,
+            models.Assessment.created_at,
         )
-        for a in assessments
-    ]
+        .where(models.Assessment.student_id == profile.profile_id),
+        [models.Assessment.created_at, models.Assessment.id],
+        page,
+    )
+    result = await db.execute(stmt)
+    assessments, next_cursor = split_page(
+        result.all(), page, key=lambda a: (a.created_at, a.id)
+    )
+
+    return json_response(
+        {
+            "items": [
+                {
+                    "id": a.id,
+                    "type": a.type,
+                    "total_score": a.total_score,
+                    "created_at": a.created_at,
+                }
+                for a in assessments
+            ],
+            "next_cursor": next_cursor,
+        },
+        response,
+    )
 
 @router.post("/reports", response_model=schemas.IncidentReportOut)
-def report_incident(
+async def report_incident(
     report: schemas.IncidentReportCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     payload: dict = Depends(require_student),
 ):
     """
     Student incident report (bullying, harassment, ragging, etc.)
     Can be anonymous (no student_id stored).
     """
-    profile = _get_current_student_profile(db, payload)
+    profile = await _get_current_student(db, payload)
 
     # Determine if anonymous
     if report.anonymous:
         student_id = None
     else:
-        student_id = profile.id
+        student_id = profile.profile_id
 
     # We always know class and school from the student profile
+    classroom = await db.get(models.Class, profile.class_id)
     class_id = profile.class_id
-    school_id = profile.classroom.school_id
+    school_id = classroom.school_id
 
     incident = models.IncidentReport(
         student_id=student_id,
@@ -403,15 +515,15 @@ def report_incident(
         status=models.IncidentStatus.PENDING,
     )
     db.add(incident)
-    db.commit()
-    db.refresh(incident)
+    await db.commit()
+    await db.refresh(incident)
 
     return schemas.IncidentReportOut(
         id=incident.id,
         incident_type=incident.type.value,
         description=incident.description,
         status=incident.status.value,
-        class_name=incident.classroom.name if incident.classroom else None,
+        class_name=classroom.name if classroom else None,
         created_at=incident.created_at,
         is_anonymous=(incident.student_id is None),
     )
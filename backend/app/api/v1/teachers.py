@@ -1,21 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import datetime, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.base import get_db
+from app.db.base import get_read_db
 from app import models
 from app.core.deps.auth import require_demo
 from app.core.deps.entrypoint import require_entrypoint
 from app.core.constants import ROLES, ENTRYPOINTS
+from app.core.dashboard_cache import class_scope, dashboard_cache
+from app.core.mood_rollup import mood_distribution
+from app.core.risk_counters import risk_zone_summary
 
 router = APIRouter(prefix="/teachers", tags=["teachers"])
 
 @router.get("/dashboard")
-def teacher_class_mood(
+async def teacher_class_mood(
     class_id: int,
     days: int = 7,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     _role = Depends(require_demo(ROLES["TEACHER"])),
     _ep   = Depends(require_entrypoint(ENTRYPOINTS["TEACHER"])),
 ):
@@ -24,50 +25,28 @@ def teacher_class_mood(
     NOTE: Abhi class_id query param se aa raha hai
     (later teacher-class mapping se aayega).
     """
-    classroom = (
-        db.query(models.Class)
-        .filter(models.Class.id == class_id)
-        .first()
-    )
-    if not classroom:
-        raise HTTPException(status_code=404, detail="Class not found")
-
-    cutoff = datetime.utcnow() - timedelta(days=days)
-
-    # Mood distribution
-    mood_counts = (
-        db.query(models.DailyJournal.mood, func.count(models.DailyJournal.id))
-        .join(models.StudentProfile, models.StudentProfile.id == models.DailyJournal.student_id)
-        .filter(
-            models.StudentProfile.class_id == class_id,
-            models.DailyJournal.date >= cutoff,
-        )
-        .group_by(models.DailyJournal.mood)
-        .all()
-    )
-
-    total = sum(c for _, c in mood_counts) or 1
-    mood_distribution = {
-        mood: round(count / total * 100, 1) for mood, count in mood_counts
-    }
-
-    # Risk zones counts within class
-    risk_stats = (
-        db.query(models.StudentProfile.risk_status, func.count(models.StudentProfile.id))
-        .filter(models.StudentProfile.class_id == class_id)
-        .group_by(models.StudentProfile.risk_status)
-        .all()
-    )
-    risk_data = {status: count for status, count in risk_stats}
-
-    return {
-        "class_id": class_id,
-        "class_name": classroom.name,
-        "mood_distribution": mood_distribution,
-        "risk_zones": {
-            "green": risk_data.get("GREEN", 0),
-            "orange": risk_data.get("ORANGE", 0),
-            "red": risk_data.get("RED", 0),
-            "crisis": risk_data.get("CRISIS", 0),
-        },
-    }
\ No newline at end of file
+    async def build():
+        classroom = await db.get(models.Class, class_id)
+        if not classroom:
+            raise HTTPException(status_code=404, detail="Class not found")
+
+        # Mood distribution (daily rollups, last `days` school days)
+        class_moods = await mood_distribution(db, days, class_id=class_id)
+
+        # Risk zones counts within class (materialized counters)
+        risk_zones = await risk_zone_summary(db, class_id=class_id)
+
+        return {
+            "class_id": class_id,
+            "class_name": classroom.name,
+            "mood_distribution": class_moods,
+            "risk_zones": risk_zones,
+        }
+
+    # Check-in / assessment / risk update in this class invalidate it
+    return await dashboard_cache.cached(
+        "teachers.dashboard",
+        {"class_id": class_id, "days": days, "role": _role.get("role")},
+        scopes=[class_scope(class_id)],
+        compute=build,
+    )
\ No newline at end of file
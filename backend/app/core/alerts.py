@@ -0,0 +1,210 @@
+# app/core/alerts.py
+"""
+Realtime counselor alerts: new SafetyEvent rows and risk_status escalations,
+pushed over GET /counselors/alerts/stream (Server-Sent Events).
+
+Writers ko kuch call nahi karna: the mapper hooks below (registered from
+app/models.py) pick up every ORM insert of a SafetyEvent and every
+StudentProfile.risk_status that moves up (GREEN < ORANGE < RED < CRISIS).
+Alerts leave the process only when the transaction commits; rollback = nothing sent.
+
+ALERTS_BACKEND:
+- "memory": queued on the session, published to this worker's AlertBroker
+  after COMMIT. Only clients connected to the same worker see them.
+- "postgres": the hook runs pg_notify() inside the writing transaction, Postgres
+  delivers it on commit to every worker's LISTEN connection (start_listener,
+  app startup), and each worker fans it out to its own clients.
+
+Core/bulk UPDATEs skip mapper hooks (same caveat as risk_counters), so jobs
+that change risk_status in bulk do not alert.
+"""
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional, Set
+
+from fastapi import Request
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.orm import Session, object_session
+
+from app import models
+from app.core.config import settings
+from app.db.base import SQLALCHEMY_DATABASE_URL, plain_dsn
+
+ALERT_CHANNEL = "nefera_alerts"
+
+RISK_ORDER = {"GREEN": 0, "ORANGE": 1, "RED": 2, "CRISIS": 3}
+
+HEARTBEAT_SECONDS = 15.0
+
+_PENDING = "pending_alerts"  # session.info key
+
+
+class AlertBroker:
+    """In-process fan-out: one bounded asyncio.Queue per connected client."""
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def publish(self, alert: dict) -> None:
+        """Safe to call from the event loop or from a worker thread."""
+        loop = self._loop
+        if loop is None or not self._subscribers:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._deliver(alert)
+        else:
+            try:
+                loop.call_soon_threadsafe(self._deliver, alert)
+            except RuntimeError:
+                pass  # loop band ho chuka (shutdown)
+
+    def _deliver(self, alert: dict) -> None:
+        for queue in list(self._subscribers):
+            if queue.full():
+                queue.get_nowait()  # slow client: oldest alert drop, naya wala zaroori hai
+            queue.put_nowait(alert)
+
+    @asynccontextmanager
+    async def subscribe(self) -> AsyncIterator[asyncio.Queue]:
+        self._loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers.discard(queue)
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+
+broker = AlertBroker(queue_size=settings.ALERTS_QUEUE_SIZE)
+
+
+# ---------- capture (mapper hooks) ----------
+
+def _queue_alert(connection, target, alert: dict) -> None:
+    alert["at"] = datetime.now(timezone.utc).isoformat()
+    if settings.ALERTS_BACKEND == "postgres":
+        # Transactional: Postgres sends it on COMMIT only (payload limit 8000 bytes, ours ~200)
+        connection.execute(select(func.pg_notify(ALERT_CHANNEL, json.dumps(alert))))
+        return
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING, []).append(alert)
+
+
+@event.listens_for(models.SafetyEvent, "after_insert")
+def _safety_event_created(mapper, connection, target):
+    # details (matched phrases etc.) stream pe nahi bhejte; counselor detail page se dekhe
+    _queue_alert(connection, target, {
+        "type": "safety_event",
+        "id": target.id,
+        "student_id": target.student_id,
+        "trigger_type": target.trigger_type,
+        "risk_band": target.risk_band,
+    })
+
+
+@event.listens_for(models.StudentProfile, "after_update")
+def _risk_status_changed(mapper, connection, target):
+    history = inspect(target).attrs.risk_status.history
+    if not history.has_changes():
+        return
+    old = history.deleted[0] if history.deleted else None
+    new = target.risk_status
+    if RISK_ORDER.get(new, 0) <= RISK_ORDER.get(old, 0):
+        return  # downgrade / same level: no alert
+    _queue_alert(connection, target, {
+        "type": "risk_escalation",
+        "student_id": target.id,
+        "class_id": target.class_id,
+        "from": old,
+        "to": new,
+    })
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending(session):
+    for alert in session.info.pop(_PENDING, ()):
+        broker.publish(alert)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending(session):
+    session.info.pop(_PENDING, None)
+
+
+# ---------- postgres LISTEN ----------
+
+def _on_notify(connection, pid, channel, payload) -> None:
+    try:
+        broker.publish(json.loads(payload))
+    except ValueError:
+        pass
+
+
+async def _listen_forever() -> None:
+    """One dedicated asyncpg connection per worker; reconnects with backoff."""
+    import asyncpg
+
+    dsn = plain_dsn(settings.ALERTS_LISTEN_URL or SQLALCHEMY_DATABASE_URL)
+    delay = 1.0
+    while True:
+        conn = None
+        try:
+            conn = await asyncpg.connect(dsn)
+            lost = asyncio.Event()
+            conn.add_termination_listener(lambda _conn: lost.set())
+            await conn.add_listener(ALERT_CHANNEL, _on_notify)
+            delay = 1.0
+            await lost.wait()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            pass
+        finally:
+            if conn is not None and not conn.is_closed():
+                await conn.close()
+        # Disconnected: alerts in this gap are lost; clients refetch on reconnect
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 30.0)
+
+
+def start_listener() -> Optional[asyncio.Task]:
+    """Call from app startup. No-op for the memory backend."""
+    if settings.ALERTS_BACKEND != "postgres":
+        return None
+    return asyncio.get_running_loop().create_task(_listen_forever())
+
+
+# ---------- SSE ----------
+
+def _sse(event_name: str, data: dict) -> str:
+    return f"event: {event_name}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+async def sse_events(request: Request) -> AsyncIterator[str]:
+    """
+    Alert stream for one client. Starts with `ready`; client should (re)load
+    /counselors/students/risky on every ready, stream sirf uske baad ka batata hai.
+    """
+    async with broker.subscribe() as queue:
+        yield _sse("ready", {"backend": settings.ALERTS_BACKEND})
+        while True:
+            try:
+                alert = await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                yield ": ping\n\n"  # proxies idle connection band na karein
+                continue
+            yield _sse(alert.get("type", "alert"), alert)
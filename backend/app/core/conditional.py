@@ -0,0 +1,88 @@
+# app/core/conditional.py
+"""
+Conditional GET for endpoints that mobile clients poll.
+
+Endpoint pehle ek sasta "version stamp" query karta hai (count / max id /
+max created_at for its scope), uska ETag banata hai, and only loads (and
+decrypts) rows when the client's copy is stale:
+
+    etag = make_etag("students.inbox", student_id, page.limit, page.cursor, *stamp)
+    not_modified = conditional_response(request, response, etag, last_modified)
+    if not_modified:
+        return not_modified
+
+ETags are weak (W/"..."): same data, same JSON, byte-exact nahi guarantee.
+If-Modified-Since is only looked at without If-None-Match and only when the
+endpoint passes `last_modified` - do that just for append-only scopes, where
+"nothing newer" really means "nothing changed".
+"""
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+_CACHE_CONTROL = "private, no-cache"  # client may store it but must revalidate
+
+
+def make_etag(*parts: Any) -> str:
+    raw = json.dumps(parts, default=str, separators=(",", ":"))
+    return 'W/"' + hashlib.blake2b(raw.encode("utf-8"), digest_size=12).hexdigest() + '"'
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison (RFC 9110 13.1.2)
+    return any(_opaque(t) == _opaque(etag) for t in if_none_match.split(","))
+
+
+def _not_modified_since(if_modified_since: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP dates have 1s resolution
+    return last_modified.replace(microsecond=0) <= since
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def conditional_response(
+    request: Request,
+    response: Response,
+    etag: str,
+    last_modified: Optional[datetime] = None,
+) -> Optional[Response]:
+    """
+    Puts ETag / Last-Modified / Cache-Control on `response`. Returns a bare 304
+    to send instead when the request's validators still match, else None.
+    """
+    headers = {"ETag": etag, "Cache-Control": _CACHE_CONTROL}
+    if last_modified is not None:
+        last_modified = _as_utc(last_modified)
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    response.headers.update(headers)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        fresh = _etag_matches(if_none_match, etag)
+    elif last_modified is not None and request.headers.get("if-modified-since"):
+        fresh = _not_modified_since(request.headers["if-modified-since"], last_modified)
+    else:
+        fresh = False
+
+    return Response(status_code=304, headers=headers) if fresh else None
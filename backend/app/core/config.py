@@ -19,6 +19,44 @@ class Settings(BaseSettings):
     DATABASE_URL: str | None = None
     SECRET_KEY: str | None = None
 
+    # DB pooling (app/db/base.py). Read replica optional; unset -> primary
+    DATABASE_READ_URL: str | None = None
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30              # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800            # seconds; -1 = never
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 0       # 0 = no per-statement timeout
+    # PgBouncer transaction pooling: no app-side pool, no prepared statements,
+    # timeouts via SET LOCAL (startup params PgBouncer pe nahi chalte)
+    DB_PGBOUNCER_TRANSACTION_MODE: bool = False
+
+    # Student request caches (per process). 0 size = disabled
+    AUTH_TOKEN_CACHE_SIZE: int = 10000          # verified JWTs, kept until their exp
+    STUDENT_IDENTITY_CACHE_SIZE: int = 50000    # email -> student_profile id
+    STUDENT_IDENTITY_CACHE_TTL: int = 300       # seconds
+
+    # Dashboard result cache (app/core/dashboard_cache.py). TTL 0 = disabled
+    DASHBOARD_CACHE_BACKEND: str = "memory"    # memory | shared
+    DASHBOARD_CACHE_URL: str | None = None     # redis://... for "shared"; unset -> in-process stand-in
+    DASHBOARD_CACHE_TTL: int = 30              # seconds; upper bound on staleness
+    DASHBOARD_CACHE_SIZE: int = 2000           # entries, memory backend
+
+    # Counselor alert stream (app/core/alerts.py)
+    ALERTS_BACKEND: str = "memory"             # memory (single worker) | postgres (LISTEN/NOTIFY)
+    ALERTS_LISTEN_URL: str | None = None       # direct Postgres for LISTEN (not via PgBouncer); unset -> DATABASE_URL
+    ALERTS_QUEUE_SIZE: int = 100               # per connected client; slow client pe oldest drop
+
+    # Risk recompute queue (app/core/risk_queue.py), worker runs inside the app
+    RISK_QUEUE_BACKEND: str = "local"          # local (in-process) | db (risk_recompute_queue table)
+    RISK_RECOMPUTE_BATCH_SIZE: int = 200       # students per worker transaction
+    RISK_RECOMPUTE_DELAY: float = 0.5          # seconds to let a burst coalesce (local)
+    RISK_QUEUE_POLL_SECONDS: float = 1.0       # idle poll interval (db)
+    RISK_RECOMPUTE_MAX_ATTEMPTS: int = 5       # failed recomputes before a student is dropped
+
+    # "Day" for mood rollups / dashboards = school ka local calendar day
+    SCHOOL_TIMEZONE: str = "Asia/Kolkata"
+
     # .env file location aur extra behavior
     model_config = SettingsConfigDict(
         env_file=".env",
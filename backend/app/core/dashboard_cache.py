@@ -0,0 +1,255 @@
+# app/core/dashboard_cache.py
+"""
+Result cache for the read-heavy dashboards (counselor / principal / teacher).
+
+    return await dashboard_cache.cached(
+        "teachers.dashboard",
+        {"class_id": class_id, "days": days, "role": role},
+        scopes=[class_scope(class_id)],
+        compute=lambda: _build(...),
+    )
+
+Invalidation is generation based: every scope ("school", "class:<id>") has a
+counter that goes into the cache key. Writers call `invalidate(class_id)` after
+their commit; the counters move, old entries become unreachable and age out
+(LRU / TTL). Koi key scanning nahi.
+
+"school" = everything the school-wide dashboards aggregate. Those endpoints
+abhi school_id se filter nahi karte (single-school pilot), so every write bumps it.
+
+Backends (DASHBOARD_CACHE_BACKEND):
+- "memory": per-process LRUCache. Invalidation sirf usi worker mein dikhta hai;
+  DASHBOARD_CACHE_TTL bounds staleness in the others.
+- "shared": get / set(ex=) / mget / incr client - redis.asyncio when
+  DASHBOARD_CACHE_URL is set, else LocalSharedClient (in-process stand-in with
+  the same API, for dev and benchmarks). Values go through JSON.
+
+Identical concurrent misses in one process run `compute` once (single flight);
+the others await its result.
+"""
+import asyncio
+import json
+from abc import ABC, abstractmethod
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.metrics import DASHBOARD_CACHE_LOOKUPS
+
+SCHOOL = "school"
+
+
+def class_scope(class_id: int) -> str:
+    return f"class:{class_id}"
+
+
+# ---------- backends ----------
+
+class CacheBackend(ABC):
+    """What DashboardCache needs from a store. `get` returns None on a miss."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Any:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: int) -> None:
+        ...
+
+    @abstractmethod
+    async def generations(self, scopes: Sequence[str]) -> List[int]:
+        ...
+
+    @abstractmethod
+    async def bump(self, scopes: Iterable[str]) -> None:
+        ...
+
+
+class MemoryBackend(CacheBackend):
+    def __init__(self, maxsize: int):
+        self._values = LRUCache(maxsize=maxsize)
+        self._generations: Dict[str, int] = {}  # one per class + "school", chhota rahega
+
+    async def get(self, key: str) -> Any:
+        return self._values.get(key)
+
+    async def set(self, key: str, value: Any, ttl: int) -> None:
+        self._values.set(key, value, expires_at=time.time() + ttl)
+
+    async def generations(self, scopes: Sequence[str]) -> List[int]:
+        return [self._generations.get(s, 0) for s in scopes]
+
+    async def bump(self, scopes: Iterable[str]) -> None:
+        for s in scopes:
+            self._generations[s] = self._generations.get(s, 0) + 1
+
+
+class SharedBackend(CacheBackend):
+    """Over a redis.asyncio-style client; shared by every worker using the same store."""
+
+    def __init__(self, client, prefix: str = "nefera:dash:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Any:
+        raw = await self.client.get(self.prefix + "v:" + key)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any, ttl: int) -> None:
+        await self.client.set(
+            self.prefix + "v:" + key, json.dumps(jsonable_encoder(value)), ex=ttl
+        )
+
+    async def generations(self, scopes: Sequence[str]) -> List[int]:
+        raw = await self.client.mget([self.prefix + "g:" + s for s in scopes])
+        return [int(v or 0) for v in raw]
+
+    async def bump(self, scopes: Iterable[str]) -> None:
+        for s in scopes:
+            await self.client.incr(self.prefix + "g:" + s)
+
+
+class LocalSharedClient:
+    """
+    In-process stand-in for the slice of redis.asyncio that SharedBackend uses,
+    so the shared code path (JSON, generation keys) runs without a Redis server.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[Any, Optional[float]]] = {}
+
+    def _live(self, key: str) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.time():
+            del self._data[key]
+            return None
+        return value
+
+    async def get(self, key: str) -> Any:
+        return self._live(key)
+
+    async def set(self, key: str, value: Any, ex: Optional[int] = None) -> None:
+        self._data[key] = (value, time.time() + ex if ex else None)
+
+    async def mget(self, keys: Sequence[str]) -> List[Any]:
+        return [self._live(k) for k in keys]
+
+    async def incr(self, key: str) -> int:
+        value = int(self._live(key) or 0) + 1
+        self._data[key] = (value, None)
+        return value
+
+
+# ---------- cache ----------
+
+class _LeaderCancelled(Exception):
+    """Computing request cancel ho gaya (client disconnect); waiters compute themselves."""
+
+
+class DashboardCache:
+    def __init__(self, backend: CacheBackend, ttl: int):
+        self.backend = backend
+        self.ttl = ttl
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def _key(endpoint: str, params: Dict[str, Any], scopes: Sequence[str], gens: List[int]) -> str:
+        generation = ",".join(f"{s}={g}" for s, g in zip(scopes, gens))
+        return f"{endpoint}|{json.dumps(params, sort_keys=True, default=str)}|{generation}"
+
+    async def cached(
+        self,
+        endpoint: str,
+        params: Dict[str, Any],
+        scopes: Sequence[str],
+        compute: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """
+        Cached result of `compute()` for (endpoint, params) at the scopes' current
+        generations. Exceptions (e.g. 404) are not cached, but concurrent waiters get them too.
+        """
+        if self.ttl <= 0:
+            return await compute()
+
+        try:
+            gens = await self.backend.generations(scopes)
+            key = self._key(endpoint, params, scopes, gens)
+            value = await self.backend.get(key)
+        except Exception:
+            # Cache store down -> seedha DB, dashboard band nahi hona chahiye
+            DASHBOARD_CACHE_LOOKUPS.labels(endpoint, "error").inc()
+            return await compute()
+
+        if value is not None:
+            DASHBOARD_CACHE_LOOKUPS.labels(endpoint, "hit").inc()
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            DASHBOARD_CACHE_LOOKUPS.labels(endpoint, "coalesced").inc()
+            try:
+                # shield: ek waiter cancel ho to leader ka future cancel na ho
+                return await asyncio.shield(inflight)
+            except _LeaderCancelled:
+                return await compute()
+
+        DASHBOARD_CACHE_LOOKUPS.labels(endpoint, "miss").inc()
+        future = asyncio.get_running_loop().create_future()
+        # Koi waiter na ho to bhi "exception never retrieved" warning na aaye
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = future
+        try:
+            value = await compute()
+            future.set_result(value)
+            try:
+                await self.backend.set(key, value, self.ttl)
+            except Exception:
+                DASHBOARD_CACHE_LOOKUPS.labels(endpoint, "error").inc()
+            return value
+        except asyncio.CancelledError:
+            if not future.done():
+                future.set_exception(_LeaderCancelled())
+            raise
+        except Exception as exc:
+            if not future.done():
+                future.set_exception(exc)
+            raise
+        finally:
+            # Store ke baad hi hatao, warna beech mein aaya request dobara compute karega
+            self._inflight.pop(key, None)
+
+    async def invalidate(self, class_id: Optional[int] = None) -> None:
+        """Call after committing a write that changes dashboard numbers for this class / school."""
+        scopes = [SCHOOL]
+        if class_id is not None:
+            scopes.append(class_scope(class_id))
+        try:
+            await self.backend.bump(scopes)
+        except Exception:
+            # Write already committed; TTL will expire the stale entry
+            pass
+
+
+def _make_backend() -> CacheBackend:
+    if settings.DASHBOARD_CACHE_BACKEND == "memory":
+        return MemoryBackend(maxsize=settings.DASHBOARD_CACHE_SIZE)
+    if settings.DASHBOARD_CACHE_BACKEND != "shared":
+        raise RuntimeError(
+            f"DASHBOARD_CACHE_BACKEND must be 'memory' or 'shared', got {settings.DASHBOARD_CACHE_BACKEND!r}"
+        )
+    if not settings.DASHBOARD_CACHE_URL:
+        return SharedBackend(LocalSharedClient())
+    try:
+        import redis.asyncio as redis_asyncio
+    except ImportError:
+        raise RuntimeError("DASHBOARD_CACHE_URL is set but the `redis` package is not installed")
+    return SharedBackend(redis_asyncio.from_url(settings.DASHBOARD_CACHE_URL))
+
+
+dashboard_cache = DashboardCache(_make_backend(), ttl=settings.DASHBOARD_CACHE_TTL)
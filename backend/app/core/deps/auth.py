@@ -1,20 +1,26 @@
 # app/core/deps/auth.py
 
+import hashlib
+
 from fastapi import Header, HTTPException, Depends
 import jwt
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
+from app.core.cache import LRUCache
 from app.core.config import settings
 from app.core.constants import HEADERS
 from app.core.security.jwt import verify_demo_token
 
 student_security = HTTPBearer()
 
+# sha256(token) -> verified payload, entry expires at the token's own `exp`
+_verified_student_tokens = LRUCache(maxsize=settings.AUTH_TOKEN_CACHE_SIZE)
+
 
 # -----------------------------
 # STUDENT AUTH (Supabase JWT)
 # -----------------------------
-def require_student(
+async def require_student(
     credentials: HTTPAuthorizationCredentials = Depends(student_security),
 ) -> dict:
     """
@@ -26,6 +32,12 @@ def require_student(
 
     token = credentials.credentials  # 'Bearer ' ke baad ka part
 
+    # Raw token memory mein nahi rakhte, sirf digest
+    digest = hashlib.sha256(token.encode("utf-8")).digest()
+    payload = _verified_student_tokens.get(digest)
+    if payload is not None:
+        return dict(payload)
+
     try:
         payload = jwt.decode(
             token,
@@ -33,15 +45,20 @@ def require_student(
             algorithms=["HS256"],
             audience="authenticated",
         )
-        return payload
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
 
+    # Bina exp wale token cache nahi karte (kab tak valid hai pata nahi)
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        _verified_student_tokens.set(digest, payload, expires_at=float(exp))
+    return dict(payload)
+
 # -----------------------------
 # DEMO AUTH (role based)
 # -----------------------------
 def require_demo(role: str):
-    def checker(x_nefera_demo_token: str = Header(...)):
+    async def checker(x_nefera_demo_token: str = Header(...)):
         payload = verify_demo_token(x_nefera_demo_token)
         if payload.get("role") != role:
             raise HTTPException(status_code=404)
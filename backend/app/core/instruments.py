@@ -0,0 +1,193 @@
+# app/core/instruments.py
+"""
+Assessment instrument registry: scoring (single + batch), safety events and
+risk escalation per questionnaire. students.submit_assessment sirf registry
+dekhta hai - new questionnaire = new INSTRUMENTS entry, endpoint mein if-chain nahi.
+
+Batch scoring works on a 2-D answer matrix (one row per submission) with NumPy,
+for analytics / re-scoring jobs over historical Assessment.answers:
+
+    result = score_batch("PHQ9", [a.answers for a in rows])   # ragged lists are fine
+    result.scores, result.bands, result.alerts                 # arrays, same order as rows
+
+Bands and alert flags match the scalar calculate_* functions in app/core/scoring.py
+exactly (incl. their edge cases); check_instrument_scoring.py verifies that on
+random inputs. Missing answers count as 0, same as the scalar functions.
+"""
+import itertools
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.core.risk_counters import RISK_ZONES
+from app.core.scoring import calculate_cssrs, calculate_gad7, calculate_phq9
+
+AnswerRows = Union[np.ndarray, Sequence[Sequence[int]]]
+
+
+class BatchScores(NamedTuple):
+    scores: np.ndarray   # int64, (n,)
+    bands: np.ndarray    # str, (n,)
+    alerts: np.ndarray   # bool, (n,)
+
+
+class SafetyEventSpec(NamedTuple):
+    trigger_type: str
+    risk_band: str
+    details: Dict[str, Any]
+
+
+class Instrument(NamedTuple):
+    code: str
+    items: int  # columns the batch scorer reads; shorter rows are zero padded
+    score: Callable[[List[int]], Tuple[int, str, bool]]
+    score_batch: Callable[[np.ndarray], BatchScores]
+    # band -> minimum student risk_status it escalates to (never lowers)
+    escalation: Dict[str, str]
+    # risk_status when the alert flag is set (overrides the band)
+    alert_status: Optional[str] = None
+    # (answers, score, band, alert) -> SafetyEvent to record, or None
+    safety_event: Optional[Callable[[List[int], int, str, bool], Optional[SafetyEventSpec]]] = None
+
+    def target_status(self, band: str, alert: bool) -> Optional[str]:
+        if alert and self.alert_status:
+            return self.alert_status
+        return self.escalation.get(band)
+
+
+# ---------- matrix helpers ----------
+
+def as_matrix(answers: AnswerRows, width: int = 0) -> np.ndarray:
+    """
+    Answer rows -> int64 matrix with at least `width` columns, zero padded.
+    Ragged lists are packed without a per-row Python loop (one flat fromiter + mask).
+    """
+    if isinstance(answers, np.ndarray):
+        matrix = answers.astype(np.int64, copy=False).reshape(len(answers), -1)
+        if matrix.shape[1] >= width:
+            return matrix
+        return np.pad(matrix, ((0, 0), (0, width - matrix.shape[1])))
+
+    lengths = np.fromiter((len(a) for a in answers), dtype=np.int64, count=len(answers))
+    cols = max(width, int(lengths.max(initial=0)))
+    matrix = np.zeros((len(answers), cols), dtype=np.int64)
+    # Row-major mask order == chain order, so values land in the right cells
+    mask = np.arange(cols) < lengths[:, None]
+    matrix[mask] = np.fromiter(
+        itertools.chain.from_iterable(answers), dtype=np.int64, count=int(lengths.sum())
+    )
+    return matrix
+
+
+def _banded(scores: np.ndarray, lower_bounds: Sequence[int], labels: Sequence[str]) -> np.ndarray:
+    """labels[0] below lower_bounds[0], labels[i] from lower_bounds[i-1] up."""
+    index = np.searchsorted(np.asarray(lower_bounds), scores, side="right")
+    return np.asarray(labels)[index]
+
+
+# ---------- PHQ-9 ----------
+
+def _phq9_batch(m: np.ndarray) -> BatchScores:
+    scores = m.sum(axis=1)
+    bands = _banded(scores, (5, 10, 15), ("GREEN", "YELLOW", "ORANGE", "RED"))
+    return BatchScores(scores, bands, m[:, 8] > 0)  # Q9 = suicide risk flag
+
+
+def _phq9_safety_event(answers, score, band, alert) -> Optional[SafetyEventSpec]:
+    # 🔴 Q9 positive -> safety event (suicidality side pe crisis)
+    if not alert:
+        return None
+    return SafetyEventSpec("PHQ9_Q9", "CRISIS", {
+        "q9_score": answers[8] if len(answers) >= 9 else None,
+        "total_score": score,
+        "depression_severity": band,  # e.g. YELLOW
+        "type": "PHQ9",
+    })
+
+
+# ---------- GAD-7 ----------
+
+def _gad7_batch(m: np.ndarray) -> BatchScores:
+    scores = m.sum(axis=1)
+    bands = _banded(scores, (5, 10, 15), ("GREEN", "YELLOW", "ORANGE", "RED"))
+    return BatchScores(scores, bands, np.zeros(len(m), dtype=bool))
+
+
+# ---------- C-SSRS ----------
+
+def _cssrs_batch(m: np.ndarray) -> BatchScores:
+    scores = m.sum(axis=1)
+    yes = m[:, :6] == 1
+    no = m[:, :6] == 0
+    # Same precedence as calculate_cssrs' elif chain (first true condition wins)
+    bands = np.select(
+        [
+            scores == 0,
+            (yes[:, 0] | yes[:, 1]) & no[:, 2:6].all(axis=1),
+            yes[:, 2] | yes[:, 3],
+            yes[:, 4],
+            yes[:, 5],
+        ],
+        ["GREEN", "LOW", "MODERATE", "HIGH", "CRISIS"],
+        default="GREEN",
+    )
+    return BatchScores(scores, bands, (bands == "HIGH") | (bands == "CRISIS"))
+
+
+def _cssrs_safety_event(answers, score, band, alert) -> Optional[SafetyEventSpec]:
+    # 🔴 any non-GREEN risk
+    if band == "GREEN":
+        return None
+    return SafetyEventSpec("CSSRS", band, {"answers": answers, "type": "CSSRS"})
+
+
+# ---------- registry ----------
+
+INSTRUMENTS: Dict[str, Instrument] = {
+    i.code: i
+    for i in (
+        # PHQ9: Q9 > 0 -> CRISIS, RED band -> RED
+        Instrument(
+            code="PHQ9",
+            items=9,
+            score=calculate_phq9,
+            score_batch=_phq9_batch,
+            escalation={"RED": "RED"},
+            alert_status="CRISIS",
+            safety_event=_phq9_safety_event,
+        ),
+        # GAD7 abhi sirf informative hai, risk_status change nahi karta
+        Instrument(
+            code="GAD7",
+            items=7,
+            score=calculate_gad7,
+            score_batch=_gad7_batch,
+            escalation={},
+        ),
+        # CSSRS: HIGH/CRISIS -> CRISIS, MODERATE -> RED, LOW -> ORANGE
+        Instrument(
+            code="CSSRS",
+            items=6,
+            score=calculate_cssrs,
+            score_batch=_cssrs_batch,
+            escalation={"LOW": "ORANGE", "MODERATE": "RED", "HIGH": "CRISIS", "CRISIS": "CRISIS"},
+            alert_status="CRISIS",
+            safety_event=_cssrs_safety_event,
+        ),
+    )
+}
+
+
+def score_batch(code: str, answers: AnswerRows) -> BatchScores:
+    """Scores many submissions of one instrument at once. KeyError for unknown codes."""
+    instrument = INSTRUMENTS[code]
+    return instrument.score_batch(as_matrix(answers, instrument.items))
+
+
+def escalate(current: Optional[str], target: Optional[str]) -> Optional[str]:
+    """The higher of current / target on GREEN < ORANGE < RED < CRISIS; never lowers."""
+    if target is None:
+        return current
+    if current in RISK_ZONES and RISK_ZONES.index(current) >= RISK_ZONES.index(target):
+        return current
+    return target
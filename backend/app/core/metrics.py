@@ -0,0 +1,179 @@
+# app/core/metrics.py
+"""
+Prometheus metrics, scraped from GET /metrics.
+
+- request latency per route template (not raw path, warna cardinality phat jayegi)
+- SQL statement count + DB time per request, via engine events
+- timings for the CPU-heavy helpers (journal analysis, encryption)
+- pool checkout wait, via the Timed* pool classes below
+- dashboard cache hit / miss / coalesced counts (app/core/dashboard_cache.py)
+- risk recompute queue depth / lag (app/core/risk_queue.py)
+
+Note: prometheus_client keeps metrics per process. With `uvicorn --workers N`
+set PROMETHEUS_MULTIPROC_DIR, otherwise each scrape sees one worker only.
+"""
+import functools
+import time
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+REQUEST_LATENCY = Histogram(
+    "nefera_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+)
+REQUEST_DB_STATEMENTS = Histogram(
+    "nefera_http_request_db_statements",
+    "SQL statements executed while serving one request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100, 250),
+)
+REQUEST_DB_SECONDS = Histogram(
+    "nefera_http_request_db_seconds",
+    "Cumulative time spent in SQL while serving one request",
+    ["method", "route"],
+)
+DB_STATEMENTS = Counter(
+    "nefera_db_statements_total",
+    "SQL statements executed (all callers, incl. jobs)",
+    ["engine"],
+)
+DB_STATEMENT_SECONDS = Counter(
+    "nefera_db_statement_seconds_total",
+    "Cumulative SQL execution time",
+    ["engine"],
+)
+FUNCTION_SECONDS = Histogram(
+    "nefera_function_duration_seconds",
+    "Timings for hot helper functions",
+    ["function"],
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+POOL_CHECKOUT_SECONDS = Histogram(
+    "nefera_db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled DB connection",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+POOL_CHECKOUT_TIMEOUTS = Counter(
+    "nefera_db_pool_checkout_timeouts_total",
+    "Checkouts that gave up after pool_timeout (pool exhausted)",
+    ["pool"],
+)
+
+DASHBOARD_CACHE_LOOKUPS = Counter(
+    "nefera_dashboard_cache_lookups_total",
+    "Dashboard cache lookups by result (hit / miss / coalesced / error)",
+    ["endpoint", "result"],
+)
+RISK_QUEUE_DEPTH = Gauge(
+    "nefera_risk_queue_depth",
+    "Students waiting for a risk recompute (deduplicated)",
+    ["backend"],
+    multiprocess_mode="max",
+)
+RISK_QUEUE_LAG_SECONDS = Histogram(
+    "nefera_risk_queue_lag_seconds",
+    "Time from first enqueue of a student to their recompute commit",
+    ["backend"],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+RISK_RECOMPUTES = Counter(
+    "nefera_risk_recomputes_total",
+    "Students recomputed by the queue worker, by outcome",
+    ["backend", "outcome"],
+)
+
+
+class RequestDBStats:
+    __slots__ = ("statements", "seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.seconds = 0.0
+
+
+# Per-request accumulator. Mutable object hai, so engine events fired from
+# SQLAlchemy's greenlet / threadpool still update the same instance.
+_request_db: ContextVar[Optional[RequestDBStats]] = ContextVar("request_db_stats", default=None)
+
+
+def start_request_stats() -> RequestDBStats:
+    stats = RequestDBStats()
+    _request_db.set(stats)
+    return stats
+
+
+def instrument_engine(engine, label: str) -> None:
+    """Counts statements + time on a sync Engine (pass `async_engine.sync_engine` for async)."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        DB_STATEMENTS.labels(label).inc()
+        DB_STATEMENT_SECONDS.labels(label).inc(elapsed)
+        stats = _request_db.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.seconds += elapsed
+
+
+def observe_request(method: str, route: str, status: int, seconds: float, stats: RequestDBStats) -> None:
+    REQUEST_LATENCY.labels(method, route, str(status)).observe(seconds)
+    REQUEST_DB_STATEMENTS.labels(method, route).observe(stats.statements)
+    REQUEST_DB_SECONDS.labels(method, route).observe(stats.seconds)
+
+
+def timed(name: str) -> Callable:
+    """Decorator: records the wrapped (sync) function's duration under `name`."""
+    histogram = FUNCTION_SECONDS.labels(name)
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+        return wrapper
+
+    return decorator
+
+
+class _TimedCheckoutMixin:
+    # Pool events sirf checkout ke BAAD fire hote hain; wait time ke liye _do_get wrap karo.
+    # Label = pool's logging_name (create_engine(pool_logging_name=...)).
+
+    def _do_get(self):
+        label = self._orig_logging_name or "default"
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            POOL_CHECKOUT_TIMEOUTS.labels(label).inc()
+            raise
+        finally:
+            POOL_CHECKOUT_SECONDS.labels(label).observe(time.perf_counter() - start)
+
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def render_latest() -> tuple:
+    """(body, content type) for the /metrics response."""
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,79 @@
+# app/core/mood_rollup.py
+
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.core.config import settings
+
+SCHOOL_TZ = ZoneInfo(settings.SCHOOL_TIMEZONE)
+
+UNASSIGNED = 0
+
+
+def school_today() -> date:
+    return datetime.now(SCHOOL_TZ).date()
+
+
+def window_start(days: int) -> date:
+    """First day of a `days`-day window ending today (school-local), inclusive."""
+    return school_today() - timedelta(days=max(days, 1) - 1)
+
+
+async def record_mood(
+    db: AsyncSession,
+    student_id: int,
+    class_id: Optional[int],
+    mood: str,
+) -> None:
+    """
+    count += 1 for today's (student, class, mood) row. Check-in ke transaction
+    mein hi call karo, taaki entry aur rollup saath commit/rollback hon.
+    """
+    rollup = models.DailyMoodRollup.__table__
+    stmt = pg_insert(rollup).values(
+        student_id=student_id,
+        class_id=class_id if class_id is not None else UNASSIGNED,
+        day=school_today(),
+        mood=mood,
+        count=1,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["student_id", "day", "mood", "class_id"],
+        set_={"count": rollup.c.count + 1},
+    )
+    await db.execute(stmt)
+
+
+async def mood_distribution(
+    db: AsyncSession,
+    days: int,
+    class_id: Optional[int] = None,
+    student_id: Optional[int] = None,
+) -> Dict[str, float]:
+    """
+    {mood: % of check-ins} over the last `days` school-local days, school-wide
+    or for one class / one student. Sums pre-aggregated rows, so 90 days
+    costs about the same as 7.
+    """
+    R = models.DailyMoodRollup
+    stmt = (
+        select(R.mood, func.sum(R.count))
+        .where(R.day >= window_start(days))
+        .group_by(R.mood)
+    )
+    if class_id is not None:
+        stmt = stmt.where(R.class_id == class_id)
+    if student_id is not None:
+        stmt = stmt.where(R.student_id == student_id)
+
+    result = await db.execute(stmt)
+    mood_counts = [(mood, int(count)) for mood, count in result.all()]
+
+    total = sum(c for _, c in mood_counts) or 1
+    return {mood: round(count / total * 100, 1) for mood, count in mood_counts}
@@ -0,0 +1,109 @@
+# app/core/pagination.py
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Query
+from sqlalchemy import Select, tuple_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class PageParams:
+    """`?limit=&cursor=` query params for keyset-paginated list endpoints."""
+
+    def __init__(
+        self,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    ):
+        self.limit = limit
+        self.cursor = cursor
+
+
+def _encode_value(v: Any) -> Any:
+    if isinstance(v, datetime):
+        return {"dt": v.isoformat()}
+    return v
+
+
+def _decode_value(v: Any) -> Any:
+    if isinstance(v, dict) and "dt" in v:
+        return datetime.fromisoformat(v["dt"])
+    return v
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _python_type(column) -> Optional[type]:
+    try:
+        return column.type.python_type
+    except NotImplementedError:
+        return None
+
+
+def _matches(value: Any, expected: Optional[type]) -> bool:
+    if expected is None:
+        return True
+    if isinstance(value, bool) and expected is not bool:
+        return False  # JSON true/false is an int subclass in Python
+    return isinstance(value, expected)
+
+
+def decode_cursor(cursor: str, size: int, types: Sequence[Optional[type]] = ()) -> Tuple[Any, ...]:
+    """
+    Cursor -> key values. `types` (one per key column, None = any) are checked
+    too, so a tampered cursor is a 400 here instead of a DB error later.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, list) or len(values) != size:
+            raise ValueError
+        decoded = tuple(_decode_value(v) for v in values)
+        if types and not all(_matches(v, t) for v, t in zip(decoded, types)):
+            raise ValueError
+        return decoded
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_paginate(
+    stmt: Select,
+    key_columns: Sequence,
+    page: PageParams,
+    descending: bool = True,
+) -> Select:
+    """
+    Adds `WHERE (k1, k2) < (cursor)` + ORDER BY k1, k2 + LIMIT n+1.
+    Row-value comparison lets Postgres seek straight into a (k1, k2) index,
+    so page 1000 costs the same as page 1 (unlike OFFSET).
+    The extra row tells us whether a next page exists.
+    """
+    if page.cursor:
+        values = decode_cursor(
+            page.cursor, len(key_columns), [_python_type(c) for c in key_columns]
+        )
+        keys = tuple_(*key_columns)
+        stmt = stmt.where(keys < tuple_(*values) if descending else keys > tuple_(*values))
+
+    order = [c.desc() if descending else c.asc() for c in key_columns]
+    return stmt.order_by(*order).limit(page.limit + 1)
+
+
+def split_page(
+    rows: Sequence,
+    page: PageParams,
+    key: Callable[[Any], Sequence[Any]],
+) -> Tuple[List, Optional[str]]:
+    """(items for this page, next_cursor or None)."""
+    items = list(rows[:page.limit])
+    if len(rows) > page.limit and items:
+        return items, encode_cursor(key(items[-1]))
+    return items, None
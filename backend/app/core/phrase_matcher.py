@@ -0,0 +1,83 @@
+# app/core/phrase_matcher.py
+
+from collections import deque
+from typing import Dict, List, Sequence, Tuple
+
+
+class PhraseMatcher:
+    """
+    Aho-Corasick automaton over a fixed lexicon of phrases grouped by category.
+
+    Build once (import time), then `find(text)` makes a single pass over the
+    text and reports every phrase that occurs in it - including overlapping
+    and nested ones ("panic" inside "panic attack") - exactly like running
+    `phrase in text` for each phrase, but without scanning the text once per
+    phrase.
+    """
+
+    def __init__(self, lexicon: Dict[str, Sequence[str]]):
+        self.categories: List[str] = list(lexicon)
+        self._rank: Dict[str, int] = {c: i for i, c in enumerate(self.categories)}
+        self._phrases: Dict[str, List[str]] = {c: list(p) for c, p in lexicon.items()}
+
+        # Trie: goto[node] = {char: child}, out[node] = ((category, position), ...)
+        self._goto: List[Dict[str, int]] = [{}]
+        out: List[List[Tuple[str, int]]] = [[]]
+        # "" is a substring of any text, keep `in` semantics for it
+        self._always: List[Tuple[str, int]] = []
+
+        for category, phrases in self._phrases.items():
+            for position, phrase in enumerate(phrases):
+                if not phrase:
+                    self._always.append((category, position))
+                    continue
+                node = 0
+                for ch in phrase:
+                    nxt = self._goto[node].get(ch)
+                    if nxt is None:
+                        nxt = len(self._goto)
+                        self._goto[node][ch] = nxt
+                        self._goto.append({})
+                        out.append([])
+                    node = nxt
+                out[node].append((category, position))
+
+        # Failure links (BFS), outputs merged along the failure chain so a
+        # single lookup per node gives every phrase ending at that point.
+        self._fail: List[int] = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                out[child].extend(out[self._fail[child]])
+
+        self._out: List[Tuple[Tuple[str, int], ...]] = [tuple(o) for o in out]
+
+    def find(self, text: str) -> Dict[str, List[str]]:
+        """
+        Returns {category: [matched phrases]} for every category in the lexicon.
+        Matches keep the lexicon order (not the order they appear in the text).
+        """
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+
+        hits = set(self._always)
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                hits.update(out[node])
+
+        result: Dict[str, List[str]] = {c: [] for c in self.categories}
+        for category, position in sorted(hits, key=lambda h: (self._rank[h[0]], h[1])):
+            result[category].append(self._phrases[category][position])
+        return result
@@ -0,0 +1,88 @@
+# app/core/responses.py
+"""
+Fast JSON output for list endpoints.
+
+- FastJSONResponse: orjson-backed JSONResponse, app-wide default (main.py),
+  so plain-dict endpoints (dashboards, detail views) render with orjson too.
+- json_response(content, response): for data that comes straight from our
+  own columns. Returned as a Response, so FastAPI skips response_model
+  validation + serialization (response_model still documents the shape in
+  OpenAPI). Per-row Pydantic objects mat banao on these paths - plain dicts.
+- stream_json_array(chunks): unbounded lists as a chunked JSON array; the
+  caller yields rows in batches, so the whole list is never in memory.
+
+Output matches Pydantic's JSON for our types (UTC datetimes end in "Z",
+enums as their value). bench_json_responses.py compares the paths.
+"""
+import decimal
+import enum
+from typing import Any, AsyncIterator, Iterable, Optional
+
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse, StreamingResponse
+
+_ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def _default(value: Any) -> Any:
+    # orjson natively does datetime/date/uuid/dataclass; baaki jo columns se aa sakta hai
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _copy_headers(target: Response, source: Optional[Response]) -> None:
+    # Headers the endpoint set on FastAPI's injected `response` (ETag etc.);
+    # FastAPI only merges them itself when the endpoint returns plain data
+    if source is None:
+        return
+    target.headers.raw.extend(
+        (k, v) for k, v in source.headers.raw if k.lower() != b"content-length"
+    )
+
+
+def json_response(content: Any, response: Optional[Response] = None, status_code: int = 200) -> Response:
+    """Already-shaped, trusted data -> JSON bytes, skipping response_model validation."""
+    out = FastJSONResponse(content, status_code=status_code)
+    _copy_headers(out, response)
+    return out
+
+
+async def _array_body(chunks: AsyncIterator[Iterable[Any]]) -> AsyncIterator[bytes]:
+    yield b"["
+    first = True
+    async for rows in chunks:
+        body = dumps(list(rows))[1:-1]  # one orjson call per chunk, outer [] stripped
+        if not body:
+            continue
+        yield body if first else b"," + body
+        first = False
+    yield b"]"
+
+
+def stream_json_array(
+    chunks: AsyncIterator[Iterable[Any]],
+    response: Optional[Response] = None,
+) -> StreamingResponse:
+    """
+    `chunks` yields lists of rows (dicts); each chunk goes out as soon as it's
+    encoded. Errors after the first byte can't become a 500 any more, so do
+    auth / 404 checks before calling this.
+    """
+    out = StreamingResponse(_array_body(chunks), media_type="application/json")
+    _copy_headers(out, response)
+    return out
@@ -0,0 +1,169 @@
+# app/core/risk_counters.py
+
+from typing import Dict, List, Tuple
+
+from sqlalchemy import event, func, inspect, literal, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app import models
+
+UNASSIGNED = 0
+
+RISK_ZONES = ("GREEN", "ORANGE", "RED", "CRISIS")
+
+CounterKey = Tuple[int, int, str]
+
+
+def _apply_delta(connection, class_id: int | None, risk_status: str | None, delta: int) -> None:
+    """
+    UPSERT count += delta for the (school, class, risk_status) row.
+    school_id class se nikalte hain, same statement mein.
+    """
+    if risk_status is None or delta == 0:
+        return
+
+    if class_id is None:
+        school_id = literal(UNASSIGNED)
+        class_id = UNASSIGNED
+    else:
+        school_id = func.coalesce(
+            select(models.Class.school_id)
+            .where(models.Class.id == class_id)
+            .scalar_subquery(),
+            UNASSIGNED,
+        )
+
+    counter = models.RiskZoneCounter.__table__
+    stmt = pg_insert(counter).from_select(
+        ["school_id", "class_id", "risk_status", "count"],
+        select(school_id, literal(class_id), literal(risk_status), literal(delta)),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["school_id", "class_id", "risk_status"],
+        set_={"count": counter.c.count + stmt.excluded.count},
+    )
+    connection.execute(stmt)
+
+
+@event.listens_for(models.StudentProfile, "after_insert")
+def _profile_inserted(mapper, connection, target):
+    _apply_delta(connection, target.class_id, target.risk_status, +1)
+
+
+@event.listens_for(models.StudentProfile, "after_update")
+def _profile_updated(mapper, connection, target):
+    state = inspect(target)
+    status_hist = state.attrs.risk_status.history
+    class_hist = state.attrs.class_id.history
+    if not status_hist.has_changes() and not class_hist.has_changes():
+        return
+
+    old_status = status_hist.deleted[0] if status_hist.deleted else target.risk_status
+    old_class = class_hist.deleted[0] if class_hist.deleted else target.class_id
+    if (old_class, old_status) == (target.class_id, target.risk_status):
+        return
+
+    _apply_delta(connection, old_class, old_status, -1)
+    _apply_delta(connection, target.class_id, target.risk_status, +1)
+
+
+@event.listens_for(models.StudentProfile, "after_delete")
+def _profile_deleted(mapper, connection, target):
+    _apply_delta(connection, target.class_id, target.risk_status, -1)
+
+
+# NOTE: Query.update()/bulk inserts mapper events skip karte hain. Aise jobs ko
+# khud counters adjust karne honge (ya end mein rebuild_risk_counters chalana).
+
+
+async def adjust_risk_counter(
+    db: AsyncSession,
+    class_id: int | None,
+    risk_status: str,
+    delta: int,
+) -> None:
+    """For Core/bulk writes that bypass the mapper hooks. Same transaction as the write."""
+    await db.run_sync(lambda session: _apply_delta(session.connection(), class_id, risk_status, delta))
+
+
+async def risk_zone_summary(db: AsyncSession, class_id: int | None = None) -> Dict[str, int]:
+    """
+    {"green": n, "orange": n, "red": n, "crisis": n} from the counter table,
+    school-wide or for one class.
+    """
+    stmt = select(
+        models.RiskZoneCounter.risk_status,
+        func.sum(models.RiskZoneCounter.count),
+    )
+    if class_id is not None:
+        stmt = stmt.where(models.RiskZoneCounter.class_id == class_id)
+    result = await db.execute(stmt.group_by(models.RiskZoneCounter.risk_status))
+    data = {status: int(count or 0) for status, count in result.all()}
+
+    return {zone.lower(): data.get(zone, 0) for zone in RISK_ZONES}
+
+
+def _actual_counts(db: Session) -> Dict[CounterKey, int]:
+    rows = (
+        db.query(
+            func.coalesce(models.Class.school_id, UNASSIGNED),
+            func.coalesce(models.StudentProfile.class_id, UNASSIGNED),
+            models.StudentProfile.risk_status,
+            func.count(models.StudentProfile.id),
+        )
+        .outerjoin(models.Class, models.Class.id == models.StudentProfile.class_id)
+        .filter(models.StudentProfile.risk_status.isnot(None))
+        .group_by(
+            func.coalesce(models.Class.school_id, UNASSIGNED),
+            func.coalesce(models.StudentProfile.class_id, UNASSIGNED),
+            models.StudentProfile.risk_status,
+        )
+        .all()
+    )
+    return {(school_id, class_id, status): count for school_id, class_id, status, count in rows}
+
+
+def rebuild_risk_counters(db: Session, dry_run: bool = False) -> List[dict]:
+    """
+    Recounts student_profiles from scratch and replaces the counter table.
+    Returns the drift found: [{"school_id", "class_id", "risk_status", "stored", "actual"}].
+
+    The counter table is locked first, so concurrent check-ins wait for this
+    transaction and then apply their delta on top of the rebuilt numbers.
+    """
+    db.execute(text("LOCK TABLE risk_zone_counters IN SHARE ROW EXCLUSIVE MODE"))
+
+    actual = _actual_counts(db)
+    stored = {
+        (c.school_id, c.class_id, c.risk_status): c.count
+        for c in db.query(models.RiskZoneCounter).all()
+    }
+
+    drift = []
+    for key in sorted(set(actual) | set(stored), key=str):
+        if actual.get(key, 0) != stored.get(key, 0):
+            school_id, class_id, status = key
+            drift.append({
+                "school_id": school_id,
+                "class_id": class_id,
+                "risk_status": status,
+                "stored": stored.get(key, 0),
+                "actual": actual.get(key, 0),
+            })
+
+    if dry_run:
+        db.rollback()
+        return drift
+
+    db.query(models.RiskZoneCounter).delete(synchronize_session=False)
+    db.bulk_insert_mappings(
+        models.RiskZoneCounter,
+        [
+            {"school_id": s, "class_id": c, "risk_status": r, "count": n}
+            for (s, c, r), n in actual.items()
+        ],
+    )
+    db.commit()
+    return drift
@@ -0,0 +1,292 @@
+# app/core/risk_queue.py
+"""
+Coalescing queue for risk recomputes (replaces per-check-in BackgroundTasks).
+
+Check-in calls `await risk_queue.enqueue(db, student_id)` BEFORE its commit.
+Pending ids are deduplicated, so a student who checks in five times in a
+few seconds is recomputed once. A worker task (started from the app
+lifespan) takes up to RISK_RECOMPUTE_BATCH_SIZE students at a time and
+recomputes them on its own session, one commit per batch.
+
+RISK_QUEUE_BACKEND:
+- "local": in-process dict, filled after the check-in commits (session hook).
+  Fast, but pending ids are lost on restart and each worker drains its own queue.
+- "db": risk_recompute_queue table, row inserted in the check-in transaction
+  (ON CONFLICT DO NOTHING = dedupe). Workers claim with FOR UPDATE SKIP LOCKED
+  and delete + recompute in one transaction, so a crash just leaves the rows
+  for the next attempt. Safe with any number of app workers.
+
+Failures: a failed batch is logged and retried one student at a time, so one
+bad profile can't hold up the rest. A student whose recompute fails
+RISK_RECOMPUTE_MAX_ATTEMPTS times is dropped from the queue (logged, counted
+as "dropped"); the nightly recompute_risk_statuses job still covers them.
+DB outages (connection errors, timeouts) don't count as attempts. Attempts
+are counted per process.
+
+Metrics: nefera_risk_queue_depth, nefera_risk_queue_lag_seconds,
+nefera_risk_recomputes_total (app/core/metrics.py).
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, event, func, select
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core.config import settings
+from app.core.dashboard_cache import dashboard_cache
+from app.core.metrics import RISK_QUEUE_DEPTH, RISK_QUEUE_LAG_SECONDS, RISK_RECOMPUTES
+from app.core.scoring import recompute_risk_profiles
+from app.db.base import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+# (student_id, first enqueue as unix time)
+Claimed = List[Tuple[int, float]]
+
+_PENDING = "pending_risk_recomputes"  # session.info key (local backend)
+
+
+class LocalRecomputeQueue:
+    name = "local"
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self._pending: Dict[int, float] = {}  # insertion order = FIFO
+        self._wakeup = asyncio.Event()
+        self.attempts: Dict[int, int] = {}  # student_id -> failed recomputes
+
+    async def enqueue(self, db: AsyncSession, student_id: int) -> None:
+        # Commit ke baad hi queue mein; rollback = kuch nahi
+        db.sync_session.info.setdefault(_PENDING, set()).add(student_id)
+
+    def push(self, student_ids) -> None:
+        now = time.time()
+        for student_id in student_ids:
+            self._pending.setdefault(student_id, now)  # dedupe, oldest time wins
+        RISK_QUEUE_DEPTH.labels(self.name).set(len(self._pending))
+        self._wakeup.set()
+
+    async def claim(
+        self, db: AsyncSession, limit: int, student_ids: Optional[Sequence[int]] = None
+    ) -> Claimed:
+        if student_ids is not None:
+            # Specific students (retry / drop); jo pending nahi hai unhe skip
+            picked = [s for s in student_ids if s in self._pending][:limit]
+        else:
+            while not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            # Burst ko thoda jama hone do, taaki ek student ke 5 check-ins = 1 recompute
+            await asyncio.sleep(self.delay)
+            picked = list(self._pending)[:limit]
+        batch = []
+        for student_id in picked:
+            batch.append((student_id, self._pending.pop(student_id)))
+        RISK_QUEUE_DEPTH.labels(self.name).set(len(self._pending))
+        return batch
+
+    def release(self, batch: Claimed) -> None:
+        """Failed batch wapas queue mein (original enqueue time ke saath)."""
+        for student_id, enqueued_at in batch:
+            self._pending.setdefault(student_id, enqueued_at)
+        RISK_QUEUE_DEPTH.labels(self.name).set(len(self._pending))
+        self._wakeup.set()
+
+    async def idle(self) -> None:
+        return None  # claim() already waits
+
+
+class DbRecomputeQueue:
+    name = "db"
+
+    def __init__(self, poll_seconds: float):
+        self.poll_seconds = poll_seconds
+        self.attempts: Dict[int, int] = {}  # student_id -> failed recomputes (this process)
+
+    async def enqueue(self, db: AsyncSession, student_id: int) -> None:
+        table = models.RiskRecomputeRequest.__table__
+        await db.execute(
+            pg_insert(table)
+            .values(student_id=student_id)
+            .on_conflict_do_nothing(index_elements=["student_id"])
+        )
+
+    async def claim(
+        self, db: AsyncSession, limit: int, student_ids: Optional[Sequence[int]] = None
+    ) -> Claimed:
+        """DELETE ... RETURNING inside the worker's transaction; commit = done, rollback = retry."""
+        table = models.RiskRecomputeRequest.__table__
+        picked = select(table.c.student_id)
+        if student_ids is not None:
+            picked = picked.where(table.c.student_id.in_(student_ids))
+        picked = (
+            picked
+            .order_by(table.c.enqueued_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)  # multiple workers, no double work
+            .scalar_subquery()
+        )
+        result = await db.execute(
+            delete(table)
+            .where(table.c.student_id.in_(picked))
+            .returning(table.c.student_id, table.c.enqueued_at)
+        )
+        batch = [(student_id, enqueued_at.timestamp()) for student_id, enqueued_at in result.all()]
+
+        result = await db.execute(select(func.count()).select_from(table))
+        RISK_QUEUE_DEPTH.labels(self.name).set(result.scalar_one())
+        return batch
+
+    def release(self, batch: Claimed) -> None:
+        return None  # rollback already put the rows back
+
+    async def idle(self) -> None:
+        await asyncio.sleep(self.poll_seconds)
+
+
+def _make_queue():
+    if settings.RISK_QUEUE_BACKEND == "local":
+        return LocalRecomputeQueue(delay=settings.RISK_RECOMPUTE_DELAY)
+    if settings.RISK_QUEUE_BACKEND == "db":
+        return DbRecomputeQueue(poll_seconds=settings.RISK_QUEUE_POLL_SECONDS)
+    raise RuntimeError(
+        f"RISK_QUEUE_BACKEND must be 'local' or 'db', got {settings.RISK_QUEUE_BACKEND!r}"
+    )
+
+
+risk_queue = _make_queue()
+
+
+@event.listens_for(Session, "after_commit")
+def _push_pending(session):
+    pending = session.info.pop(_PENDING, None)
+    if pending and isinstance(risk_queue, LocalRecomputeQueue):
+        risk_queue.push(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending(session):
+    session.info.pop(_PENDING, None)
+
+
+# ---------- worker ----------
+
+class BatchFailed(Exception):
+    """Recompute of `student_ids` failed and was rolled back; they are back in the queue."""
+
+    def __init__(self, student_ids: List[int]):
+        super().__init__(f"risk recompute failed for {len(student_ids)} students")
+        self.student_ids = student_ids
+
+
+def _transient(exc: BaseException) -> bool:
+    # DB down / connection dropped / timeout: student ki galti nahi, attempts mein mat gino
+    if isinstance(exc, DBAPIError):
+        return exc.connection_invalidated or isinstance(exc, (InterfaceError, OperationalError))
+    return isinstance(exc, (OSError, asyncio.TimeoutError))
+
+
+async def _recompute_claimed(queue, limit: int, student_ids: Optional[Sequence[int]] = None) -> int:
+    """Claims + recomputes one batch on a fresh session. Raises BatchFailed (batch released)."""
+    batch: Claimed = []
+    try:
+        async with AsyncSessionLocal() as db:
+            batch = await queue.claim(db, limit, student_ids)
+            if not batch:
+                await db.rollback()
+                return 0
+            recompute = await recompute_risk_profiles(db, [student_id for student_id, _ in batch])
+            await db.commit()
+    except Exception as exc:
+        queue.release(batch)
+        RISK_RECOMPUTES.labels(queue.name, "error").inc(len(batch))
+        raise BatchFailed([student_id for student_id, _ in batch]) from exc
+
+    now = datetime.now(timezone.utc).timestamp()
+    for student_id, enqueued_at in batch:
+        RISK_QUEUE_LAG_SECONDS.labels(queue.name).observe(max(0.0, now - enqueued_at))
+        queue.attempts.pop(student_id, None)
+    RISK_RECOMPUTES.labels(queue.name, "ok").inc(len(batch))
+
+    for class_id in recompute.changed_classes:
+        await dashboard_cache.invalidate(class_id)
+    return len(batch)
+
+
+async def _failed(queue, student_id: int) -> None:
+    """One more failed attempt; at RISK_RECOMPUTE_MAX_ATTEMPTS the student leaves the queue."""
+    attempts = queue.attempts.get(student_id, 0) + 1
+    if attempts < settings.RISK_RECOMPUTE_MAX_ATTEMPTS:
+        queue.attempts[student_id] = attempts
+        return
+    # Claim + commit without recomputing = removed from the queue
+    async with AsyncSessionLocal() as db:
+        dropped = await queue.claim(db, 1, [student_id])
+        await db.commit()
+    queue.attempts.pop(student_id, None)
+    RISK_RECOMPUTES.labels(queue.name, "dropped").inc(len(dropped))
+    logger.error(
+        "risk recompute for student %s failed %s times; dropped from the queue "
+        "(nightly recompute will pick it up)", student_id, attempts,
+    )
+
+
+async def process_batch(queue=None, limit: Optional[int] = None) -> int:
+    """
+    One batch. Returns students processed (0 = idle). If the batch fails, its
+    students are retried one by one so a bad row only fails itself; transient
+    DB errors are re-raised as they are (run_worker backs off).
+    """
+    queue = queue or risk_queue
+    limit = limit or settings.RISK_RECOMPUTE_BATCH_SIZE
+    try:
+        return await _recompute_claimed(queue, limit)
+    except BatchFailed as failed:
+        if _transient(failed.__cause__) or not failed.student_ids:
+            raise
+        batch_ids = failed.student_ids
+        if len(batch_ids) == 1:
+            logger.exception("risk recompute failed for student %s", batch_ids[0], exc_info=failed.__cause__)
+            await _failed(queue, batch_ids[0])
+            return 0
+        logger.warning(
+            "risk recompute batch of %d failed; retrying one by one",
+            len(batch_ids), exc_info=failed.__cause__,
+        )
+
+    done = 0
+    for student_id in batch_ids:
+        try:
+            done += await _recompute_claimed(queue, 1, [student_id])
+        except BatchFailed as failed:
+            if _transient(failed.__cause__):
+                raise
+            logger.exception("risk recompute failed for student %s", student_id, exc_info=failed.__cause__)
+            await _failed(queue, student_id)
+    return done
+
+
+async def run_worker(queue=None) -> None:
+    queue = queue or risk_queue
+    while True:
+        try:
+            if not await process_batch(queue):
+                await queue.idle()
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            # DB hiccup: batch wapas queue mein hai, thoda ruk ke retry
+            logger.exception("risk recompute worker error; retrying in 1s", exc_info=exc.__cause__ or exc)
+            await asyncio.sleep(1.0)
+
+
+def start_worker() -> asyncio.Task:
+    """Call from app startup."""
+    return asyncio.get_running_loop().create_task(run_worker())
@@ -0,0 +1,147 @@
+# app/core/risk_window.py
+
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.core.mood_rollup import SCHOOL_TZ, school_today
+
+# Risk engine looks at today + the 6 days before it
+RISK_WINDOW_DAYS = 7
+
+WORRIED_MOODS = ("WORRIED",)
+SAD_FLAT_MOODS = ("SAD", "FLAT")
+
+Buckets = List[List[int]]
+
+
+def today() -> date:
+    # School-local day, same as the mood rollups (mood_rollup.school_today)
+    return school_today()
+
+
+def day_of(dt: datetime) -> date:
+    # timezone-aware DB timestamps ko school-local day pe map karo (same as today())
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(SCHOOL_TZ)
+    return dt.date()
+
+
+def window_cutoff(anchor: date) -> datetime:
+    """Start of the oldest day in the window ending on `anchor`, school-local."""
+    return datetime.combine(anchor - timedelta(days=RISK_WINDOW_DAYS - 1), time.min, tzinfo=SCHOOL_TZ)
+
+
+def empty_buckets() -> Buckets:
+    return [[0, 0, 0] for _ in range(RISK_WINDOW_DAYS)]
+
+
+def _aligned(window: models.StudentRiskWindow, day: date) -> Buckets:
+    """Buckets re-based so that index 0 is `day` (older days fall off the end)."""
+    shift = (day - window.anchor_day).days
+    buckets = [list(b) for b in (window.buckets or [])][:RISK_WINDOW_DAYS]
+    buckets += empty_buckets()[len(buckets):]
+    if shift <= 0:
+        return buckets
+    if shift >= RISK_WINDOW_DAYS:
+        return empty_buckets()
+    return empty_buckets()[:shift] + buckets[:RISK_WINDOW_DAYS - shift]
+
+
+def _bump(buckets: Buckets, index: int, mood: str | None, severe: bool) -> None:
+    if not 0 <= index < RISK_WINDOW_DAYS:
+        return
+    if mood in WORRIED_MOODS:
+        buckets[index][0] += 1
+    elif mood in SAD_FLAT_MOODS:
+        buckets[index][1] += 1
+    if severe:
+        buckets[index][2] = 1
+
+
+async def _locked_window(db: AsyncSession, student_id: int) -> Optional[models.StudentRiskWindow]:
+    # FOR UPDATE: parallel check-ins of one student queue up here instead of losing a count
+    return await db.get(
+        models.StudentRiskWindow, student_id, with_for_update=True, populate_existing=True
+    )
+
+
+async def rebuild_risk_window(db: AsyncSession, student_id: int) -> models.StudentRiskWindow:
+    """
+    Builds the window from DailyJournal rows. Sirf tab chalta hai jab student ka
+    window row abhi exist nahi karta (first check-in after deploy) or was dropped.
+    Returns the row locked FOR UPDATE; caller commits.
+    """
+    anchor = today()
+    window = await _locked_window(db, student_id)
+    if window is None:
+        # Two first check-ins at once: ON CONFLICT waits for the other insert's
+        # commit instead of failing with a PK error, then we lock its row
+        table = models.StudentRiskWindow.__table__
+        await db.execute(
+            pg_insert(table)
+            .values(student_id=student_id, anchor_day=anchor, buckets=empty_buckets())
+            .on_conflict_do_nothing(index_elements=["student_id"])
+        )
+        window = await _locked_window(db, student_id)
+
+    # Journals read after the lock, so a concurrent check-in's committed entry is included
+    result = await db.execute(
+        select(
+            models.DailyJournal.date,
+            models.DailyJournal.mood,
+            models.DailyJournal.has_severe_suicidal_terms,
+        )
+        .where(
+            models.DailyJournal.student_id == student_id,
+            models.DailyJournal.date >= window_cutoff(anchor),
+        )
+    )
+    rows = result.all()
+
+    buckets = empty_buckets()
+    for entry_date, mood, severe in rows:
+        if entry_date is not None:
+            _bump(buckets, (anchor - day_of(entry_date)).days, mood, bool(severe))
+
+    window.anchor_day = anchor
+    window.buckets = buckets
+    return window
+
+
+async def record_checkin(
+    db: AsyncSession,
+    student_id: int,
+    mood: str | None,
+    severe: bool,
+) -> models.StudentRiskWindow:
+    """
+    O(1) update of the student's window for a new check-in (dated today).
+    Call this BEFORE the new DailyJournal row is flushed, otherwise a first-time
+    rebuild would count the entry twice. Locks the window row until the
+    caller commits.
+    """
+    window = await _locked_window(db, student_id)
+    if window is None:
+        window = await rebuild_risk_window(db, student_id)
+    day = today()
+    buckets = _aligned(window, day)
+    _bump(buckets, 0, mood, severe)
+
+    # JSON column in-place mutation track nahi karta, isliye naya object assign karo
+    window.anchor_day = day
+    window.buckets = buckets
+    return window
+
+
+def window_counts(window: models.StudentRiskWindow) -> Tuple[int, int, bool]:
+    """(worried entries, sad/flat entries, any severe entry) inside the window as of today."""
+    buckets = _aligned(window, today())
+    worried = sum(b[0] for b in buckets)
+    sad_flat = sum(b[1] for b in buckets)
+    severe = any(b[2] for b in buckets)
+    return worried, sad_flat, severe
@@ -1,8 +1,12 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app import models  # ✅ Models yahan se import ho rahe hain
-from datetime import datetime, timedelta
-from typing import Any, Dict, List, Tuple
-from app.models import SafetyEvent, DailyJournal, StudentProfile
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+from sqlalchemy import select
+from app.models import SafetyEvent
+from app.core.dashboard_cache import dashboard_cache
+from app.core.metrics import timed
+from app.core.phrase_matcher import PhraseMatcher
+from app.core.risk_window import rebuild_risk_window, window_counts
 
 
 # ---------- Journal keyword lists (MVP) ----------
@@ -59,7 +63,37 @@ ANXIETY_TERMS: List[str] = [
     "hard to breathe",
 ]
 
+# Compiled once at import. Agar upar ki lists runtime pe change karo to
+# rebuild_journal_matcher() call karna padega.
+_CATEGORY_FLAGS: Dict[str, str] = {
+    "severe": "has_severe_suicidal_terms",
+    "self_worth": "has_self_worth_terms",
+    "low_mood": "has_low_mood_terms",
+    "anxiety": "has_anxiety_terms",
+}
 
+# DailyJournal columns that analyze_journal_text fills
+JOURNAL_FLAG_FIELDS: Tuple[str, ...] = tuple(_CATEGORY_FLAGS.values())
+
+
+def build_journal_matcher() -> PhraseMatcher:
+    return PhraseMatcher({
+        "severe": SEVERE_PHRASES,
+        "self_worth": SELF_WORTH_TERMS,
+        "low_mood": LOW_MOOD_TERMS,
+        "anxiety": ANXIETY_TERMS,
+    })
+
+
+JOURNAL_MATCHER = build_journal_matcher()
+
+
+def rebuild_journal_matcher() -> None:
+    global JOURNAL_MATCHER
+    JOURNAL_MATCHER = build_journal_matcher()
+
+
+@timed("analyze_journal_text")
 def analyze_journal_text(journal_text: str | None) -> Dict[str, Any]:
     """
     Simple keyword-based analysis of journal text.
@@ -94,31 +128,13 @@ def analyze_journal_text(journal_text: str | None) -> Dict[str, Any]:
     if not journal_text:
         return flags
 
-    text = journal_text.lower()
-
-    # Severe phrases
-    for phrase in SEVERE_PHRASES:
-        if phrase in text:
-            flags["has_severe_suicidal_terms"] = True
-            flags["matches"]["severe"].append(phrase)
-
-    # Self-worth
-    for phrase in SELF_WORTH_TERMS:
-        if phrase in text:
-            flags["has_self_worth_terms"] = True
-            flags["matches"]["self_worth"].append(phrase)
+    # Single pass over the text for all four lists (see JOURNAL_MATCHER)
+    found = JOURNAL_MATCHER.find(journal_text.lower())
 
-    # Low mood
-    for phrase in LOW_MOOD_TERMS:
-        if phrase in text:
-            flags["has_low_mood_terms"] = True
-            flags["matches"]["low_mood"].append(phrase)
-
-    # Anxiety
-    for phrase in ANXIETY_TERMS:
-        if phrase in text:
-            flags["has_anxiety_terms"] = True
-            flags["matches"]["anxiety"].append(phrase)
+    for category, flag in _CATEGORY_FLAGS.items():
+        if found[category]:
+            flags[flag] = True
+            flags["matches"][category] = found[category]
 
     return flags
 
@@ -168,14 +184,15 @@ def calculate_gad7(answers: list[int]):
 
 
 def create_safety_event(
-    db: Session,
+    db: AsyncSession,
     student_id: int,
     trigger_type: str,
     risk_band: str,
     details: Dict[str, Any] | None = None,
 ) -> SafetyEvent:
     """
-    Create and persist a SafetyEvent row.
+    Add a SafetyEvent row to the caller's transaction (no commit here: the
+    check-in / assessment commits it together with the data that triggered it).
     Used for:
     - PHQ9 Q9 > 0  (trigger_type="PHQ9_Q9")
     - Severe journal phrases (trigger_type="JOURNAL_SEVERE")
@@ -188,40 +205,15 @@ def create_safety_event(
         details=details or {},
     )
     db.add(event)
-    db.commit()
-    db.refresh(event)
     return event
 
 
 
-def update_student_risk_profile(db: Session, student_id: int):
+def risk_status_from_counts(worried_days: int, sad_flat_days: int, has_severe_recent: bool) -> str:
     """
-    Analyzes last 7 days of journals to update risk status automatically.
-    Now also considers severe suicidal phrases from journal flags.
+    Decision rules for the 7-day window.
+    (Counts are check-in entries, same as before - multiple check-ins in a day count separately.)
     """
-    seven_days_ago = datetime.now() - timedelta(days=7)
-    
-    entries: List[DailyJournal] = db.query(models.DailyJournal).filter(
-        models.DailyJournal.student_id == student_id,
-        models.DailyJournal.date >= seven_days_ago
-    ).all()
-    
-    # Counters
-    worried_days = 0
-    sad_flat_days = 0
-    has_severe_recent = False
-
-    for e in entries:
-        if e.mood == "WORRIED":
-            worried_days += 1
-        elif e.mood in ["SAD", "FLAT"]:
-            sad_flat_days += 1
-
-        # 🔴 new: if any entry has severe suicidal terms in last 7 days
-        if getattr(e, "has_severe_suicidal_terms", False):
-            has_severe_recent = True
-    
-    # Decision Rules
     new_status = "GREEN"
 
     # 🔴 Hard override: any severe phrase in last 7 days -> CRISIS
@@ -238,18 +230,84 @@ def update_student_risk_profile(db: Session, student_id: int):
             else:
                 new_status = "ORANGE" if new_status != "RED" else "RED"
 
-    student = db.query(models.StudentProfile).filter(models.StudentProfile.id == student_id).first()
-    
-    if student:
-        # Once CRISIS, don't downgrade automatically
-        if student.risk_status == "CRISIS":
-            return "CRISIS"
-            
-        student.risk_status = new_status
-        db.commit()
-        
     return new_status
 
+
+class RiskRecompute(NamedTuple):
+    statuses: Dict[int, str]               # student_id -> status after recompute
+    changed_classes: Set[Optional[int]]    # classes whose counts moved (dashboard invalidation)
+
+
+async def recompute_risk_profiles(db: AsyncSession, student_ids: Sequence[int]) -> RiskRecompute:
+    """
+    Risk status for a batch of students from their rolling 7-day windows
+    (StudentRiskWindow, kept up to date by the check-in path), incl. severe
+    journal flags. Two queries for the whole batch (+ a rebuild per missing
+    window). ORM updates, so counter / alert hooks fire. Caller commits.
+
+    Profiles are locked FOR UPDATE (in id order) until that commit, so a CRISIS
+    written by a check-in / assessment meanwhile is read here, not overwritten.
+    """
+    ids = sorted(set(student_ids))
+    result = await db.execute(
+        select(models.StudentRiskWindow).where(models.StudentRiskWindow.student_id.in_(ids))
+    )
+    windows = {w.student_id: w for w in result.scalars().all()}
+
+    missing = [student_id for student_id in ids if student_id not in windows]
+    if missing:
+        # Rebuild before the profile lock: check-in locks window -> profile, same order here
+        result = await db.execute(
+            select(models.StudentProfile.id).where(models.StudentProfile.id.in_(missing))
+        )
+        for student_id in result.scalars().all():
+            windows[student_id] = await rebuild_risk_window(db, student_id)
+
+    result = await db.execute(
+        select(models.StudentProfile)
+        .where(models.StudentProfile.id.in_(ids))
+        .order_by(models.StudentProfile.id)  # same lock order in every worker, no deadlocks
+        .with_for_update()
+    )
+    students = {s.id: s for s in result.scalars().all()}
+
+    statuses: Dict[int, str] = {}
+    changed_classes: Set[Optional[int]] = set()
+    for student_id in ids:
+        student = students.get(student_id)
+        if student is None:
+            continue  # profile delete ho gaya
+
+        window = windows.get(student_id)
+        if window is None:
+            # Profile was created after the rebuild step above
+            window = await rebuild_risk_window(db, student_id)
+
+        # Once CRISIS, don't downgrade automatically (window rebuild phir bhi persist hota hai)
+        if student.risk_status == "CRISIS":
+            statuses[student_id] = "CRISIS"
+            continue
+
+        new_status = risk_status_from_counts(*window_counts(window))
+        if student.risk_status != new_status:
+            changed_classes.add(student.class_id)
+            student.risk_status = new_status
+        statuses[student_id] = new_status
+
+    return RiskRecompute(statuses, changed_classes)
+
+
+async def update_student_risk_profile(db: AsyncSession, student_id: int):
+    """
+    Single-student recompute + commit (scripts / one-offs). The API path goes
+    through the coalescing queue in app/core/risk_queue.py instead.
+    """
+    recompute = await recompute_risk_profiles(db, [student_id])
+    await db.commit()
+    for class_id in recompute.changed_classes:
+        await dashboard_cache.invalidate(class_id)
+    return recompute.statuses.get(student_id)
+
 def calculate_cssrs(answers: List[int]) -> Tuple[int, str, bool]:
     """
     C-SSRS (screening) scoring helper.
@@ -1,10 +1,21 @@
 # app/core/security/encryption.py
 
+import base64
+import hashlib
 import os
-from typing import Optional
-from cryptography.fernet import Fernet, InvalidToken
+from typing import Dict, List, Optional, Union
+
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+from app.core.metrics import timed
 
 _JOURNAL_KEY_ENV = "JOURNAL_FERNET_KEY"
+# Retired keys, comma-separated, newest first. Sirf decrypt ke liye.
+_JOURNAL_OLD_KEYS_ENV = "JOURNAL_FERNET_OLD_KEYS"
 
 _key = os.environ.get(_JOURNAL_KEY_ENV)
 if not _key:
@@ -16,25 +27,130 @@ if not _key:
         "and put it in your env."
     )
 
-if isinstance(_key, str):
-    _key_bytes = _key.encode("utf-8")
-else:
-    _key_bytes = _key
+# Key rotation, no downtime:
+#   1. add the new key to JOURNAL_FERNET_OLD_KEYS everywhere (all pods can read it)
+#   2. make it JOURNAL_FERNET_KEY, move the previous one into OLD_KEYS
+#   3. python -m app.jobs.reencrypt_journals
+#   4. drop the retired key from OLD_KEYS
+
+
+KEY_ID_SIZE = 4
+
+
+class JournalKey:
+    """One configured key: Fernet (legacy tokens) + derived AES-256-GCM key."""
+
+    def __init__(self, fernet_key: Union[str, bytes]):
+        if isinstance(fernet_key, str):
+            fernet_key = fernet_key.encode("utf-8")
+        self.fernet = Fernet(fernet_key)
+        # AES key HKDF se Fernet key se derive hota hai, so no extra secret per key
+        raw = HKDF(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=None,
+            info=b"nefera-journal-aesgcm-v1",
+        ).derive(base64.urlsafe_b64decode(fernet_key))
+        self.aead = AESGCM(raw)
+        # Stored in every v2 ciphertext, so decrypt picks the right key directly
+        self.key_id = hashlib.sha256(raw).digest()[:KEY_ID_SIZE]
+
+
+KEYS: List[JournalKey] = [JournalKey(_key)] + [
+    JournalKey(k.strip())
+    for k in os.environ.get(_JOURNAL_OLD_KEYS_ENV, "").split(",")
+    if k.strip()
+]
+CURRENT_KEY = KEYS[0]
+_KEYS_BY_ID: Dict[bytes, JournalKey] = {}
+for _k in reversed(KEYS):
+    _KEYS_BY_ID[_k.key_id] = _k  # collision (4 bytes) pe newest key jeetega
+
+# Legacy format: Fernet tokens (AES-CBC + HMAC, base64 text) in daily_journals.journal_text.
+# Only read now (any configured key); new journals use the binary format below.
+fernet = MultiFernet([k.fernet for k in KEYS])
 
-fernet = Fernet(_key_bytes)
+# ---------- Binary AEAD format (daily_journals.journal_ciphertext) ----------
+#
+#   v1:  [0x01][nonce 12][AES-256-GCM ciphertext + 16 byte tag]     AAD = version byte
+#   v2:  [0x02][key id 4][nonce 12][ciphertext + tag]               AAD = version + key id
+#
+# v1 (no key id) was written before multi-key support; decrypt tries every key.
+# 33 bytes overhead per journal (v2) vs Fernet's base64 (~1.33x + ~75 bytes).
+FORMAT_AESGCM_V1 = 0x01
+FORMAT_AESGCM_V2 = 0x02
+_NONCE_SIZE = 12
 
+CURRENT_HEADER = bytes([FORMAT_AESGCM_V2]) + CURRENT_KEY.key_id
 
-def encrypt_text(plain: Optional[str]) -> Optional[str]:
+Ciphertext = Union[bytes, bytearray, memoryview]
+
+
+@timed("encrypt_text")
+def encrypt_text(plain: Optional[str]) -> Optional[bytes]:
+    """Plaintext -> versioned binary ciphertext with the newest key (store in journal_ciphertext)."""
     if plain is None or plain == "":
         return None
-    return fernet.encrypt(plain.encode("utf-8")).decode("utf-8")
+    nonce = os.urandom(_NONCE_SIZE)
+    return (
+        CURRENT_HEADER
+        + nonce
+        + CURRENT_KEY.aead.encrypt(nonce, plain.encode("utf-8"), CURRENT_HEADER)
+    )
+
+
+def _decrypt_binary(blob: bytes) -> str:
+    version = blob[0]
+    if version == FORMAT_AESGCM_V2:
+        header_size = 1 + KEY_ID_SIZE
+        key = _KEYS_BY_ID.get(blob[1:header_size])
+        if key is None:
+            raise ValueError("Journal ciphertext uses a key that is not configured")
+        nonce = blob[header_size:header_size + _NONCE_SIZE]
+        return key.aead.decrypt(
+            nonce, blob[header_size + _NONCE_SIZE:], blob[:header_size]
+        ).decode("utf-8")
 
+    if version == FORMAT_AESGCM_V1:
+        nonce = blob[1:1 + _NONCE_SIZE]
+        for key in KEYS:
+            try:
+                return key.aead.decrypt(nonce, blob[1 + _NONCE_SIZE:], blob[:1]).decode("utf-8")
+            except InvalidTag:
+                continue
+        raise InvalidTag()
 
-def decrypt_text(token: Optional[str]) -> Optional[str]:
+    raise ValueError(f"Unknown journal ciphertext version {version}")
+
+
+@timed("decrypt_text")
+def decrypt_text(token: Union[Ciphertext, str, None]) -> Optional[str]:
+    """
+    Binary ciphertext (bytes) ya legacy Fernet token (str) - dono padh leta hai.
+    Callers pass `journal_ciphertext or journal_text`.
+    """
     if token is None:
         return None
+    if isinstance(token, (bytes, bytearray, memoryview)):
+        blob = bytes(token)
+        if not blob:
+            return None
+        try:
+            return _decrypt_binary(blob)
+        except InvalidTag:
+            # Tampered / wrong key: plaintext fallback yahan possible nahi
+            raise ValueError("Journal ciphertext failed authentication")
     try:
         return fernet.decrypt(token.encode("utf-8")).decode("utf-8")
     except InvalidToken:
         # Agar purane data plaintext hai (dev), to as-is return kar do
-        return token
\ No newline at end of file
+        return token
+
+
+def needs_reencryption(token: Union[Ciphertext, str, None]) -> bool:
+    """True for legacy Fernet text, v1 blobs and blobs under a retired key."""
+    if not token:
+        return False
+    if isinstance(token, str):
+        return True
+    return bytes(token[:len(CURRENT_HEADER)]) != CURRENT_HEADER
@@ -0,0 +1,96 @@
+# app/core/student_identity.py
+"""
+email -> (student_profile id, class_id) cache for the student endpoints, so a
+request with a known token skips the users+student_profiles lookup.
+
+Only hits are cached (naya student turant dikh jata hai). Entries are dropped
+when the User's email/role changes or the profile's user/class changes or is
+deleted (mapper events below, registered from app/models.py). Invalidation is
+per process, so STUDENT_IDENTITY_CACHE_TTL bounds staleness across workers and
+for bulk UPDATEs that skip mapper events.
+"""
+from typing import NamedTuple, Optional
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.core.cache import LRUCache
+from app.core.config import settings
+
+
+class StudentIdentity(NamedTuple):
+    profile_id: int
+    class_id: Optional[int]
+
+
+_identities = LRUCache(
+    maxsize=settings.STUDENT_IDENTITY_CACHE_SIZE,
+    ttl=settings.STUDENT_IDENTITY_CACHE_TTL,
+)
+
+
+async def resolve_student(db: AsyncSession, email: str) -> Optional[StudentIdentity]:
+    identity = _identities.get(email)
+    if identity is not None:
+        return identity
+
+    result = await db.execute(
+        select(models.StudentProfile.id, models.StudentProfile.class_id)
+        .join(models.User, models.User.id == models.StudentProfile.user_id)
+        .where(
+            models.User.email == email,
+            models.User.role == models.UserRole.STUDENT,
+        )
+        .limit(1)
+    )
+    row = result.first()
+    if row is None:
+        return None
+
+    identity = StudentIdentity(profile_id=row.id, class_id=row.class_id)
+    _identities.set(email, identity)
+    return identity
+
+
+def invalidate_email(email: Optional[str]) -> None:
+    if email:
+        _identities.pop(email)
+
+
+def invalidate_profile(profile_id: Optional[int]) -> None:
+    if profile_id is not None:
+        _identities.discard_where(lambda _email, ident: ident.profile_id == profile_id)
+
+
+def clear() -> None:
+    _identities.clear()
+
+
+# ---------- invalidation hooks ----------
+
+@event.listens_for(models.User, "after_update")
+def _user_updated(mapper, connection, target):
+    state = inspect(target)
+    email_hist = state.attrs.email.history
+    if email_hist.has_changes() or state.attrs.role.history.has_changes():
+        for email in list(email_hist.deleted or ()) + [target.email]:
+            invalidate_email(email)
+
+
+@event.listens_for(models.User, "after_delete")
+def _user_deleted(mapper, connection, target):
+    invalidate_email(target.email)
+
+
+@event.listens_for(models.StudentProfile, "after_update")
+def _profile_updated(mapper, connection, target):
+    state = inspect(target)
+    # risk_status / streak updates yahan irrelevant hain - sirf identity fields
+    if state.attrs.class_id.history.has_changes() or state.attrs.user_id.history.has_changes():
+        invalidate_profile(target.id)
+
+
+@event.listens_for(models.StudentProfile, "after_delete")
+def _profile_deleted(mapper, connection, target):
+    invalidate_profile(target.id)
@@ -0,0 +1,172 @@
+# app/core/timeseries.py
+"""
+Downsampled per-student time series for counselor sparklines.
+
+Ek school year ke raw journals bhejne ki jagah Postgres hi day / week / month
+buckets (school-local, date_trunc) mein aggregate karta hai and we return
+parallel arrays, one slot per bucket (empty bucket = null):
+
+    {"bucket": "week", "t": ["2026-09-07", ...], "mood_score": [3.4, null, ...], ...}
+
+Bounds: the range is capped at MAX_RANGE_DAYS and a response never has more
+than MAX_POINTS buckets ("auto" picks the finest bucket that fits in
+AUTO_POINTS), so payload size doesn't grow with the range. Both queries are
+(student_id, date) index range scans + GROUP BY.
+"""
+from datetime import date, datetime, time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import DateTime, case, cast, func, literal, literal_column, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.core.config import settings
+from app.core.instruments import INSTRUMENTS
+from app.core.mood_rollup import SCHOOL_TZ, school_today, window_start
+
+BUCKETS = ("day", "week", "month")
+BUCKET_DAYS = {"day": 1, "week": 7, "month": 28}  # worst case (most buckets) per range
+
+MAX_RANGE_DAYS = 3 * 366
+MAX_POINTS = 400
+AUTO_POINTS = 120
+
+# Sparkline ke liye 1 (low) .. 4 (good); unknown moods don't count towards the average
+MOOD_SCORES = {"HAPPY": 4, "FLAT": 2, "WORRIED": 2, "SAD": 1}
+
+
+class TimeseriesRangeError(ValueError):
+    pass
+
+
+def bucket_count(days: int, bucket: str) -> int:
+    """Upper bound on buckets for `days` days (a partial first/last bucket included)."""
+    return days // BUCKET_DAYS[bucket] + 2
+
+
+def pick_bucket(days: int, bucket: str = "auto") -> str:
+    if days < 1 or days > MAX_RANGE_DAYS:
+        raise TimeseriesRangeError(f"days must be between 1 and {MAX_RANGE_DAYS}")
+    if bucket == "auto":
+        return next((b for b in BUCKETS if bucket_count(days, b) <= AUTO_POINTS), "month")
+    if bucket not in BUCKETS:
+        raise TimeseriesRangeError(f"bucket must be one of auto, {', '.join(BUCKETS)}")
+    if bucket_count(days, bucket) > MAX_POINTS:
+        raise TimeseriesRangeError(f"{days} days by {bucket} is too many points; use a coarser bucket")
+    return bucket
+
+
+def _inline(value: str):
+    # Rendered into the SQL (not a bind param) so the SELECT and GROUP BY
+    # expressions are identical text - Postgres ko same expression dikhna chahiye
+    return literal(value, literal_execute=True)
+
+
+def school_bucket(column, bucket: str):
+    """timestamptz -> school-local wall clock -> day/week/month start (GROUP BY safe)."""
+    return func.date_trunc(_inline(bucket), func.timezone(_inline(settings.SCHOOL_TIMEZONE), column))
+
+
+def _round(value, digits: int = 2) -> Optional[float]:
+    return None if value is None else round(float(value), digits)
+
+
+async def student_timeseries(
+    db: AsyncSession,
+    student_id: int,
+    days: int,
+    bucket: str = "auto",
+) -> Dict[str, Any]:
+    """
+    Mood score (avg), sleep hours (avg), keyword-flag rate (share of check-ins
+    with any has_*_terms flag), check-in count and the highest score per
+    assessment type, per bucket over the last `days` school-local days.
+    """
+    bucket = pick_bucket(days, bucket)
+    first_day: date = window_start(days)
+    last_day: date = school_today()
+    cutoff = datetime.combine(first_day, time.min, tzinfo=SCHOOL_TZ)
+
+    J = models.DailyJournal
+    flagged = or_(
+        J.has_anxiety_terms,
+        J.has_low_mood_terms,
+        J.has_self_worth_terms,
+        J.has_severe_suicidal_terms,
+    )
+    journal_bucket = school_bucket(J.date, bucket)
+    journals = (
+        select(
+            journal_bucket.label("bucket"),
+            func.count().label("checkins"),
+            func.avg(case(MOOD_SCORES, value=J.mood)).label("mood_score"),
+            func.avg(J.sleep_hours).label("sleep_hours"),
+            func.avg(case((flagged, 1.0), else_=0.0)).label("flag_rate"),
+        )
+        .where(J.student_id == student_id, J.date >= cutoff)
+        .group_by(journal_bucket)
+        .subquery()
+    )
+
+    # Dense bucket list in SQL: har bucket ka slot, check-in ho ya na ho
+    series = (
+        func.generate_series(
+            func.date_trunc(_inline(bucket), cast(literal(first_day), DateTime)),
+            cast(literal(last_day), DateTime),
+            literal_column(f"interval '1 {bucket}'"),  # bucket is from BUCKETS
+        )
+        .table_valued("bucket")
+        .render_derived(name="series")  # AS series(bucket)
+    )
+    result = await db.execute(
+        select(
+            series.c.bucket,
+            journals.c.checkins,
+            journals.c.mood_score,
+            journals.c.sleep_hours,
+            journals.c.flag_rate,
+        )
+        .select_from(series)
+        .outerjoin(journals, journals.c.bucket == series.c.bucket)
+        .order_by(series.c.bucket)
+    )
+    rows = result.all()
+
+    A = models.Assessment
+    assessment_bucket = school_bucket(A.created_at, bucket)
+    result = await db.execute(
+        select(
+            assessment_bucket.label("bucket"),
+            *[
+                func.max(A.total_score).filter(A.type == code).label(code)
+                for code in INSTRUMENTS
+            ],
+        )
+        .where(A.student_id == student_id, A.created_at >= cutoff)
+        .group_by(assessment_bucket)
+    )
+    assessments = {r.bucket: r for r in result.all()}
+
+    t: List[str] = []
+    out: Dict[str, List[Any]] = {"checkins": [], "mood_score": [], "sleep_hours": [], "flag_rate": []}
+    scores: Dict[str, List[Optional[int]]] = {code: [] for code in INSTRUMENTS}
+    for r in rows:
+        t.append(r.bucket.date().isoformat())
+        out["checkins"].append(r.checkins or 0)
+        out["mood_score"].append(_round(r.mood_score))
+        out["sleep_hours"].append(_round(r.sleep_hours, 1))
+        out["flag_rate"].append(_round(r.flag_rate, 3))
+        a = assessments.get(r.bucket)
+        for code in INSTRUMENTS:
+            scores[code].append(getattr(a, code) if a is not None else None)
+
+    return {
+        "student_id": student_id,
+        "bucket": bucket,
+        "from": first_day.isoformat(),
+        "to": last_day.isoformat(),
+        "timezone": settings.SCHOOL_TIMEZONE,
+        "t": t,
+        **out,
+        "assessments": scores,  # max total_score per bucket (worst case), per type
+    }
@@ -0,0 +1,78 @@
+# app/jobs/backfill_mood_rollups.py
+"""
+Rebuild daily_mood_rollups from daily_journals.
+
+    cd backend
+    python -m app.jobs.backfill_mood_rollups                  # last 365 days
+    python -m app.jobs.backfill_mood_rollups --days 30 --chunk-days 7
+
+Works newest-first in day ranges. Each range is one transaction: lock the
+rollup table against concurrent check-ins (SHARE ROW EXCLUSIVE - reads still
+go through), delete the range, re-insert it from daily_journals grouped by
+school-local day. Safe to re-run; a crash loses at most the range in flight.
+Class is the student's current class (history of class moves is not stored).
+"""
+import argparse
+from datetime import timedelta
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.mood_rollup import UNASSIGNED, school_today
+from app.db.base import SessionLocal
+from app.jobs.batching import ThroughputReporter
+
+JOB_NAME = "mood_rollup_backfill"
+
+_REBUILD_SQL = text("""
+    INSERT INTO daily_mood_rollups (student_id, day, mood, class_id, count)
+    SELECT j.student_id,
+           (j.date AT TIME ZONE :tz)::date AS day,
+           j.mood,
+           COALESCE(sp.class_id, :unassigned),
+           count(*)
+    FROM daily_journals j
+    JOIN student_profiles sp ON sp.id = j.student_id
+    WHERE j.date >= (CAST(:start AS date)::timestamp AT TIME ZONE :tz)
+      AND j.date <  (CAST(:stop AS date)::timestamp AT TIME ZONE :tz)
+      AND j.mood IS NOT NULL
+    GROUP BY 1, 2, 3, 4
+""")
+
+
+def run(days: int, chunk_days: int) -> None:
+    db = SessionLocal()
+    reporter = ThroughputReporter(JOB_NAME)
+    try:
+        stop = school_today() + timedelta(days=1)
+        first = stop - timedelta(days=days)
+        while stop > first:
+            start = max(first, stop - timedelta(days=chunk_days))
+            db.execute(text("LOCK TABLE daily_mood_rollups IN SHARE ROW EXCLUSIVE MODE"))
+            db.execute(
+                text("DELETE FROM daily_mood_rollups WHERE day >= :start AND day < :stop"),
+                {"start": start, "stop": stop},
+            )
+            result = db.execute(
+                _REBUILD_SQL,
+                {"tz": settings.SCHOOL_TIMEZONE, "unassigned": UNASSIGNED, "start": start, "stop": stop},
+            )
+            db.commit()
+            print(f"[{JOB_NAME}] {start} .. {stop - timedelta(days=1)}: {result.rowcount} rollup rows")
+            reporter.add(result.rowcount)
+            stop = start
+        reporter.finish()
+    finally:
+        db.close()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Backfill daily mood rollups")
+    parser.add_argument("--days", type=int, default=365, help="how many school days back")
+    parser.add_argument("--chunk-days", type=int, default=30, help="days per transaction")
+    args = parser.parse_args(argv)
+    run(args.days, args.chunk_days)
+
+
+if __name__ == "__main__":
+    main()
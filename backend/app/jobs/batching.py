@@ -0,0 +1,153 @@
+# app/jobs/batching.py
+
+import time
+from typing import Iterable, Iterator, List, Sequence
+
+from sqlalchemy.orm import Session
+
+from app import models
+
+
+def iter_keyset_batches(
+    db: Session,
+    columns: Sequence,
+    id_column,
+    batch_size: int,
+    after_id: int = 0,
+    filters: Sequence = (),
+) -> Iterator[List]:
+    """
+    Streams rows ordered by primary key in chunks of `batch_size`.
+    Every chunk is `WHERE id > last_seen ORDER BY id LIMIT n`, so chunk 10,000
+    costs the same as chunk 1 (no OFFSET, no long-lived cursor).
+    """
+    while True:
+        rows = (
+            db.query(*columns)
+            .filter(id_column > after_id, *filters)
+            .order_by(id_column)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            return
+        yield rows
+        after_id = rows[-1][0]
+
+
+def load_checkpoint(db: Session, name: str) -> models.JobCheckpoint:
+    checkpoint = db.get(models.JobCheckpoint, name)
+    if not checkpoint:
+        checkpoint = models.JobCheckpoint(name=name, last_id=0, rows_done=0)
+        db.add(checkpoint)
+        db.commit()
+    return checkpoint
+
+
+def reset_checkpoint(db: Session, name: str) -> None:
+    checkpoint = load_checkpoint(db, name)
+    checkpoint.last_id = 0
+    checkpoint.rows_done = 0
+    db.commit()
+
+
+def advance_checkpoint(checkpoint: models.JobCheckpoint, last_id: int, rows: int) -> None:
+    """
+    Sirf in-memory update; caller same transaction mein batch ke saath commit kare
+    taaki checkpoint kabhi data se aage na nikle.
+    """
+    checkpoint.last_id = last_id
+    checkpoint.rows_done = (checkpoint.rows_done or 0) + rows
+
+
+class ThroughputReporter:
+    """
+    Prints rows done + rows/sec at most once every `every` seconds.
+    Rows a job had to skip go through fail(); finish() lists their ids.
+    """
+
+    SHOW_FAILED = 50  # finish() prints at most this many ids
+
+    def __init__(self, label: str, every: float = 5.0, total: int | None = None):
+        self.label = label
+        self.every = every
+        self.total = total
+        self.rows = 0
+        self.failed: List[int] = []
+        self.started = time.perf_counter()
+        self._last_print = self.started
+
+    def add(self, rows: int) -> None:
+        self.rows += rows
+        now = time.perf_counter()
+        if now - self._last_print >= self.every:
+            self._last_print = now
+            self._print()
+
+    def fail(self, ids: Iterable[int]) -> None:
+        self.failed.extend(ids)
+
+    def rate(self) -> float:
+        elapsed = time.perf_counter() - self.started
+        return self.rows / elapsed if elapsed > 0 else 0.0
+
+    def _print(self) -> None:
+        progress = f"{self.rows}"
+        if self.total:
+            progress += f"/{self.total} ({self.rows / self.total * 100:.1f}%)"
+        failed = f", {len(self.failed)} failed" if self.failed else ""
+        print(f"[{self.label}] {progress} rows, {self.rate():.0f} rows/sec{failed}")
+
+    def finish(self) -> None:
+        elapsed = time.perf_counter() - self.started
+        print(
+            f"[{self.label}] done: {self.rows} rows in {elapsed:.1f}s "
+            f"({self.rate():.0f} rows/sec)"
+        )
+        if self.failed:
+            shown = ", ".join(str(i) for i in self.failed[:self.SHOW_FAILED])
+            more = f" (+{len(self.failed) - self.SHOW_FAILED} more)" if len(self.failed) > self.SHOW_FAILED else ""
+            print(f"[{self.label}] {len(self.failed)} rows skipped (left unchanged), ids: {shown}{more}")
+
+
+class Throttle:
+    """
+    Keeps a batch job from hurting API latency on the primary:
+    caps average rows/sec, and backs off (doubling pause, up to `max_pause`)
+    while batch writes take longer than `max_write_seconds`.
+    """
+
+    def __init__(
+        self,
+        rows_per_sec: float | None = None,
+        max_write_seconds: float | None = None,
+        max_pause: float = 30.0,
+    ):
+        self.rows_per_sec = rows_per_sec
+        self.max_write_seconds = max_write_seconds
+        self.max_pause = max_pause
+        self.pause = 0.0
+        self.rows = 0
+        self.started = time.perf_counter()
+
+    def after_batch(self, rows: int, write_seconds: float) -> float:
+        """Sleeps as needed after a committed batch; returns seconds slept."""
+        self.rows += rows
+        delay = 0.0
+
+        if self.rows_per_sec:
+            # rate cap se kitna aage chal rahe hain
+            ahead = self.rows / self.rows_per_sec - (time.perf_counter() - self.started)
+            delay = max(delay, ahead)
+
+        if self.max_write_seconds:
+            if write_seconds > self.max_write_seconds:
+                # Primary slow hai (ya hum hi usko slow kar rahe hain): back off
+                self.pause = min(self.max_pause, max(self.pause * 2, write_seconds))
+            else:
+                self.pause = self.pause / 2 if self.pause > 0.05 else 0.0
+            delay = max(delay, self.pause)
+
+        if delay > 0:
+            time.sleep(delay)
+        return max(delay, 0.0)
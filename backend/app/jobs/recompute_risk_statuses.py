@@ -0,0 +1,200 @@
+# app/jobs/recompute_risk_statuses.py
+"""
+Nightly risk recompute for every student, so a bad week that has aged out of
+the 7-day window brings ORANGE/RED back down without waiting for a check-in.
+
+    cd backend
+    python -m app.jobs.recompute_risk_statuses             # apply
+    python -m app.jobs.recompute_risk_statuses --dry-run   # only report transitions
+
+    # cron, just after midnight school time:
+    # 5 0 * * *  cd /srv/nefera/backend && python -m app.jobs.recompute_risk_statuses
+
+Set-based, one transaction, no per-student Python loop:
+  1. windowed counts over daily_journals (ix_daily_journals_date) LEFT JOINed
+     to student_profiles -> snapshot (temp table) of students whose status changes
+  2. UPDATE student_profiles FROM that table, only where risk_status is still
+     the snapshot's old_status; RETURNING rows -> risk_applied
+  3. risk_zone_counters deltas in one upsert (Core UPDATE skips the mapper hooks)
+  4. pg_notify for escalations when ALERTS_BACKEND=postgres
+Steps 3-4 use risk_applied only, so a check-in / assessment that changed a
+student after the snapshot (e.g. escalated to CRISIS) wins and is not
+overwritten; that student is picked up again next night. CRISIS is never
+downgraded, same as the risk engine. Rules mirror
+scoring.risk_status_from_counts - change both together.
+
+Dashboards: this runs outside the app process, so cached dashboards
+(app/core/dashboard_cache.py) catch up within DASHBOARD_CACHE_TTL seconds.
+"""
+import argparse
+import time
+from datetime import datetime
+from typing import List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.alerts import ALERT_CHANNEL
+from app.core.config import settings
+from app.core.risk_counters import UNASSIGNED
+from app.core.risk_window import SAD_FLAT_MOODS, WORRIED_MOODS, today, window_cutoff as risk_window_cutoff
+from app.db.base import SessionLocal
+
+JOB_NAME = "risk_recompute"
+
+_CHANGES_SQL = text("""
+    CREATE TEMP TABLE risk_changes ON COMMIT DROP AS
+    WITH counts AS (
+        SELECT student_id,
+               count(*) FILTER (WHERE mood = ANY(:worried_moods))  AS worried,
+               count(*) FILTER (WHERE mood = ANY(:sad_flat_moods)) AS sad_flat,
+               bool_or(has_severe_suicidal_terms)                  AS severe
+        FROM daily_journals
+        WHERE date >= :cutoff
+        GROUP BY student_id
+    ),
+    computed AS (
+        SELECT sp.id AS student_id,
+               sp.class_id,
+               sp.risk_status AS old_status,
+               CASE
+                   WHEN coalesce(c.severe, false)           THEN 'CRISIS'
+                   WHEN coalesce(c.sad_flat, 0) >= 5        THEN 'RED'
+                   WHEN coalesce(c.worried, 0) >= 3
+                     OR coalesce(c.sad_flat, 0) >= 3        THEN 'ORANGE'
+                   ELSE 'GREEN'
+               END AS new_status
+        FROM student_profiles sp
+        LEFT JOIN counts c ON c.student_id = sp.id
+        WHERE sp.risk_status IS DISTINCT FROM 'CRISIS'
+    )
+    SELECT * FROM computed WHERE new_status IS DISTINCT FROM old_status
+""")
+
+_APPLIED_SQL = text("""
+    CREATE TEMP TABLE risk_applied (
+        student_id integer,
+        class_id   integer,
+        old_status varchar,
+        new_status varchar
+    ) ON COMMIT DROP
+""")
+
+# Guarded: a row changed since the snapshot (not old_status any more) is skipped.
+# The UPDATE's row locks keep concurrent ORM writers (and their counter hooks) behind us.
+_UPDATE_SQL = text("""
+    WITH updated AS (
+        UPDATE student_profiles sp
+        SET risk_status = rc.new_status
+        FROM risk_changes rc
+        WHERE sp.id = rc.student_id
+          AND sp.risk_status IS NOT DISTINCT FROM rc.old_status
+        RETURNING sp.id, sp.class_id, rc.old_status, rc.new_status
+    )
+    INSERT INTO risk_applied (student_id, class_id, old_status, new_status)
+    SELECT * FROM updated
+""")
+
+# Same rows _apply_delta would touch: school via class, 0 = unassigned
+_COUNTERS_SQL = text("""
+    INSERT INTO risk_zone_counters (school_id, class_id, risk_status, count)
+    SELECT coalesce(cl.school_id, :unassigned), coalesce(d.class_id, :unassigned), d.risk_status, sum(d.delta)
+    FROM (
+        SELECT class_id, old_status AS risk_status, -1 AS delta
+        FROM risk_applied WHERE old_status IS NOT NULL
+        UNION ALL
+        SELECT class_id, new_status, 1 FROM risk_applied
+    ) d
+    LEFT JOIN classes cl ON cl.id = d.class_id
+    GROUP BY 1, 2, 3
+    HAVING sum(d.delta) <> 0
+    ON CONFLICT (school_id, class_id, risk_status)
+    DO UPDATE SET count = risk_zone_counters.count + EXCLUDED.count
+""")
+
+_ESCALATION = """
+    array_position(ARRAY['GREEN','ORANGE','RED','CRISIS'], new_status)
+      > coalesce(array_position(ARRAY['GREEN','ORANGE','RED','CRISIS'], old_status), 1)
+"""
+
+# Same payload as app/core/alerts.py's risk_escalation
+_NOTIFY_SQL = text(f"""
+    SELECT count(pg_notify(:channel, json_build_object(
+        'type', 'risk_escalation',
+        'student_id', student_id,
+        'class_id', class_id,
+        'from', old_status,
+        'to', new_status,
+        'at', now()
+    )::text))
+    FROM risk_applied
+    WHERE {_ESCALATION}
+""")
+
+_SUMMARY = """
+    SELECT coalesce(old_status, '-'), new_status, count(*)
+    FROM {table}
+    GROUP BY 1, 2
+    ORDER BY 3 DESC
+"""
+_PLANNED_SQL = text(_SUMMARY.format(table="risk_changes"))
+_APPLIED_SUMMARY_SQL = text(_SUMMARY.format(table="risk_applied"))
+
+
+def window_cutoff() -> datetime:
+    """Same window as risk_window.rebuild_risk_window: today + 6 days before, school-local."""
+    return risk_window_cutoff(today())
+
+
+def recompute_all(db: Session, dry_run: bool = False) -> List[Tuple[str, str, int]]:
+    """
+    Runs the statements above in `db`'s transaction and commits (or rolls back).
+    Returns the transitions applied (dry run: the ones that would be).
+    """
+    db.execute(_CHANGES_SQL, {
+        "cutoff": window_cutoff(),
+        "worried_moods": list(WORRIED_MOODS),
+        "sad_flat_moods": list(SAD_FLAT_MOODS),
+    })
+    if dry_run:
+        summary = [tuple(r) for r in db.execute(_PLANNED_SQL).all()]
+        db.rollback()
+        return summary
+
+    db.execute(_APPLIED_SQL)
+    db.execute(_UPDATE_SQL)
+    summary = [tuple(r) for r in db.execute(_APPLIED_SUMMARY_SQL).all()]
+    db.execute(_COUNTERS_SQL, {"unassigned": UNASSIGNED})
+    if settings.ALERTS_BACKEND == "postgres":
+        db.execute(_NOTIFY_SQL, {"channel": ALERT_CHANNEL})
+    db.commit()
+    return summary
+
+
+def run(dry_run: bool = False) -> int:
+    db = SessionLocal()
+    started = time.perf_counter()
+    try:
+        summary = recompute_all(db, dry_run=dry_run)
+    finally:
+        db.close()
+
+    elapsed = time.perf_counter() - started
+    changed = sum(n for _, _, n in summary)
+    print(f"[{JOB_NAME}] window from {window_cutoff().date()}: {changed} students changed in {elapsed:.2f}s")
+    for old, new, n in summary:
+        print(f"  {old:>7} -> {new:<7} {n}")
+    if dry_run:
+        print("(dry run, nothing changed)")
+    return changed
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Recompute risk status for all students")
+    parser.add_argument("--dry-run", action="store_true", help="report transitions, don't write")
+    args = parser.parse_args(argv)
+    run(dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+# app/jobs/reconcile_risk_counters.py
+"""
+Rebuild risk_zone_counters from student_profiles and report any drift.
+
+    cd backend
+    python -m app.jobs.reconcile_risk_counters            # rebuild
+    python -m app.jobs.reconcile_risk_counters --dry-run  # only report
+"""
+import argparse
+import sys
+
+from app.core.risk_counters import rebuild_risk_counters
+from app.db.base import SessionLocal
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Reconcile risk zone counters")
+    parser.add_argument("--dry-run", action="store_true", help="report drift, don't rewrite")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        drift = rebuild_risk_counters(db, dry_run=args.dry_run)
+    finally:
+        db.close()
+
+    if not drift:
+        print("✅ Risk zone counters match student_profiles")
+        return 0
+
+    print(f"⚠️ {len(drift)} counter rows drifted:")
+    for d in drift:
+        print(
+            f"  school={d['school_id']} class={d['class_id']} {d['risk_status']}: "
+            f"stored={d['stored']} actual={d['actual']}"
+        )
+    print("(dry run, nothing changed)" if args.dry_run else "Counters rebuilt.")
+    return 1 if args.dry_run else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
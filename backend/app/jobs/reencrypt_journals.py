@@ -0,0 +1,176 @@
+# app/jobs/reencrypt_journals.py
+"""
+Re-encrypt stored journals with the current key (after a key rotation, see
+app/core/security/encryption.py) and move legacy Fernet journal_text rows to
+the binary journal_ciphertext format.
+
+    cd backend
+    python -m app.jobs.reencrypt_journals                       # resume from checkpoint
+    python -m app.jobs.reencrypt_journals --restart             # start from id 0 again
+    python -m app.jobs.reencrypt_journals --rows-per-sec 2000 --max-write-ms 200
+
+Only rows not already under the current key are streamed (keyset order by id),
+decrypted + re-encrypted in a process pool and bulk-updated by primary key.
+The checkpoint commits with each batch, so Ctrl+C loses at most one batch.
+Writes are throttled (Throttle) so the primary keeps serving check-ins.
+A row that can't be decrypted (failed auth / key retired too early) is left
+unchanged and listed at the end; the job carries on past it.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Sequence, Tuple
+
+from sqlalchemy import LargeBinary, func, or_
+
+from app import models
+from app.core.security.encryption import (
+    CURRENT_HEADER,
+    decrypt_text,
+    encrypt_text,
+    needs_reencryption,
+)
+from app.db.base import SessionLocal
+from app.jobs.batching import (
+    Throttle,
+    ThroughputReporter,
+    advance_checkpoint,
+    iter_keyset_batches,
+    load_checkpoint,
+    reset_checkpoint,
+)
+
+JOB_NAME = "journal_reencrypt"
+
+# (id, journal_text, journal_ciphertext)
+Row = Tuple
+
+
+def reencrypt_rows(rows: Sequence[Row]) -> Tuple[List[Dict], List[int]]:
+    """
+    Worker side: decrypt with whichever key/format the row has, encrypt with
+    the current key. Returns (update mappings, ids that failed to decrypt).
+    Top-level function so ProcessPoolExecutor can pickle it.
+    """
+    changed, failed = [], []
+    for journal_id, token, blob in rows:
+        stored = blob or token
+        if not needs_reencryption(stored):
+            continue
+        try:
+            plain = decrypt_text(stored)
+        except ValueError:
+            failed.append(journal_id)  # ek kharab row poora job na roke
+            continue
+        changed.append({
+            "id": journal_id,
+            "journal_ciphertext": encrypt_text(plain),
+            "journal_text": None,
+        })
+    return changed, failed
+
+
+def _split(rows: List[Row], parts: int) -> List[List[Row]]:
+    size = max(1, -(-len(rows) // parts))
+    return [rows[i:i + size] for i in range(0, len(rows), size)]
+
+
+def _stale_filter():
+    # Legacy text token, ya binary blob jiska header current key ka nahi
+    J = models.DailyJournal
+    return or_(
+        J.journal_text.isnot(None),
+        func.substring(J.journal_ciphertext, 1, len(CURRENT_HEADER), type_=LargeBinary)
+        != CURRENT_HEADER,
+    )
+
+
+def run(
+    batch_size: int,
+    workers: int,
+    restart: bool = False,
+    rows_per_sec: float | None = None,
+    max_write_ms: float | None = None,
+) -> None:
+    db = SessionLocal()
+    try:
+        if restart:
+            reset_checkpoint(db, JOB_NAME)
+        checkpoint = load_checkpoint(db, JOB_NAME)
+
+        total = (
+            db.query(models.DailyJournal.id)
+            .filter(models.DailyJournal.id > checkpoint.last_id, _stale_filter())
+            .count()
+        )
+        print(f"Resuming {JOB_NAME} after id {checkpoint.last_id}, {total} rows to re-encrypt")
+        reporter = ThroughputReporter(JOB_NAME, total=total)
+        throttle = Throttle(
+            rows_per_sec=rows_per_sec,
+            max_write_seconds=max_write_ms / 1000 if max_write_ms else None,
+        )
+
+        columns = [
+            models.DailyJournal.id,
+            models.DailyJournal.journal_text,
+            models.DailyJournal.journal_ciphertext,
+        ]
+        batches = iter_keyset_batches(
+            db, columns, models.DailyJournal.id, batch_size,
+            after_id=checkpoint.last_id, filters=[_stale_filter()],
+        )
+
+        updated = 0
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            batch = next(batches, None)
+            while batch is not None:
+                rows = [(r[0], r[1], bytes(r[2]) if r[2] is not None else None) for r in batch]
+                futures = [pool.submit(reencrypt_rows, part) for part in _split(rows, workers)]
+
+                # Workers encrypt this batch while we fetch the next one
+                next_batch = next(batches, None)
+
+                results = [f.result() for f in futures]
+                changed = [m for part_changed, _ in results for m in part_changed]
+                reporter.fail(i for _, part_failed in results for i in part_failed)
+                write_started = time.perf_counter()
+                if changed:
+                    db.bulk_update_mappings(models.DailyJournal, changed)
+                advance_checkpoint(checkpoint, rows[-1][0], len(rows))
+                db.commit()
+
+                updated += len(changed)
+                reporter.add(len(rows))
+                throttle.after_batch(len(rows), time.perf_counter() - write_started)
+                batch = next_batch
+
+        reporter.finish()
+        print(f"[{JOB_NAME}] {updated} journals re-encrypted with the current key")
+    finally:
+        db.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-encrypt journals with the current key")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--restart", action="store_true", help="ignore saved checkpoint")
+    parser.add_argument("--rows-per-sec", type=float, default=None, help="average rate cap")
+    parser.add_argument(
+        "--max-write-ms", type=float, default=250.0,
+        help="back off while a batch UPDATE+commit takes longer than this (0 = off)",
+    )
+    args = parser.parse_args(argv)
+
+    run(
+        batch_size=args.batch_size,
+        workers=args.workers,
+        restart=args.restart,
+        rows_per_sec=args.rows_per_sec,
+        max_write_ms=args.max_write_ms or None,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+# app/jobs/rescan_journals.py
+"""
+Re-analyse stored journals after the keyword lists in app/core/scoring.py change.
+
+    cd backend
+    python -m app.jobs.rescan_journals                 # resume an interrupted run, else full scan
+    python -m app.jobs.rescan_journals --restart       # start from id 0 again
+    python -m app.jobs.rescan_journals --workers 8 --batch-size 5000
+
+Rows are streamed in id order, decrypted + analysed in a process pool, and
+only rows whose has_*_terms flags actually changed are written back (bulk
+UPDATE by primary key). The checkpoint is committed in the same transaction
+as each batch, so Ctrl+C at any point loses at most the batch in flight.
+A finished run resets the checkpoint, so the next run (next lexicon change)
+scans everything again. A row that can't be decrypted is left unchanged and
+listed at the end.
+
+Severe flag changes act in the batch's transaction: the student's risk window
+is dropped (rebuilt on next use), and a journal newly flagged severe inside
+the 7-day risk window records a JOURNAL_SEVERE SafetyEvent and escalates the
+student to CRISIS, same as a severe check-in. The job runs outside the app,
+so cached dashboards catch up within DASHBOARD_CACHE_TTL.
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Sequence, Tuple
+
+from app import models
+from app.core.risk_window import today, window_cutoff
+from app.core.scoring import JOURNAL_FLAG_FIELDS, analyze_journal_text, create_safety_event
+from app.core.security.encryption import decrypt_text
+from app.db.base import SessionLocal
+from app.jobs.batching import (
+    ThroughputReporter,
+    advance_checkpoint,
+    iter_keyset_batches,
+    load_checkpoint,
+    reset_checkpoint,
+)
+
+JOB_NAME = "journal_rescan"
+
+# (id, journal_text, journal_ciphertext, *current flags)
+Row = Tuple
+
+
+def analyze_rows(rows: Sequence[Row]) -> Tuple[List[Dict], List[int]]:
+    """
+    Worker side: decrypt + analyse. Returns (update mappings for changed rows
+    only, ids that failed to decrypt). Top-level function so
+    ProcessPoolExecutor can pickle it.
+    """
+    changed, failed = [], []
+    for row in rows:
+        journal_id, token, blob, *old_flags = row
+        try:
+            plain = decrypt_text(blob or token)
+        except ValueError:
+            failed.append(journal_id)  # ek kharab row poora job na roke
+            continue
+        analysis = analyze_journal_text(plain)
+        new_flags = [analysis[f] for f in JOURNAL_FLAG_FIELDS]
+        if new_flags != list(old_flags):
+            mapping = {"id": journal_id}
+            mapping.update(zip(JOURNAL_FLAG_FIELDS, new_flags))
+            changed.append(mapping)
+    return changed, failed
+
+
+def _split(rows: List[Row], parts: int) -> List[List[Row]]:
+    size = max(1, -(-len(rows) // parts))
+    return [rows[i:i + size] for i in range(0, len(rows), size)]
+
+
+def _apply_severe_flips(db, rows: List[Row], changed: List[Dict]) -> int:
+    """
+    Severe flag badla to us student ka rolling risk window galat ho gaya: row
+    delete kar do, next check-in / risk update use journals se rebuild karega.
+    Newly severe journals in the risk window escalate right away. Returns the
+    number of students escalated to CRISIS.
+    """
+    severe_idx = 3 + JOURNAL_FLAG_FIELDS.index("has_severe_suicidal_terms")
+    old_severe = {r[0]: r[severe_idx] for r in rows}
+    flipped = [
+        m for m in changed
+        if m["has_severe_suicidal_terms"] != old_severe.get(m["id"])
+    ]
+    if not flipped:
+        return 0
+
+    J = models.DailyJournal
+    student_ids = (
+        db.query(J.student_id)
+        .filter(J.id.in_([m["id"] for m in flipped]))
+        .scalar_subquery()
+    )
+    (
+        db.query(models.StudentRiskWindow)
+        .filter(models.StudentRiskWindow.student_id.in_(student_ids))
+        .delete(synchronize_session=False)
+    )
+
+    newly_severe = [m["id"] for m in flipped if m["has_severe_suicidal_terms"]]
+    if not newly_severe:
+        return 0
+    journals = (
+        db.query(J.id, J.student_id)
+        .filter(J.id.in_(newly_severe), J.date >= window_cutoff(today()))
+        .all()
+    )
+    for journal_id, student_id in journals:
+        create_safety_event(
+            db=db,
+            student_id=student_id,
+            trigger_type="JOURNAL_SEVERE",
+            risk_band="CRISIS",
+            details={"journal_id": journal_id, "source": "journal_rescan"},
+        )
+
+    # ORM update (locked, id order) so the counter / alert hooks fire; CRISIS is the top, never a downgrade
+    students = (
+        db.query(models.StudentProfile)
+        .filter(models.StudentProfile.id.in_({student_id for _, student_id in journals}))
+        .order_by(models.StudentProfile.id)
+        .with_for_update()
+        .all()
+    )
+    escalated = 0
+    for student in students:
+        if student.risk_status != "CRISIS":
+            student.risk_status = "CRISIS"
+            escalated += 1
+    return escalated
+
+
+def run(batch_size: int, workers: int, restart: bool = False) -> None:
+    db = SessionLocal()
+    try:
+        if restart:
+            reset_checkpoint(db, JOB_NAME)
+        checkpoint = load_checkpoint(db, JOB_NAME)
+
+        total = (
+            db.query(models.DailyJournal.id)
+            .filter(models.DailyJournal.id > checkpoint.last_id)
+            .count()
+        )
+        print(f"Resuming {JOB_NAME} after id {checkpoint.last_id}, {total} rows left")
+        reporter = ThroughputReporter(JOB_NAME, total=total)
+
+        columns = [
+            models.DailyJournal.id,
+            models.DailyJournal.journal_text,
+            models.DailyJournal.journal_ciphertext,
+        ] + [
+            getattr(models.DailyJournal, f) for f in JOURNAL_FLAG_FIELDS
+        ]
+        batches = iter_keyset_batches(
+            db, columns, models.DailyJournal.id, batch_size, after_id=checkpoint.last_id
+        )
+
+        updated = escalated = 0
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            batch = next(batches, None)
+            while batch is not None:
+                rows = [tuple(r) for r in batch]
+                futures = [pool.submit(analyze_rows, part) for part in _split(rows, workers)]
+
+                # Workers analyse this batch while we fetch the next one
+                next_batch = next(batches, None)
+
+                results = [f.result() for f in futures]
+                changed = [m for part_changed, _ in results for m in part_changed]
+                reporter.fail(i for _, part_failed in results for i in part_failed)
+                if changed:
+                    db.bulk_update_mappings(models.DailyJournal, changed)
+                    escalated += _apply_severe_flips(db, rows, changed)
+                advance_checkpoint(checkpoint, rows[-1][0], len(rows))
+                db.commit()
+
+                updated += len(changed)
+                reporter.add(len(rows))
+                batch = next_batch
+
+        # Poora scan ho gaya: next run (after the next lexicon change) starts from id 0
+        reset_checkpoint(db, JOB_NAME)
+
+        reporter.finish()
+        print(f"[{JOB_NAME}] {updated} rows had their flags updated, {escalated} students escalated to CRISIS")
+    finally:
+        db.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-scan journal keyword flags")
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--restart", action="store_true", help="ignore saved checkpoint")
+    args = parser.parse_args(argv)
+
+    run(batch_size=args.batch_size, workers=args.workers, restart=args.restart)
+
+
+if __name__ == "__main__":
+    main()
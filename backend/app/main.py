@@ -1,16 +1,63 @@
 # app/main.py
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, Response
 
 from app.api.v1 import api_router  # 👈 yahi aggregate router use karenge
+from app.core import alerts, metrics
+from app.core.responses import FastJSONResponse
+from app.core.risk_queue import start_worker as start_risk_worker
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Multi-worker alerts: har worker apna LISTEN connection (ALERTS_BACKEND=postgres)
+    listener = alerts.start_listener()
+    risk_worker = start_risk_worker()
+    yield
+    risk_worker.cancel()
+    if listener:
+        listener.cancel()
+
 
 app = FastAPI(
     title="Wellness Platform API",
     version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,  # orjson; list endpoints: app/core/responses.py
 )
 
 # Sare routes yahi se aa jayenge
 app.include_router(api_router)           # ya prefix="/api/v1" agar versioned URL chahiye
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    stats = metrics.start_request_stats()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Route template ("/counselors/student/{student_id}"), raw path nahi
+        route = request.scope.get("route")
+        metrics.observe_request(
+            request.method,
+            route.path if route else "unmatched",
+            status,
+            time.perf_counter() - start,
+            stats,
+        )
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    body, content_type = metrics.render_latest()
+    return Response(content=body, media_type=content_type)
+
+
 @app.get("/")
-def root():
+async def root():
     return {"message": "Wellness Platform API running"}
\ No newline at end of file
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, JSON, Text, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Date, Boolean, JSON, Text, Enum, Index, LargeBinary, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import relationship, column_property
 from sqlalchemy.sql import func
 import enum
 from app.db.base import Base  
@@ -71,14 +72,18 @@ class Class(Base):
 
 class StudentProfile(Base):
     __tablename__ = "student_profiles"
+    __table_args__ = (
+        Index("ix_student_profiles_class_id_risk_status", "class_id", "risk_status"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
-    class_id = Column(Integer, ForeignKey("classes.id"))
+    # active_history: old value flush hooks ko chahiye (risk zone counters)
+    class_id = column_property(Column(Integer, ForeignKey("classes.id")), active_history=True)
 
     roll_number = Column(String, nullable=True)
     
     # Risk Engine ke liye
-    risk_status = Column(String, default="GREEN") # GREEN, ORANGE, RED, CRISIS
+    risk_status = column_property(Column(String, default="GREEN"), active_history=True) # GREEN, ORANGE, RED, CRISIS
     streak_count = Column(Integer, default=0)
     
     
@@ -93,17 +98,37 @@ class StudentProfile(Base):
         back_populates="children"
     )
     safety_events = relationship("SafetyEvent", back_populates="student")
+    risk_window = relationship("StudentRiskWindow", back_populates="student", uselist=False)
 
 class DailyJournal(Base):
     __tablename__ = "daily_journals"
+    # Indexes are built by migrations (CREATE INDEX CONCURRENTLY), see migrations/versions
+    __table_args__ = (
+        Index("ix_daily_journals_student_id_date", "student_id", "date"),
+        Index("ix_daily_journals_date", "date"),
+        # tag containment filters (@>) + index-only scans for top-stressor counts
+        Index(
+            "ix_daily_journals_trigger_tags",
+            "trigger_tags",
+            postgresql_using="gin",
+            postgresql_ops={"trigger_tags": "jsonb_path_ops"},
+        ),
+        Index(
+            "ix_daily_journals_date_tagged",
+            "date",
+            postgresql_include=["student_id", "trigger_tags"],
+            postgresql_where=text("trigger_tags IS NOT NULL"),
+        ),
+    )
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("student_profiles.id"))
     date = Column(DateTime(timezone=True), server_default=func.now())
     
     mood = Column(String)  # HAPPY, WORRIED, SAD, etc.
     sleep_hours = Column(Integer)
-    checkin_data = Column(JSON)  # {"triggers": "Exams", "intensity": 5}
-    journal_text = Column(Text, nullable=True)  # yahi column me encrypted text store karenge
+    checkin_data = Column(JSONB)  # {"triggers": "Exams", "intensity": 5}
+    journal_text = Column(Text, nullable=True)  # legacy: Fernet token (old rows only)
+    journal_ciphertext = Column(LargeBinary, nullable=True)  # new rows: versioned AES-GCM, see encryption.py
 
     # 🔍 Keyword-based risk flags (for risk engine + alerts)
     has_anxiety_terms = Column(Boolean, default=False, nullable=False)
@@ -111,12 +136,35 @@ class DailyJournal(Base):
     has_self_worth_terms = Column(Boolean, default=False, nullable=False)
     has_severe_suicidal_terms = Column(Boolean, default=False, nullable=False)
 
-    trigger_tags = Column(JSON, nullable=True)
+    # Array of tags or SQL NULL (never JSON null), see principal top-stressors
+    trigger_tags = Column(JSONB(none_as_null=True), nullable=True)
     
     student = relationship("StudentProfile", back_populates="entries")
 
+class StudentRiskWindow(Base):
+    """
+    Compact rolling state for the risk engine: one row per student with
+    per-day buckets for the last RISK_WINDOW_DAYS days (see app/core/risk_window.py),
+    so a check-in never has to re-read a week of journals.
+    """
+    __tablename__ = "student_risk_windows"
+
+    student_id = Column(Integer, ForeignKey("student_profiles.id"), primary_key=True)
+
+    # Day of buckets[0]; buckets[i] is anchor_day - i days
+    anchor_day = Column(Date, nullable=False)
+
+    # [[worried_count, sad_flat_count, severe(0/1)], ...] newest first
+    buckets = Column(JSON, nullable=False)
+
+    student = relationship("StudentProfile", back_populates="risk_window")
+
 class Assessment(Base):
     __tablename__ = "assessments"
+    __table_args__ = (
+        # id as tie-breaker for keyset pagination (created_at, id)
+        Index("ix_assessments_student_id_created_at_id", "student_id", "created_at", "id"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("student_profiles.id"))
     type = Column(String) # PHQ9, GAD7, CSSRS
@@ -149,6 +197,9 @@ class SafetyEvent(Base):
 
 class IncidentReport(Base):
     __tablename__ = "incident_reports"
+    __table_args__ = (
+        Index("ix_incident_reports_created_at_id", "created_at", "id"),
+    )
 
     id = Column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
 
@@ -166,9 +217,11 @@ class IncidentReport(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships (optional, but useful)
-    student = relationship("StudentProfile", backref="incident_reports", lazy="joined")
-    classroom = relationship("Class", backref="incident_reports", lazy="joined")
-    school = relationship("School", backref="incident_reports", lazy="joined")
+    # Not auto-joined any more: har endpoint khud decide kare kya load karna hai
+    # (column projection / selectinload). Accidental lazy load -> error, not N+1.
+    student = relationship("StudentProfile", backref="incident_reports", lazy="raise_on_sql")
+    classroom = relationship("Class", backref="incident_reports", lazy="raise_on_sql")
+    school = relationship("School", backref="incident_reports", lazy="raise_on_sql")
 
 class BroadcastMessage(Base):
     __tablename__ = "broadcast_messages"
@@ -176,13 +229,83 @@ class BroadcastMessage(Base):
     id = Column(Integer, primary_key=True, index=True)
     sender_role = Column(Enum(UserRole), nullable=False)
 
-    school_id = Column(Integer, ForeignKey("schools.id"), nullable=True)
-    class_id = Column(Integer, ForeignKey("classes.id"), nullable=True)
-    student_profile_id = Column(Integer, ForeignKey("student_profiles.id"), nullable=True)
+    # Inbox targeting: school-wide / class / single student
+    school_id = Column(Integer, ForeignKey("schools.id"), nullable=True, index=True)
+    class_id = Column(Integer, ForeignKey("classes.id"), nullable=True, index=True)
+    student_profile_id = Column(Integer, ForeignKey("student_profiles.id"), nullable=True, index=True)
 
     content = Column(Text, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     school = relationship("School", backref="broadcast_messages")
     classroom = relationship("Class", backref="broadcast_messages")
-    student = relationship("StudentProfile", backref="broadcast_messages")
\ No newline at end of file
+    student = relationship("StudentProfile", backref="broadcast_messages")
+
+
+class JobCheckpoint(Base):
+    """
+    Progress marker for long-running batch jobs (journal re-scan etc.)
+    so they can be stopped and resumed from the last committed id.
+    """
+    __tablename__ = "job_checkpoints"
+
+    name = Column(String, primary_key=True)
+    last_id = Column(Integer, nullable=False, default=0)
+    rows_done = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class RiskZoneCounter(Base):
+    """
+    Materialized COUNT(*) of student_profiles per (school, class, risk_status).
+    Kept in sync by the StudentProfile flush hooks in app/core/risk_counters.py;
+    rebuild with `python -m app.jobs.reconcile_risk_counters`.
+    school_id / class_id = 0 means "not assigned" (profile without class).
+    """
+    __tablename__ = "risk_zone_counters"
+
+    school_id = Column(Integer, primary_key=True)
+    class_id = Column(Integer, primary_key=True, index=True)
+    risk_status = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class DailyMoodRollup(Base):
+    """
+    Check-ins per (student, class at check-in time, school-local day, mood).
+    Incremented in the check-in transaction (app/core/mood_rollup.py);
+    backfill with `python -m app.jobs.backfill_mood_rollups`.
+    class_id = 0 means "not assigned", same as RiskZoneCounter.
+    """
+    __tablename__ = "daily_mood_rollups"
+    __table_args__ = (
+        Index("ix_daily_mood_rollups_class_id_day", "class_id", "day"),
+        Index("ix_daily_mood_rollups_day", "day"),
+    )
+
+    student_id = Column(Integer, ForeignKey("student_profiles.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    mood = Column(String, primary_key=True)
+    class_id = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class RiskRecomputeRequest(Base):
+    """
+    Pending risk recompute per student (RISK_QUEUE_BACKEND=db). Primary key =
+    dedupe: ten check-ins in a minute still leave one row. enqueued_at is the
+    first request, so lag is measured from the oldest unprocessed check-in.
+    """
+    __tablename__ = "risk_recompute_queue"
+    __table_args__ = (
+        Index("ix_risk_recompute_queue_enqueued_at", "enqueued_at"),
+    )
+
+    student_id = Column(Integer, ForeignKey("student_profiles.id"), primary_key=True)
+    enqueued_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
+# Registers StudentProfile insert/update/delete hooks (needs the classes above)
+from app.core import risk_counters  # noqa: E402,F401
+from app.core import student_identity  # noqa: E402,F401
+from app.core import alerts  # noqa: E402,F401
@@ -1,8 +1,18 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List, Any, Dict, Literal
+from typing import Optional, List, Any, Dict, Literal, Generic, TypeVar
 from datetime import datetime
 
 
+T = TypeVar("T")
+
+
+# --- Keyset pagination ---
+
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None   # pass back as ?cursor= for the next page
+
+
 # --- Incident Reporting Schemas ---
 
 class IncidentReportCreate(BaseModel):
@@ -78,4 +88,15 @@ class BroadcastOut(BaseModel):
     id: int
     sender_role: str
     content: str
-    created_at: datetime
\ No newline at end of file
+    created_at: datetime
+
+
+class RiskyStudentOut(BaseModel):
+    id: int
+    name: Optional[str] = None
+    risk_status: str
+    roll_number: Optional[str] = None
+    streak: Optional[int] = None
+    email: Optional[str] = None
+    class_id: Optional[int] = None
+    class_name: Optional[str] = None
\ No newline at end of file
@@ -0,0 +1,111 @@
+# backend/bench_bulk_import.py
+"""
+Benchmark: admin.bulk_import_students on generated CSVs (default 10k and
+100k rows) - wall time, rows/sec and SQL statements executed.
+
+    cd backend
+    alembic upgrade head
+    python bench_bulk_import.py                  # --sizes 10000 100000
+    python bench_bulk_import.py --sizes 5000 --existing 0.2
+
+Each size runs inside an outer transaction that is rolled back (the
+endpoint's per-chunk commits become savepoints), so nothing persists.
+Still - point DATABASE_URL at a dev/scratch database.
+"""
+import os, sys
+sys.path.append(os.getcwd())
+
+import argparse
+import asyncio
+import io
+import time
+
+from fastapi import UploadFile
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.v1 import admin
+from app.db.base import async_engine
+
+SCHOOL_ID = 910001
+CLASS_ID = 910001
+
+
+def make_csv(rows: int) -> bytes:
+    out = io.StringIO()
+    out.write("name, roll_no\n")
+    for i in range(1, rows + 1):
+        out.write(f"Student {i}, B{i}\n")
+    return out.getvalue().encode("utf-8")
+
+
+async def run_size(rows: int, existing: float) -> dict:
+    data = make_csv(rows)
+    statements = [0]
+
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements[0] += 1
+
+    async with async_engine.connect() as conn:
+        trans = await conn.begin()
+        try:
+            await conn.execute(text("INSERT INTO schools (id, name) VALUES (:id, 'Bench School')"), {"id": SCHOOL_ID})
+            await conn.execute(
+                text("INSERT INTO classes (id, name, school_id) VALUES (:id, 'Bench', :school)"),
+                {"id": CLASS_ID, "school": SCHOOL_ID},
+            )
+
+            async with AsyncSession(
+                bind=conn, join_transaction_mode="create_savepoint", expire_on_commit=False
+            ) as db:
+                # Some students already imported -> "Already Exists" path bhi measure ho
+                pre = int(rows * existing)
+                if pre:
+                    await admin.bulk_import_students(
+                        class_id=CLASS_ID,
+                        file=UploadFile(file=io.BytesIO(make_csv(pre)), filename="pre.csv"),
+                        db=db,
+                    )
+
+                event.listen(async_engine.sync_engine, "before_cursor_execute", _count)
+                try:
+                    started = time.perf_counter()
+                    response = await admin.bulk_import_students(
+                        class_id=CLASS_ID,
+                        file=UploadFile(file=io.BytesIO(data), filename="students.csv"),
+                        db=db,
+                    )
+                    elapsed = time.perf_counter() - started
+                finally:
+                    event.remove(async_engine.sync_engine, "before_cursor_execute", _count)
+        finally:
+            await trans.rollback()
+    await async_engine.dispose()
+
+    created = sum(1 for s in response.students if s.status == "Created")
+    return {
+        "rows": rows,
+        "created": created,
+        "seconds": elapsed,
+        "rate": rows / elapsed,
+        "statements": statements[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--existing", type=float, default=0.1, help="fraction already imported")
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'created':>8} {'seconds':>8} {'rows/s':>9} {'SQL stmts':>10}")
+    for size in args.sizes:
+        r = asyncio.run(run_size(size, args.existing))
+        print(
+            f"{r['rows']:>8} {r['created']:>8} {r['seconds']:>8.2f} "
+            f"{r['rate']:>9.0f} {r['statements']:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# backend/bench_journal_matcher.py
+"""
+Micro-benchmark: per check-in latency of journal keyword matching
+as the lexicon grows.
+
+    python bench_journal_matcher.py
+    python bench_journal_matcher.py --sizes 40 1000 5000 --texts 300
+
+Compares the old "phrase in text per phrase" scan with the compiled
+PhraseMatcher used by analyze_journal_text.
+"""
+import os, sys
+sys.path.append(os.getcwd())
+
+import argparse
+import random
+import string
+import time
+
+from app.core.phrase_matcher import PhraseMatcher
+
+CATEGORIES = ["severe", "self_worth", "low_mood", "anxiety"]
+
+WORDS = (
+    "i me my feel feeling sad happy tired scared school exam friends mom dad "
+    "sleep night morning today want don't dont can't cant always never very "
+    "nobody everyone better heart fast breathe panic hate like playing energy "
+    "fun bored hurt wake live die disappear good enough matter mess up"
+).split()
+
+
+def make_lexicon(size: int, rng: random.Random) -> dict:
+    lexicon = {c: [] for c in CATEGORIES}
+    for i in range(size):
+        n = rng.randint(2, 5)
+        phrase = " ".join(rng.choice(WORDS) for _ in range(n))
+        lexicon[CATEGORIES[i % len(CATEGORIES)]].append(phrase)
+    return lexicon
+
+
+def make_text(rng: random.Random, words: int = 120) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)) + "".join(
+        rng.choice(string.punctuation) for _ in range(3)
+    )
+
+
+def naive(lexicon: dict, text: str) -> dict:
+    text = text.lower()
+    return {c: [p for p in phrases if p in text] for c, phrases in lexicon.items()}
+
+
+def bench(fn, texts) -> float:
+    start = time.perf_counter()
+    for t in texts:
+        fn(t)
+    return (time.perf_counter() - start) / len(texts) * 1e6  # µs per check-in
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[40, 250, 1000, 2500, 5000])
+    parser.add_argument("--texts", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    texts = [make_text(rng) for _ in range(args.texts)]
+
+    print(f"{'phrases':>8} {'naive µs':>10} {'matcher µs':>11} {'build ms':>9}")
+    for size in args.sizes:
+        lexicon = make_lexicon(size, rng)
+
+        t0 = time.perf_counter()
+        matcher = PhraseMatcher(lexicon)
+        build_ms = (time.perf_counter() - t0) * 1000
+
+        # sanity: same output as the old scan
+        for t in texts[:20]:
+            assert matcher.find(t.lower()) == naive(lexicon, t)
+
+        naive_us = bench(lambda t: naive(lexicon, t), texts)
+        matcher_us = bench(lambda t: matcher.find(t.lower()), texts)
+        print(f"{size:>8} {naive_us:>10.1f} {matcher_us:>11.1f} {build_ms:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
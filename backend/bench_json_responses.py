@@ -0,0 +1,173 @@
+# backend/bench_json_responses.py
+"""
+Benchmark: response path for a large incident list (default 10k rows).
+
+    python bench_json_responses.py
+    python bench_json_responses.py --rows 10000 50000 --repeat 20
+
+Same rows (shaped like the reports query result), three ways, each through a
+real FastAPI app called over ASGI (no HTTP client, no DB):
+  - pydantic: old path - IncidentReportOut per row + schemas.Page, FastAPI
+    validates against response_model and serializes
+  - json_response: plain dicts from the columns, orjson, no validation
+  - stream: stream_json_array in 500-row chunks
+Reports median latency, body size and peak Python memory per request, and
+fails (exit 1) if the bodies don't decode to the same items.
+"""
+import os, sys
+sys.path.append(os.getcwd())
+
+import argparse
+import asyncio
+import statistics
+import time
+import tracemalloc
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+import orjson
+from fastapi import FastAPI
+
+from app import models, schemas
+from app.core.responses import FastJSONResponse, json_response, stream_json_array
+
+Row = namedtuple("Row", "id type description status created_at student_id class_name")
+
+CHUNK_ROWS = 500
+
+
+def make_rows(n: int):
+    types, statuses = list(models.IncidentType), list(models.IncidentStatus)
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [
+        Row(
+            id=str(uuid.UUID(int=i)),
+            type=types[i % len(types)],
+            description=f"Incident {i}: something happened near the library after class",
+            status=statuses[i % len(statuses)],
+            created_at=start + timedelta(minutes=i),
+            student_id=None if i % 3 == 0 else i,
+            class_name=f"Class {i % 40}",
+        )
+        for i in range(n)
+    ]
+
+
+def _item(r) -> dict:
+    return {
+        "id": r.id,
+        "incident_type": r.type.value,
+        "description": r.description,
+        "status": r.status.value,
+        "class_name": r.class_name,
+        "created_at": r.created_at,
+        "is_anonymous": r.student_id is None,
+    }
+
+
+def make_app(rows) -> FastAPI:
+    app = FastAPI(default_response_class=FastJSONResponse)
+
+    @app.get("/pydantic", response_model=schemas.Page[schemas.IncidentReportOut])
+    async def pydantic_path():
+        items = [
+            schemas.IncidentReportOut(
+                id=r.id,
+                incident_type=r.type.value,
+                description=r.description,
+                status=r.status.value,
+                class_name=r.class_name,
+                created_at=r.created_at,
+                is_anonymous=(r.student_id is None),
+            )
+            for r in rows
+        ]
+        return schemas.Page(items=items, next_cursor=None)
+
+    @app.get("/json_response", response_model=schemas.Page[schemas.IncidentReportOut])
+    async def json_response_path():
+        return json_response({"items": [_item(r) for r in rows], "next_cursor": None})
+
+    @app.get("/stream", response_model=list[schemas.IncidentReportOut])
+    async def stream_path():
+        async def chunks():
+            for i in range(0, len(rows), CHUNK_ROWS):
+                yield [_item(r) for r in rows[i:i + CHUNK_ROWS]]
+        return stream_json_array(chunks())
+
+    return app
+
+
+async def call(app: FastAPI, path: str, keep: bool = True) -> bytes:
+    scope = {
+        # spec_version 2.4: StreamingResponse skips its disconnect listener (no real client here)
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "headers": [], "client": ("bench", 0), "server": ("bench", 80),
+    }
+    body = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body" and keep:
+            body.append(message.get("body", b""))  # keep=False: client buffer na gine peak memory mein
+
+    await app(scope, receive, send)
+    return b"".join(body)
+
+
+async def run(rows_n: int, repeat: int) -> int:
+    rows = make_rows(rows_n)
+    app = make_app(rows)
+    paths = ["/pydantic", "/json_response", "/stream"]
+
+    bodies, results = {}, {}
+    for path in paths:
+        bodies[path] = await call(app, path)  # warm-up (route/model setup)
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            await call(app, path, keep=False)
+            times.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        await call(app, path, keep=False)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[path] = (statistics.median(times), len(bodies[path]), peak)
+
+    base = results["/pydantic"][0]
+    print(f"\n{rows_n} rows, median of {repeat}")
+    print(f"{'path':<16} {'ms':>9} {'speedup':>8} {'body KB':>9} {'peak MB':>8}")
+    for path in paths:
+        t, size, peak = results[path]
+        print(f"{path[1:]:<16} {t * 1000:>9.1f} {base / t:>7.1f}x {size / 1024:>9.0f} {peak / 2**20:>8.1f}")
+
+    expected = orjson.loads(bodies["/pydantic"])["items"]
+    mismatched = [
+        p for p, got in (
+            ("/json_response", orjson.loads(bodies["/json_response"])["items"]),
+            ("/stream", orjson.loads(bodies["/stream"])),
+        )
+        if got != expected
+    ]
+    for p in mismatched:
+        print(f"MISMATCH: {p} body differs from the pydantic path")
+    return len(mismatched)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    failures = sum(asyncio.run(run(n, args.repeat)) for n in args.rows)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
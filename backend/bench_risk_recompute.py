@@ -0,0 +1,83 @@
+# backend/bench_risk_recompute.py
+"""
+Benchmark: app.jobs.recompute_risk_statuses (set-based nightly recompute)
+on a seeded school - wall time and transitions, default 10k and 100k students
+with 7 days of check-ins each.
+
+    cd backend
+    alembic upgrade head
+    python bench_risk_recompute.py                 # --sizes 10000 100000
+    python bench_risk_recompute.py --sizes 50000 --classes 200
+
+Each size runs inside an outer transaction that is rolled back (the job's
+commit becomes a savepoint release), so nothing persists. Still - point
+DATABASE_URL at a dev/scratch database.
+"""
+import os, sys
+sys.path.append(os.getcwd())
+
+import argparse
+import re
+import time
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.db.base import engine
+from app.jobs.recompute_risk_statuses import recompute_all
+
+from check_query_plans import SEED_SQL
+
+# Only the tables the job reads; incidents / broadcasts etc. skip
+SEED_TABLES = {"schools", "classes", "users", "student_profiles", "daily_journals"}
+
+
+def seed_statements():
+    for sql in SEED_SQL:
+        match = re.match(r"\s*INSERT INTO (\w+)", sql)
+        if match and match.group(1) in SEED_TABLES:
+            yield sql
+
+
+def run_size(students: int, classes: int, days: int) -> dict:
+    with engine.connect() as conn:
+        trans = conn.begin()
+        try:
+            params = {"students": students, "classes": classes, "days": days}
+            started = time.perf_counter()
+            for sql in seed_statements():
+                conn.execute(text(sql), params)
+            conn.execute(text("ANALYZE daily_journals"))
+            conn.execute(text("ANALYZE student_profiles"))
+            seeded = time.perf_counter() - started
+
+            with Session(bind=conn, join_transaction_mode="create_savepoint") as db:
+                started = time.perf_counter()
+                summary = recompute_all(db)
+                elapsed = time.perf_counter() - started
+        finally:
+            trans.rollback()
+
+    return {
+        "students": students,
+        "seed_seconds": seeded,
+        "seconds": elapsed,
+        "changed": sum(n for _, _, n in summary),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--classes", type=int, default=100)
+    parser.add_argument("--days", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'students':>9} {'seed s':>8} {'job s':>8} {'changed':>8}")
+    for size in args.sizes:
+        r = run_size(size, args.classes, args.days)
+        print(f"{r['students']:>9} {r['seed_seconds']:>8.2f} {r['seconds']:>8.2f} {r['changed']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# backend/check_instrument_scoring.py
+"""
+Batch vs scalar guard for app/core/instruments.py: scores random answer sets
+(ragged lengths, empty lists, out-of-range and negative values) with both the
+NumPy batch scorer and the scalar calculate_* function, and fails (exit 1) on
+the first row where score, band or alert flag differ. Also prints rows/sec.
+
+    cd backend
+    python check_instrument_scoring.py        # --rows 20000 --seed 7
+
+No database needed.
+"""
+import os, sys
+sys.path.append(os.getcwd())
+
+import argparse
+import random
+import time
+
+from app.core.instruments import INSTRUMENTS, as_matrix, score_batch
+
+
+def random_answers(rng: random.Random, items: int, rows: int):
+    """Mostly valid answers, plus the edge cases the scalar code has to survive."""
+    out = []
+    for _ in range(rows):
+        length = rng.choice([items] * 6 + [0, 1, items - 1, items + 2, rng.randint(0, items * 2)])
+        hi = rng.choice([1, 3, 3, 3, 5])
+        lo = rng.choice([0, 0, 0, 0, -2])
+        out.append([rng.randint(lo, hi) for _ in range(length)])
+    return out
+
+
+def check(code: str, answers) -> int:
+    instrument = INSTRUMENTS[code]
+
+    started = time.perf_counter()
+    expected = [instrument.score(a) for a in answers]
+    scalar_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    result = score_batch(code, answers)
+    batch_s = time.perf_counter() - started
+
+    # Packing ragged lists is most of batch_s; scoring an already-built matrix:
+    matrix = as_matrix(answers, instrument.items)
+    started = time.perf_counter()
+    instrument.score_batch(matrix)
+    matrix_s = time.perf_counter() - started
+
+    mismatches = 0
+    for i, (score, band, alert) in enumerate(expected):
+        got = (int(result.scores[i]), str(result.bands[i]), bool(result.alerts[i]))
+        if got != (score, band, alert):
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"  {code} row {i} {answers[i]}: scalar {(score, band, alert)} batch {got}")
+
+    n = len(answers)
+    print(
+        f"{code:<6} {n:>7} rows  scalar {n / scalar_s:>12,.0f}/s  batch {n / batch_s:>12,.0f}/s  "
+        f"matrix-only {n / max(matrix_s, 1e-9):>12,.0f}/s  mismatches {mismatches}"
+    )
+    return mismatches
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    failures = 0
+    for code, instrument in INSTRUMENTS.items():
+        failures += check(code, random_answers(rng, instrument.items, args.rows))
+
+    # Exhaustive for C-SSRS: saare 0/1 combinations, har length pe
+    combos = [
+        [(bits >> j) & 1 for j in range(length)]
+        for length in range(0, 8)
+        for bits in range(2 ** length)
+    ]
+    failures += check("CSSRS", combos)
+
+    if failures:
+        print(f"FAIL: {failures} mismatching rows")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
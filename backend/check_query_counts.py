@@ -0,0 +1,200 @@
+# backend/check_query_counts.py
+"""
+N+1 guard: calls the list/detail endpoints directly against a small and a
+large seeded dataset and fails (exit 1) if the number of SQL statements an
+endpoint runs changes with the row count, or differs from EXPECTED.
+Polled endpoints are called twice; the "(304)" rows replay the returned ETag
+and must short-circuit before any rows are loaded. Streamed bodies are
+consumed, so their per-chunk queries count too.
+
+    cd backend
+    alembic upgrade head
+    python check_query_counts.py        # --small 5 --large 500
+
+Seeding happens inside an outer transaction that is rolled back, so nothing
+persists. Sessions an endpoint opens itself (streamed journal chunks) are
+pointed at the same connection, so they see the seeded rows. Still - point DATABASE_URL at a dev/scratch database.
+"""
+import os, sys
+sys.path.append(os.getcwd())
+
+import argparse
+import asyncio
+from contextlib import contextmanager
+
+from fastapi import Request, Response
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.v1 import counselors, parents, principal, students
+from app.core import student_identity
+from app.core.pagination import PageParams
+from app.db.base import AsyncSessionLocal, async_engine
+
+from check_query_plans import SEED_SQL
+
+# Statements per call (cold identity cache), independent of dataset size
+EXPECTED = {
+    "counselors.get_at_risk_students": 1,
+    "counselors.get_student_detail": 3,
+    "counselors.get_student_timeseries": 3,
+    "counselors.get_incident_reports_for_counselor": 1,
+    "principal.get_incident_reports_for_principal": 1,
+    "students.student_inbox": 3,
+    "students.student_inbox (304)": 2,
+    "students.get_my_journals": 3,
+    "students.get_my_journals (304)": 2,
+    "students.get_my_assessment_history": 3,
+    "students.get_my_assessment_history (304)": 2,
+    "parents.parent_dashboard": 3,
+    "parents.parent_dashboard (304)": 2,
+}
+
+PARENT_SEED_SQL = [
+    """
+    INSERT INTO users (id, email, role, school_id, full_name)
+    VALUES (899999, 'plancheck_parent@pilot.school', 'PARENT', 900001, 'Parent')
+    """,
+    """
+    INSERT INTO parent_student_link (parent_id, student_profile_id)
+    SELECT 899999, 900000 + s FROM generate_series(1, LEAST(:students, 3)) AS s
+    """,
+]
+
+
+def endpoint_calls(db: AsyncSession):
+    """(label, coroutine factory) pairs, auth deps passed as dummies."""
+    page = lambda: PageParams(limit=50, cursor=None)
+    return [
+        ("counselors.get_at_risk_students",
+         lambda: counselors.get_at_risk_students(page=page(), db=db, _role=None, _ep=None)),
+        ("counselors.get_student_detail",
+         lambda: counselors.get_student_detail(student_id=900001, db=db, _role=None, _ep=None)),
+        ("counselors.get_student_timeseries",
+         lambda: counselors.get_student_timeseries(
+             student_id=900001, days=365, bucket="auto", db=db, _role=None, _ep=None)),
+        ("counselors.get_incident_reports_for_counselor",
+         lambda: counselors.get_incident_reports_for_counselor(page=page(), db=db, _role=None, _ep=None)),
+        ("principal.get_incident_reports_for_principal",
+         lambda: principal.get_incident_reports_for_principal(page=page(), db=db, _role=None, _ep=None)),
+    ]
+
+
+def conditional_calls(db: AsyncSession):
+    """Polled endpoints: (label, factory(request, response)) pairs."""
+    page = lambda: PageParams(limit=50, cursor=None)
+    payload = {"email": "plancheck_1@pilot.school"}
+    return [
+        ("students.student_inbox",
+         lambda rq, rs: students.student_inbox(request=rq, response=rs, page=page(), db=db, payload=payload)),
+        ("students.get_my_journals",
+         lambda rq, rs: students.get_my_journals(request=rq, response=rs, days=14, db=db, payload=payload)),
+        ("students.get_my_assessment_history",
+         lambda rq, rs: students.get_my_assessment_history(
+             request=rq, response=rs, page=page(), db=db, payload=payload)),
+        ("parents.parent_dashboard",
+         lambda rq, rs: parents.parent_dashboard(
+             request=rq, response=rs, days=7, db=db, _payload=None, _ep=None)),
+    ]
+
+
+def _request(headers: dict) -> Request:
+    return Request({
+        "type": "http",
+        "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers.items()],
+    })
+
+
+async def drain(result):
+    """Streamed endpoints query while the body is sent; consume it so those count too."""
+    body = getattr(result, "body_iterator", None)
+    if body is not None:
+        async for _ in body:
+            pass
+    return result
+
+
+@contextmanager
+def count_statements(counter: list):
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        # harness ke apne SAVEPOINT / RELEASE count nahi karne
+        if not statement.lstrip().upper().startswith(("SAVEPOINT", "RELEASE", "ROLLBACK")):
+            counter[0] += 1
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", _before)
+    try:
+        yield
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", _before)
+
+
+async def measure(students_n: int, days: int, classes: int) -> dict:
+    counts = {}
+    async with async_engine.connect() as conn:
+        trans = await conn.begin()
+        try:
+            params = {"students": students_n, "classes": classes, "days": days}
+            for sql in SEED_SQL[:-1] + PARENT_SEED_SQL:  # ANALYZE chahiye nahi
+                await conn.execute(text(sql), params)
+
+            # Endpoint commits/rollbacks become savepoint ops inside our transaction
+            async with AsyncSession(
+                bind=conn, join_transaction_mode="create_savepoint", expire_on_commit=False
+            ) as db:
+                students.AsyncSessionLocal = lambda: AsyncSession(
+                    bind=conn, join_transaction_mode="create_savepoint", expire_on_commit=False
+                )
+                for label, call in endpoint_calls(db):
+                    student_identity.clear()  # cold cache = worst case count
+                    counter = [0]
+                    with count_statements(counter):
+                        await call()
+                    counts[label] = counter[0]
+                    db.expunge_all()  # identity map se free hits na milein
+
+                for label, call in conditional_calls(db):
+                    student_identity.clear()
+                    counter, response = [0], Response()
+                    with count_statements(counter):
+                        await drain(await call(_request({}), response))
+                    counts[label] = counter[0]
+                    db.expunge_all()
+
+                    student_identity.clear()
+                    counter = [0]
+                    with count_statements(counter):
+                        replay = await call(_request({"If-None-Match": response.headers["etag"]}), Response())
+                    # Not a 304 -> report -1 so the check fails loudly
+                    counts[f"{label} (304)"] = counter[0] if getattr(replay, "status_code", None) == 304 else -1
+                    db.expunge_all()
+        finally:
+            students.AsyncSessionLocal = AsyncSessionLocal
+            await trans.rollback()
+    # asyncpg connections belong to this event loop; next asyncio.run gets fresh ones
+    await async_engine.dispose()
+    return counts
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--small", type=int, default=5, help="students in the small dataset")
+    parser.add_argument("--large", type=int, default=500, help="students in the large dataset")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--classes", type=int, default=10)
+    args = parser.parse_args()
+
+    small = asyncio.run(measure(args.small, args.days, args.classes))
+    large = asyncio.run(measure(args.large, args.days, args.classes))
+
+    failures = 0
+    print(f"{'endpoint':<50} {'small':>6} {'large':>6} {'expected':>9}")
+    for label, expected in EXPECTED.items():
+        ok = small[label] == large[label] == expected
+        failures += not ok
+        print(f"{'✅' if ok else '❌'} {label:<48} {small[label]:>6} {large[label]:>6} {expected:>9}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
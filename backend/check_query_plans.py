@@ -0,0 +1,263 @@
+# backend/check_query_plans.py
+"""
+Seeds a realistic dataset, runs EXPLAIN on the hot endpoint queries and
+fails (exit 1) if any of them doesn't use an index. Exception: tables in
+SEQ_SCAN_OK are a few pages at most (one row per class x zone), where a
+Seq Scan is the right plan.
+
+    cd backend
+    alembic upgrade head            # indexes come from migrations
+    python check_query_plans.py     # --students 5000 --days 180
+
+Everything happens inside ONE transaction that is rolled back at the end,
+so the seeded rows (and ANALYZE stats) never persist. Still - point
+DATABASE_URL at a dev/scratch database, not production.
+"""
+import os, sys
+sys.path.append(os.getcwd())
+
+import argparse
+import re
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, or_, select, text, tuple_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app import models
+from app.core.pagination import PageParams, encode_cursor, keyset_paginate
+from app.db.base import engine
+
+INDEX_NODES = ("Index Scan", "Index Only Scan", "Bitmap Index Scan")
+SEQ_SCAN_OK = ("risk_zone_counters",)
+
+
+SEED_SQL = [
+    "INSERT INTO schools (id, name) VALUES (900001, 'Plan Check School')",
+    """
+    INSERT INTO classes (id, name, school_id)
+    SELECT 900000 + c, 'PC-' || c, 900001 FROM generate_series(1, :classes) AS c
+    """,
+    """
+    INSERT INTO users (id, email, role, school_id, full_name)
+    SELECT 900000 + s, 'plancheck_' || s || '@pilot.school', 'STUDENT', 900001, 'Student ' || s
+    FROM generate_series(1, :students) AS s
+    """,
+    """
+    INSERT INTO student_profiles (id, user_id, class_id, roll_number, risk_status, streak_count)
+    SELECT 900000 + s, 900000 + s, 900000 + 1 + (s % :classes), s::text,
+           (ARRAY['GREEN','GREEN','GREEN','ORANGE','RED','CRISIS'])[1 + s % 6], 0
+    FROM generate_series(1, :students) AS s
+    """,
+    """
+    INSERT INTO daily_journals (student_id, date, mood, sleep_hours,
+        has_anxiety_terms, has_low_mood_terms, has_self_worth_terms, has_severe_suicidal_terms,
+        trigger_tags)
+    SELECT 900000 + s, now() - make_interval(days => d),
+           (ARRAY['HAPPY','WORRIED','SAD','FLAT'])[1 + (s + d) % 4], 7,
+           false, false, false, false,
+           CASE WHEN (s + d) % 3 = 0
+                THEN jsonb_build_array((ARRAY['Exams','Friends','Family','Sleep'])[1 + (s + d) % 4])
+           END
+    FROM generate_series(1, :students) AS s, generate_series(0, :days - 1) AS d
+    """,
+    """
+    INSERT INTO daily_mood_rollups (student_id, day, mood, class_id, count)
+    SELECT j.student_id, j.date::date, j.mood, sp.class_id, count(*)
+    FROM daily_journals j JOIN student_profiles sp ON sp.id = j.student_id
+    WHERE j.student_id > 900000
+    GROUP BY 1, 2, 3, 4
+    """,
+    """
+    INSERT INTO assessments (student_id, type, total_score, answers, is_alert, created_at)
+    SELECT 900000 + s, 'PHQ9', (s + w) % 27, '[]'::json, false, now() - make_interval(days => w * 7)
+    FROM generate_series(1, :students) AS s, generate_series(0, :days / 7) AS w
+    """,
+    """
+    INSERT INTO incident_reports (id, class_id, school_id, type, description, status, created_at)
+    SELECT 'plancheck-' || i, 900000 + 1 + (i % :classes), 900001, 'BULLYING', 'seed', 'PENDING',
+           now() - make_interval(mins => i)
+    FROM generate_series(1, :students * 4) AS i
+    """,
+    """
+    INSERT INTO broadcast_messages (sender_role, school_id, class_id, student_profile_id, content, created_at)
+    SELECT 'PRINCIPAL',
+           CASE WHEN i % 3 = 0 THEN 900001 END,
+           CASE WHEN i % 3 = 1 THEN 900000 + 1 + (i % :classes) END,
+           CASE WHEN i % 3 = 2 THEN 900000 + 1 + (i % :students) END,
+           'seed', now() - make_interval(mins => i)
+    FROM generate_series(1, :students * 4) AS i
+    """,
+    """
+    INSERT INTO risk_zone_counters (school_id, class_id, risk_status, count)
+    SELECT 900001, class_id, risk_status, count(*)
+    FROM student_profiles WHERE id > 900000
+    GROUP BY class_id, risk_status
+    """,
+    "ANALYZE",
+]
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN <stmt>, executed like the statement itself (same bind processing, e.g. JSONB)."""
+    inherit_cache = False
+
+    def __init__(self, stmt):
+        self.stmt = stmt
+
+
+@compiles(Explain)
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN " + compiler.process(element.stmt, **kw)
+
+
+def _page(limit: int = 50, after=None) -> PageParams:
+    # Same shape as the endpoints' ?limit=&cursor=
+    return PageParams(limit=limit, cursor=encode_cursor(after) if after else None)
+
+
+def hot_queries():
+    """(label, statement) pairs mirroring what the endpoints run."""
+    student_id = 900001
+    class_id = 900002
+    now = datetime.utcnow()
+
+    J = models.DailyJournal
+    A = models.Assessment
+    SP = models.StudentProfile
+    I = models.IncidentReport
+    B = models.BroadcastMessage
+    R = models.DailyMoodRollup
+    C = models.RiskZoneCounter
+
+    inbox_visible = or_(
+        (B.school_id == 900001) & B.class_id.is_(None) & B.student_profile_id.is_(None),
+        B.class_id == class_id,
+        B.student_profile_id == student_id,
+    )
+    at_risk = (
+        select(SP.id, SP.risk_status, SP.roll_number, SP.streak_count, SP.class_id)
+        .where(SP.risk_status.in_(["ORANGE", "RED", "CRISIS"]))
+    )
+
+    return [
+        (
+            "students.get_my_journals",
+            select(J).where(J.student_id == student_id, J.date >= now - timedelta(days=14))
+            .order_by(J.date.desc()),
+        ),
+        (
+            "principal.admin_dashboard (mood rollup, 7 days)",
+            select(R.mood, func.sum(R.count)).where(R.day >= now.date() - timedelta(days=6))
+            .group_by(R.mood),
+        ),
+        (
+            "teachers.teacher_class_mood (class mood rollup, 30 days)",
+            select(R.mood, func.sum(R.count))
+            .where(R.class_id == class_id, R.day >= now.date() - timedelta(days=29))
+            .group_by(R.mood),
+        ),
+        (
+            "students.get_my_assessment_history (keyset page)",
+            select(A).where(
+                A.student_id == student_id,
+                tuple_(A.created_at, A.id) < tuple_(now - timedelta(days=30), 10**9),
+            ).order_by(A.created_at.desc(), A.id.desc()).limit(51),
+        ),
+        (
+            "principal.principal_top_stressors (tagged rows, 30 days)",
+            select(J.date, J.trigger_tags).where(
+                J.trigger_tags.isnot(None), J.date >= now - timedelta(days=30)
+            ),
+        ),
+        (
+            "principal.principal_top_stressors (tag filter)",
+            select(J.id).where(J.trigger_tags.contains(["Exams"])),
+        ),
+        (
+            "teachers.teacher_class_mood (class students)",
+            select(SP.id).where(SP.class_id == class_id),
+        ),
+        (
+            "counselors/principal incident list (first page)",
+            select(I).order_by(I.created_at.desc(), I.id.desc()).limit(51),
+        ),
+        (
+            "counselors/principal incident list (deep keyset page)",
+            select(I).where(tuple_(I.created_at, I.id) < tuple_(now - timedelta(days=3), "plancheck-z"))
+            .order_by(I.created_at.desc(), I.id.desc()).limit(51),
+        ),
+        (
+            "students.student_inbox (first page)",
+            keyset_paginate(select(B).where(inbox_visible), [B.created_at, B.id], _page()),
+        ),
+        (
+            "students.student_inbox (keyset page)",
+            keyset_paginate(
+                select(B).where(inbox_visible), [B.created_at, B.id],
+                _page(after=[now - timedelta(days=1), 10**9]),
+            ),
+        ),
+        (
+            "counselors.get_at_risk_students (first page)",
+            keyset_paginate(at_risk, [SP.id], _page(), descending=False),
+        ),
+        (
+            "counselors.get_at_risk_students (keyset page)",
+            keyset_paginate(at_risk, [SP.id], _page(after=[900000 + 1000]), descending=False),
+        ),
+        (
+            "principal/counselor dashboard (school risk counters)",
+            select(C.risk_status, func.sum(C.count)).group_by(C.risk_status),
+        ),
+        (
+            "teachers.teacher_dashboard (class risk counters)",
+            select(C.risk_status, func.sum(C.count)).where(C.class_id == class_id).group_by(C.risk_status),
+        ),
+    ]
+
+
+def explain(conn, stmt) -> str:
+    rows = conn.execute(Explain(stmt)).all()
+    return "\n".join(r[0] for r in rows)
+
+
+def uses_index(plan: str) -> bool:
+    if any(node in plan for node in INDEX_NODES):
+        return True
+    scanned = re.findall(r"Seq Scan on (\w+)", plan)
+    return bool(scanned) and all(table in SEQ_SCAN_OK for table in scanned)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=3000)
+    parser.add_argument("--classes", type=int, default=60)
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--verbose", action="store_true", help="print full plans")
+    args = parser.parse_args()
+
+    failures = 0
+    with engine.connect() as conn:
+        trans = conn.begin()
+        try:
+            print(f"🌱 Seeding {args.students} students x {args.days} days (rolled back at the end)...")
+            params = {"students": args.students, "classes": args.classes, "days": args.days}
+            for sql in SEED_SQL:
+                conn.execute(text(sql), params)
+
+            for label, stmt in hot_queries():
+                plan = explain(conn, stmt)
+                ok = uses_index(plan)
+                failures += not ok
+                print(f"{'✅' if ok else '❌'} {label}")
+                if args.verbose or not ok:
+                    print("    " + plan.replace("\n", "\n    "))
+        finally:
+            trans.rollback()
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
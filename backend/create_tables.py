@@ -4,13 +4,45 @@ import os
 
 sys.path.append(os.getcwd())
 
-from app.db.base import engine, Base
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+
+from app.core.risk_counters import rebuild_risk_counters
+from app.db.base import engine, Base, SessionLocal
 
 from app import models 
 
-print("Creating tables in nefera_db...")
+# Schema ab migrations (backend/migrations) se banta hai: `alembic upgrade head`.
+# Ye script wahi chalata hai, aur purane create_all-wale DBs ko ek baar baseline pe stamp karta hai.
+BASELINE_TABLES = [
+    "schools", "users", "classes", "student_profiles", "parent_student_link",
+    "daily_journals", "student_risk_windows", "assessments", "safety_events",
+    "incident_reports", "broadcast_messages", "job_checkpoints", "risk_zone_counters",
+]
+
+alembic_cfg = Config(os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini"))
+
+print("Migrating nefera_db...")
 try:
-    Base.metadata.create_all(bind=engine)
+    tables = inspect(engine).get_table_names()
+    if "schools" in tables and "alembic_version" not in tables:
+        print("ℹ️ Existing create_all database: filling missing tables + stamping baseline")
+        Base.metadata.create_all(
+            bind=engine,
+            tables=[Base.metadata.tables[t] for t in BASELINE_TABLES],
+        )
+        command.stamp(alembic_cfg, "0001")
+
+        # risk_zone_counters abhi khaali hai; dashboards ko zero na dikhe, isliye ek baar count karo
+        db = SessionLocal()
+        try:
+            rebuild_risk_counters(db)
+        finally:
+            db.close()
+        print("ℹ️ risk_zone_counters seeded from student_profiles")
+
+    command.upgrade(alembic_cfg, "head")
     print("✅ Success!")
 except Exception as e:
-    print(f"❌ Error: {e}")
\ No newline at end of file
+    print(f"❌ Error: {e}")
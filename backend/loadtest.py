@@ -0,0 +1,103 @@
+# backend/loadtest.py
+"""
+Closed-loop HTTP load test: N concurrent clients hammer one endpoint for a
+fixed duration, then requests/sec and latency percentiles are printed.
+
+Compare the sync and async request paths by running the API twice
+(e.g. the pre-async commit in a git worktree on :8001, this tree on :8000):
+
+    python loadtest.py --concurrency 500 --duration 30 \
+        --target sync=http://localhost:8001/counselors/dashboard \
+        --target async=http://localhost:8000/counselors/dashboard \
+        --header "x-nefera-demo-token: <token>" \
+        --header "x-nefera-entrypoint: counselor_portal"
+
+Run the server with enough workers/connections for the client count, e.g.
+`uvicorn app.main:app --workers 1 --limit-concurrency 2000`.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Dict, List
+
+import httpx
+
+
+async def _client(http: httpx.AsyncClient, url: str, deadline: float, latencies: List[float], errors: List[int]):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            resp = await http.get(url)
+            if resp.status_code >= 400:
+                errors.append(resp.status_code)
+                continue
+        except httpx.HTTPError:
+            errors.append(0)
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+async def run_target(url: str, concurrency: int, duration: float, headers: Dict[str, str]) -> dict:
+    latencies: List[float] = []
+    errors: List[int] = []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(headers=headers, limits=limits, timeout=30.0) as http:
+        # warm-up: pool + server caches
+        await asyncio.gather(*(http.get(url) for _ in range(min(concurrency, 50))), return_exceptions=True)
+
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(
+            *(_client(http, url, deadline, latencies, errors) for _ in range(concurrency))
+        )
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+
+    def pct(p: float) -> float:
+        if not latencies:
+            return float("nan")
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": len(latencies) / elapsed,
+        "p50": pct(0.50),
+        "p99": pct(0.99),
+        "mean": statistics.fmean(latencies) * 1000 if latencies else float("nan"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare req/s and p99 between API builds")
+    parser.add_argument("--target", action="append", required=True, help="label=url (repeatable)")
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--header", action="append", default=[], help='"Name: value" (repeatable)')
+    args = parser.parse_args()
+
+    headers = {}
+    for h in args.header:
+        name, _, value = h.partition(":")
+        headers[name.strip()] = value.strip()
+
+    results = {}
+    for target in args.target:
+        label, _, url = target.partition("=")
+        print(f"→ {label}: {args.concurrency} clients for {args.duration:.0f}s on {url}")
+        results[label] = asyncio.run(run_target(url, args.concurrency, args.duration, headers))
+
+    print()
+    print(f"{'target':<10} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'mean ms':>9} {'errors':>7}")
+    for label, r in results.items():
+        print(
+            f"{label:<10} {r['rps']:>9.1f} {r['p50']:>9.1f} {r['p99']:>9.1f} "
+            f"{r['mean']:>9.1f} {r['errors']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""baseline schema (what create_tables.py used to build)
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+
+Databases created earlier with create_tables.py already have most of these
+tables: run `python create_tables.py` once. It adds the missing ones, seeds
+risk_zone_counters from student_profiles and stamps 0001 before upgrading.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+user_role = sa.Enum("STUDENT", "COUNSELOR", "PRINCIPAL", "TEACHER", "PARENT", name="userrole")
+incident_type = sa.Enum("BULLYING", "HARASSMENT", "RAGGING", "OTHER", name="incidenttype")
+incident_status = sa.Enum("PENDING", "REVIEWED", "RESOLVED", name="incidentstatus")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "schools",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String()),
+    )
+    op.create_index("ix_schools_id", "schools", ["id"])
+
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String()),
+        sa.Column("hashed_password", sa.String(), nullable=True),
+        sa.Column("role", user_role),
+        sa.Column("school_id", sa.Integer(), sa.ForeignKey("schools.id")),
+        sa.Column("full_name", sa.String(), nullable=True),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "classes",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String()),
+        sa.Column("school_id", sa.Integer(), sa.ForeignKey("schools.id")),
+    )
+    op.create_index("ix_classes_id", "classes", ["id"])
+
+    op.create_table(
+        "student_profiles",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("class_id", sa.Integer(), sa.ForeignKey("classes.id")),
+        sa.Column("roll_number", sa.String(), nullable=True),
+        sa.Column("risk_status", sa.String()),
+        sa.Column("streak_count", sa.Integer()),
+    )
+    op.create_index("ix_student_profiles_id", "student_profiles", ["id"])
+
+    op.create_table(
+        "parent_student_link",
+        sa.Column("parent_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("student_profile_id", sa.Integer(), sa.ForeignKey("student_profiles.id"), primary_key=True),
+    )
+
+    op.create_table(
+        "daily_journals",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("student_id", sa.Integer(), sa.ForeignKey("student_profiles.id")),
+        sa.Column("date", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("mood", sa.String()),
+        sa.Column("sleep_hours", sa.Integer()),
+        sa.Column("checkin_data", sa.JSON()),
+        sa.Column("journal_text", sa.Text(), nullable=True),
+        sa.Column("has_anxiety_terms", sa.Boolean(), nullable=False),
+        sa.Column("has_low_mood_terms", sa.Boolean(), nullable=False),
+        sa.Column("has_self_worth_terms", sa.Boolean(), nullable=False),
+        sa.Column("has_severe_suicidal_terms", sa.Boolean(), nullable=False),
+        sa.Column("trigger_tags", sa.JSON(), nullable=True),
+    )
+    op.create_index("ix_daily_journals_id", "daily_journals", ["id"])
+
+    op.create_table(
+        "student_risk_windows",
+        sa.Column("student_id", sa.Integer(), sa.ForeignKey("student_profiles.id"), primary_key=True),
+        sa.Column("anchor_day", sa.Date(), nullable=False),
+        sa.Column("buckets", sa.JSON(), nullable=False),
+    )
+
+    op.create_table(
+        "assessments",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("student_id", sa.Integer(), sa.ForeignKey("student_profiles.id")),
+        sa.Column("type", sa.String()),
+        sa.Column("total_score", sa.Integer()),
+        sa.Column("answers", sa.JSON()),
+        sa.Column("is_alert", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_assessments_id", "assessments", ["id"])
+
+    op.create_table(
+        "safety_events",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("student_id", sa.Integer(), sa.ForeignKey("student_profiles.id"), nullable=False),
+        sa.Column("trigger_type", sa.String(), nullable=False),
+        sa.Column("risk_band", sa.String(), nullable=False),
+        sa.Column("details", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_safety_events_id", "safety_events", ["id"])
+
+    op.create_table(
+        "incident_reports",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("student_id", sa.Integer(), sa.ForeignKey("student_profiles.id"), nullable=True),
+        sa.Column("class_id", sa.Integer(), sa.ForeignKey("classes.id"), nullable=False),
+        sa.Column("school_id", sa.Integer(), sa.ForeignKey("schools.id"), nullable=False),
+        sa.Column("type", incident_type, nullable=False),
+        sa.Column("description", sa.Text(), nullable=False),
+        sa.Column("status", incident_status, nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_incident_reports_id", "incident_reports", ["id"])
+
+    op.create_table(
+        "broadcast_messages",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("sender_role", user_role, nullable=False),
+        sa.Column("school_id", sa.Integer(), sa.ForeignKey("schools.id"), nullable=True),
+        sa.Column("class_id", sa.Integer(), sa.ForeignKey("classes.id"), nullable=True),
+        sa.Column("student_profile_id", sa.Integer(), sa.ForeignKey("student_profiles.id"), nullable=True),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_broadcast_messages_id", "broadcast_messages", ["id"])
+
+    op.create_table(
+        "job_checkpoints",
+        sa.Column("name", sa.String(), primary_key=True),
+        sa.Column("last_id", sa.Integer(), nullable=False),
+        sa.Column("rows_done", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+    op.create_table(
+        "risk_zone_counters",
+        sa.Column("school_id", sa.Integer(), primary_key=True),
+        sa.Column("class_id", sa.Integer(), primary_key=True),
+        sa.Column("risk_status", sa.String(), primary_key=True),
+        sa.Column("count", sa.Integer(), nullable=False),
+    )
+    op.create_index("ix_risk_zone_counters_class_id", "risk_zone_counters", ["class_id"])
+
+
+def downgrade() -> None:
+    for table in (
+        "risk_zone_counters",
+        "job_checkpoints",
+        "broadcast_messages",
+        "incident_reports",
+        "safety_events",
+        "assessments",
+        "student_risk_windows",
+        "daily_journals",
+        "parent_student_link",
+        "student_profiles",
+        "classes",
+        "users",
+        "schools",
+    ):
+        op.drop_table(table)
+    for enum in (incident_status, incident_type, user_role):
+        enum.drop(op.get_bind(), checkfirst=True)
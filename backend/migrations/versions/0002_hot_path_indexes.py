@@ -0,0 +1,48 @@
+"""indexes for the hot read paths, built CONCURRENTLY
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+
+CREATE INDEX CONCURRENTLY can't run inside a transaction, so each index is
+built in an autocommit block: writes to the tables keep flowing while the
+index builds. If a build is interrupted Postgres leaves an INVALID index
+behind - drop it (DROP INDEX CONCURRENTLY <name>) and re-run the upgrade.
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+# (index name, table, columns)
+INDEXES = [
+    ("ix_daily_journals_student_id_date", "daily_journals", ["student_id", "date"]),
+    ("ix_daily_journals_date", "daily_journals", ["date"]),
+    ("ix_assessments_student_id_created_at", "assessments", ["student_id", "created_at"]),
+    ("ix_student_profiles_class_id_risk_status", "student_profiles", ["class_id", "risk_status"]),
+    ("ix_incident_reports_created_at", "incident_reports", ["created_at"]),
+    ("ix_broadcast_messages_school_id", "broadcast_messages", ["school_id"]),
+    ("ix_broadcast_messages_class_id", "broadcast_messages", ["class_id"]),
+    ("ix_broadcast_messages_student_profile_id", "broadcast_messages", ["student_profile_id"]),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,44 @@
+"""(created_at, id) indexes for keyset pagination
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+
+List endpoints page with `WHERE (created_at, id) < (:c, :i) ORDER BY
+created_at DESC, id DESC LIMIT n`. These indexes replace the created_at-only
+ones from 0002 so that seek is a single index range scan.
+New indexes are built before the old ones are dropped (both CONCURRENTLY).
+"""
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+# (new index, table, columns, replaced index, its columns)
+INDEXES = [
+    (
+        "ix_incident_reports_created_at_id", "incident_reports", ["created_at", "id"],
+        "ix_incident_reports_created_at", ["created_at"],
+    ),
+    (
+        "ix_assessments_student_id_created_at_id", "assessments", ["student_id", "created_at", "id"],
+        "ix_assessments_student_id_created_at", ["student_id", "created_at"],
+    ),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns, old_name, _ in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+            op.drop_index(old_name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, old_name, old_columns in reversed(INDEXES):
+            op.create_index(old_name, table, old_columns, postgresql_concurrently=True, if_not_exists=True)
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
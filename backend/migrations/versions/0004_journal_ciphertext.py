@@ -0,0 +1,29 @@
+"""binary journal_ciphertext column (AES-GCM journal format)
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+
+New journals are stored as versioned binary AEAD ciphertext instead of
+base64 Fernet text. Old rows keep their Fernet token in journal_text and
+are still readable (app/core/security/encryption.py). Adding a nullable
+column without a default is metadata-only in Postgres, no table rewrite.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # create_tables.py may have just create_all'd daily_journals from the current model
+    columns = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("daily_journals")}
+    if "journal_ciphertext" not in columns:
+        op.add_column("daily_journals", sa.Column("journal_ciphertext", sa.LargeBinary(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("daily_journals", "journal_ciphertext")
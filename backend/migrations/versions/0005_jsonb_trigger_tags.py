@@ -0,0 +1,82 @@
+"""JSONB trigger_tags / checkin_data + indexes for SQL-side stressor counts
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+
+json -> jsonb is a table rewrite under ACCESS EXCLUSIVE lock on
+daily_journals, so check-ins block while it runs: run this one in a quiet
+window. Legacy comma-separated string tags become arrays and JSON `null`
+becomes SQL NULL, so "trigger_tags IS NOT NULL" means "is an array".
+Indexes are then built CONCURRENTLY:
+- GIN (jsonb_path_ops) for `trigger_tags @> '["Exams"]'` filters
+- partial (date) INCLUDE (student_id, trigger_tags) over tagged rows only,
+  so the top-stressors window is an index-only range scan
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.alter_column(
+        "daily_journals", "checkin_data",
+        type_=postgresql.JSONB(), postgresql_using="checkin_data::jsonb",
+    )
+    op.alter_column(
+        "daily_journals", "trigger_tags",
+        type_=postgresql.JSONB(), postgresql_using="trigger_tags::jsonb",
+    )
+    op.execute("""
+        UPDATE daily_journals SET trigger_tags = (
+            SELECT jsonb_agg(btrim(t))
+            FROM unnest(string_to_array(trigger_tags #>> '{}', ',')) AS t
+            WHERE btrim(t) <> ''
+        )
+        WHERE jsonb_typeof(trigger_tags) = 'string'
+    """)
+    op.execute("""
+        UPDATE daily_journals SET trigger_tags = NULL
+        WHERE jsonb_typeof(trigger_tags) <> 'array'
+           OR trigger_tags = '[]'::jsonb
+    """)
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_daily_journals_trigger_tags",
+            "daily_journals",
+            ["trigger_tags"],
+            postgresql_using="gin",
+            postgresql_ops={"trigger_tags": "jsonb_path_ops"},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_daily_journals_date_tagged",
+            "daily_journals",
+            ["date"],
+            postgresql_include=["student_id", "trigger_tags"],
+            postgresql_where=sa.text("trigger_tags IS NOT NULL"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name in ("ix_daily_journals_date_tagged", "ix_daily_journals_trigger_tags"):
+            op.drop_index(name, table_name="daily_journals", postgresql_concurrently=True, if_exists=True)
+
+    op.alter_column(
+        "daily_journals", "trigger_tags",
+        type_=sa.JSON(), postgresql_using="trigger_tags::json",
+    )
+    op.alter_column(
+        "daily_journals", "checkin_data",
+        type_=sa.JSON(), postgresql_using="checkin_data::json",
+    )
@@ -0,0 +1,36 @@
+"""daily_mood_rollups: per-day mood counts for the dashboards
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+
+New, empty table, so plain CREATE INDEX is fine here. Fill history with
+`python -m app.jobs.backfill_mood_rollups` after deploying the code that
+writes rollups at check-in time.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "daily_mood_rollups",
+        sa.Column("student_id", sa.Integer(), sa.ForeignKey("student_profiles.id"), primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("mood", sa.String(), primary_key=True),
+        sa.Column("class_id", sa.Integer(), primary_key=True),
+        sa.Column("count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.create_index("ix_daily_mood_rollups_class_id_day", "daily_mood_rollups", ["class_id", "day"])
+    op.create_index("ix_daily_mood_rollups_day", "daily_mood_rollups", ["day"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_daily_mood_rollups_day", table_name="daily_mood_rollups")
+    op.drop_index("ix_daily_mood_rollups_class_id_day", table_name="daily_mood_rollups")
+    op.drop_table("daily_mood_rollups")
@@ -0,0 +1,29 @@
+"""risk_recompute_queue: deduplicated pending risk recomputes
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+
+Used when RISK_QUEUE_BACKEND=db. New, empty table.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "risk_recompute_queue",
+        sa.Column("student_id", sa.Integer(), sa.ForeignKey("student_profiles.id"), primary_key=True),
+        sa.Column("enqueued_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index("ix_risk_recompute_queue_enqueued_at", "risk_recompute_queue", ["enqueued_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_risk_recompute_queue_enqueued_at", table_name="risk_recompute_queue")
+    op.drop_table("risk_recompute_queue")